@@ -0,0 +1,216 @@
+"""
+Benchmark concurrent judgment streaming under WSGI and ASGI.
+
+``fake-ollama`` serves ``/api/chat`` like Ollama, streaming NDJSON tokens
+with a fixed delay, so the benchmark measures the server and not the model.
+``run`` submits N pieces of evidence to each server URL and then opens all N
+judgment streams at once, reporting time to first byte and total latency.
+
+Usage (from the directory containing manage.py):
+
+    python benchmarks/concurrency_benchmark.py fake-ollama --port 11435
+    OLLAMA_HOST=http://127.0.0.1:11435 gunicorn sdg16.wsgi -w 1 --threads 8 -b :8001
+    OLLAMA_HOST=http://127.0.0.1:11435 uvicorn sdg16.asgi:application --port 8002
+    python benchmarks/concurrency_benchmark.py run --url http://127.0.0.1:8001 \\
+        --url http://127.0.0.1:8002 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+import urllib.parse
+from datetime import datetime, timezone
+
+# -- fake ollama ---------------------------------------------------------------
+
+
+async def handle_chat(reader, writer, tokens, delay):
+    try:
+        request_line = await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value.strip())
+        body = json.loads(await reader.readexactly(length) or b'{}')
+        if not request_line.startswith(b'POST /api/chat'):
+            writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            return
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n')
+
+        def chunk(payload):
+            data = (json.dumps(payload) + '\n').encode()
+            writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+
+        for i in range(tokens):
+            await asyncio.sleep(delay)
+            chunk({
+                'model': body.get('model', ''),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'message': {'role': 'assistant', 'content': f'token{i} '},
+                'done': False,
+            })
+            await writer.drain()
+        chunk({
+            'model': body.get('model', ''),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'message': {'role': 'assistant', 'content': ''},
+            'done': True,
+            'done_reason': 'stop',
+        })
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_fake_ollama(args):
+    server = await asyncio.start_server(
+        lambda r, w: handle_chat(r, w, args.tokens, args.token_delay), args.host, args.port
+    )
+    print(f'🦙 Fake Ollama on http://{args.host}:{args.port} '
+          f'({args.tokens} tokens, {args.token_delay * 1000:.0f} ms apart)')
+    async with server:
+        await server.serve_forever()
+
+
+# -- client --------------------------------------------------------------------
+
+
+async def http_request(url, method='GET', body=None, headers=None, on_first_byte=None):
+    """Minimal HTTP/1.1 client: returns (status, headers, body bytes)."""
+    parts = urllib.parse.urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {parts.netloc}', 'Connection: close']
+    for name, value in (headers or {}).items():
+        lines.append(f'{name}: {value}')
+    if body is not None:
+        lines.append(f'Content-Length: {len(body)}')
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + (body or b''))
+    await writer.drain()
+
+    first = await reader.read(1)
+    if on_first_byte:
+        on_first_byte()
+    raw = first + await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b'\r\n\r\n')
+    head_lines = head.decode('latin-1').split('\r\n')
+    status = int(head_lines[0].split()[1])
+    response_headers = []
+    for line in head_lines[1:]:
+        name, _, value = line.partition(':')
+        response_headers.append((name.strip().lower(), value.strip()))
+    if ('transfer-encoding', 'chunked') in response_headers:
+        payload = dechunk(payload)
+    return status, response_headers, payload
+
+
+def dechunk(payload):
+    out = b''
+    while payload:
+        size_line, _, rest = payload.partition(b'\r\n')
+        size = int(size_line.split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        out += rest[:size]
+        payload = rest[size + 2:]
+    return out
+
+
+async def submit_evidence(base_url, count):
+    """Submit ``count`` distinct pieces of evidence; returns their ids."""
+    _, headers, page = await http_request(base_url + '/')
+    cookie = next(value for name, value in headers if name == 'set-cookie' and value.startswith('csrftoken='))
+    csrf_cookie = cookie.split(';')[0]
+    token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', page).group(1).decode()
+    ids = []
+    for i in range(count):
+        # Distinct text per submission, so neither cache nor dedup short-circuits the judgment
+        body = urllib.parse.urlencode({
+            'csrfmiddlewaretoken': token,
+            'title': f'Benchmark evidence {i} {time.time_ns()}',
+            'description': f'Permit {i} was signed after a bribe was paid; receipt number {time.time_ns()}.',
+            'submitted_by': f'bench-{i}',
+        }).encode()
+        _, _, response = await http_request(base_url + '/', 'POST', body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Cookie': csrf_cookie,
+            'Referer': base_url + '/',
+        })
+        ids.append(json.loads(response)['evidence_id'])
+    return ids
+
+
+async def timed_judgment(base_url, evidence_id):
+    start = time.perf_counter()
+    marks = {}
+    try:
+        status, _, body = await http_request(
+            f'{base_url}/judgment/{evidence_id}/',
+            on_first_byte=lambda: marks.setdefault('ttfb', time.perf_counter() - start),
+        )
+        ok = status == 200 and b'"done"' in body
+    except (OSError, ValueError, IndexError):
+        ok = False
+    return ok, marks.get('ttfb'), time.perf_counter() - start
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run(args):
+    print(f"{'server':<28} {'n':>5} {'ttfb p50':>9} {'ttfb p95':>9} "
+          f"{'total p50':>10} {'total p95':>10} {'wall s':>7} {'errors':>7}")
+    for url in args.url:
+        url = url.rstrip('/')
+        ids = await submit_evidence(url, args.concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(timed_judgment(url, evidence_id) for evidence_id in ids))
+        wall = time.perf_counter() - start
+        ttfbs = [ttfb * 1000 for ok, ttfb, _ in results if ok and ttfb is not None]
+        totals = [total * 1000 for ok, _, total in results if ok]
+        errors = sum(1 for ok, _, _ in results if not ok)
+        print(f'{url:<28} {len(ids):>5} {percentile(ttfbs, 0.5):>9.0f} {percentile(ttfbs, 0.95):>9.0f} '
+              f'{percentile(totals, 0.5):>10.0f} {percentile(totals, 0.95):>10.0f} '
+              f'{wall:>7.2f} {errors:>7}')
+        if totals:
+            print(f"{'':<28} mean total {statistics.mean(totals):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fake = commands.add_parser('fake-ollama', help='serve a token-streaming stand-in for Ollama')
+    fake.add_argument('--host', default='127.0.0.1')
+    fake.add_argument('--port', type=int, default=11435)
+    fake.add_argument('--tokens', type=int, default=50)
+    fake.add_argument('--token-delay', type=float, default=0.02, help='seconds between tokens')
+
+    bench = commands.add_parser('run', help='stream N judgments at once from each server')
+    bench.add_argument('--url', action='append', required=True, help='server base URL (repeatable)')
+    bench.add_argument('--concurrency', type=int, default=50)
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve_fake_ollama(args) if args.command == 'fake-ollama' else run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark the OCR preprocessing engines.
+
+Compares the original PIL ImageEnhance chain against the fused NumPy engine
+(every denoise strategy, with and without binarization) on speed and on the
+tesseract confidence of the result.
+
+Usage (from the directory containing manage.py):
+
+    python benchmarks/preprocessing_benchmark.py scan1.jpg scan2.png --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sdg16.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from PIL import Image  # noqa: E402
+
+from sdg16 import preprocessing  # noqa: E402
+from sdg16.ocr_engine import run_ocr  # noqa: E402
+
+
+def variants():
+    yield 'pil chain', lambda image: preprocessing.enhance_pil_chain(image)
+    if not preprocessing.NUMPY_AVAILABLE:
+        return
+    for denoise in preprocessing.DENOISE_STRATEGIES:
+        for binarize in (False, True):
+            label = f"numpy {denoise}{' +otsu' if binarize else ''}"
+            yield label, (lambda image, d=denoise, b=binarize:
+                          preprocessing.enhance_numpy(image, denoise=d, binarize=b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-ocr', action='store_true', help='time preprocessing only')
+    args = parser.parse_args()
+
+    images = []
+    for path in args.images:
+        image = Image.open(path)
+        image.load()
+        images.append((os.path.basename(path), image))
+
+    print(f"{'engine':<22} {'median ms':>10} {'mean conf':>10}")
+    for label, fn in variants():
+        timings = []
+        confidences = []
+        for _, image in images:
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                enhanced = fn(image)
+                timings.append((time.perf_counter() - started) * 1000)
+            if not args.no_ocr:
+                confidences.append(run_ocr(enhanced)['confidence'])
+        conf = f"{statistics.mean(confidences):.1f}" if confidences else '-'
+        print(f"{label:<22} {statistics.median(timings):>10.1f} {conf:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
-from django.apps import AppConfig
-
-
-class Sdg16Config(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'sdg16'
\ No newline at end of file
+from django.apps import AppConfig
+
+
+class Sdg16Config(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'sdg16'
+
+    def ready(self):
+        # Compile the keyword taxonomy at startup rather than on the first request
+        from . import keywords
+        keywords.get_matcher()
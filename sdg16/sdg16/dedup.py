@@ -0,0 +1,277 @@
+"""
+👯 Near-duplicate detection for submitted evidence.
+
+The same document is often photographed several times or sent in by
+several people. Every submission gets three kinds of 64-bit fingerprints:
+
+* ``content``: the first 64 bits of each upload's SHA-256, matched exactly,
+* ``image``: a difference hash (dHash) of each uploaded image, which
+  survives re-encoding, resizing and small lighting changes, and
+* ``text``: a SimHash over word 3-shingles of the OCR text, which survives
+  OCR noise and small edits.
+
+dHash only sees a 9x8 thumbnail, so pages of different text routinely land
+within a few bits of each other: an ``image`` match is reported, never
+trusted. Only an identical file (``content``) may stand in for another's
+OCR result, and only matching OCR text (``text``) for its judgment.
+
+Near-duplicates are fingerprints within a small Hamming distance. Each hash
+is split into four 16-bit bands stored in indexed columns; two hashes that
+differ in at most 3 bits must agree on at least one band, so a lookup only
+reads the rows sharing a band instead of the whole table.
+
+The index lives in its own SQLite file (``DEDUP_INDEX_PATH``) together with
+each submission's OCR result and judgment, so a duplicate can reuse them
+instead of recomputing.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from PIL import Image
+
+from . import ingest
+
+HASH_BITS = 64
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+SHINGLE_SIZE = 3
+# Fewer words than this give an unstable SimHash
+MIN_TEXT_TOKENS = 8
+# How much a match of each kind says about two documents being the same, strongest first
+KIND_STRENGTH = {'content': 0, 'text': 1, 'image': 2}
+
+_local = threading.local()
+
+
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(str(settings.DEDUP_INDEX_PATH), timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS fingerprints ('
+            'doc_key TEXT NOT NULL, kind TEXT NOT NULL, hash INTEGER NOT NULL, '
+            + ', '.join(f'band{i} INTEGER NOT NULL' for i in range(BANDS)) +
+            ', PRIMARY KEY (doc_key, kind, hash))'
+        )
+        for i in range(BANDS):
+            conn.execute(f'CREATE INDEX IF NOT EXISTS fingerprints_band{i} ON fingerprints (kind, band{i})')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            'doc_key TEXT PRIMARY KEY, title TEXT, file_count INTEGER, '
+            'ocr_result TEXT, judgment TEXT, created REAL)'
+        )
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def enabled():
+    return getattr(settings, 'DEDUP_ENABLED', True)
+
+
+def max_distance(kind):
+    if kind == 'content':
+        return 0
+    if kind == 'image':
+        return getattr(settings, 'DEDUP_IMAGE_MAX_DISTANCE', 3)
+    return getattr(settings, 'DEDUP_TEXT_MAX_DISTANCE', 3)
+
+
+# -- fingerprints -------------------------------------------------------------
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _bands(value):
+    return [(value >> (i * BAND_BITS)) & BAND_MASK for i in range(BANDS)]
+
+
+def _to_sql(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << HASH_BITS) if value >= 1 << (HASH_BITS - 1) else value
+
+
+def _from_sql(value):
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+def image_dhash(image):
+    """64-bit difference hash: is each pixel brighter than its right neighbour on a 9x8 thumbnail."""
+    small = image.convert('L').resize((9, 8), Image.Resampling.BOX)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def upload_dhash(image_file):
+    """dHash of an uploaded image, or None for PDFs and undecodable files."""
+    if ingest.paged_kind(image_file) == 'pdf':
+        return None
+    try:
+        with ingest.upload_buffer(image_file) as buffer:
+            # A few dozen pixels are plenty, so let JPEGs decode at 1/8 scale
+            image = ingest.decode_image(buffer, draft=('L', (64, 64)))
+        return image_dhash(image)
+    except Exception:
+        return None
+
+
+def upload_digest(image_file):
+    """First 64 bits of the upload's SHA-256, or None when it cannot be read."""
+    try:
+        with ingest.upload_buffer(image_file) as buffer:
+            return int.from_bytes(hashlib.sha256(buffer).digest()[:8], 'big')
+    except Exception:
+        return None
+
+
+def match_rank(match):
+    return KIND_STRENGTH.get(match['kind'], len(KIND_STRENGTH)), match['distance']
+
+
+def text_simhash(text):
+    """64-bit SimHash of word 3-shingles, or None when the text is too short."""
+    tokens = re.findall(r'\w+', (text or '').lower())
+    if len(tokens) < MIN_TEXT_TOKENS:
+        return None
+    weights = [0] * HASH_BITS
+    for i in range(len(tokens) - SHINGLE_SIZE + 1):
+        shingle = ' '.join(tokens[i:i + SHINGLE_SIZE])
+        feature = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(HASH_BITS):
+            weights[bit] += 1 if feature >> bit & 1 else -1
+    value = 0
+    for bit in range(HASH_BITS):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+# -- index --------------------------------------------------------------------
+
+def register(doc_key, title='', file_count=0, image_hashes=(), text_hash=None, ocr_result=None, replace=False,
+             content_hashes=()):
+    """
+    Add or extend a document's fingerprints; ``ocr_result`` is stored for reuse.
+
+    ``replace`` first drops anything stored under ``doc_key``, for keys
+    that are handed out again (submission ids restart with the process).
+    """
+    if not enabled():
+        return
+    conn = _connection()
+    fingerprints = [('image', value) for value in image_hashes if value is not None]
+    fingerprints.extend(('content', value) for value in content_hashes if value is not None)
+    if text_hash is not None:
+        fingerprints.append(('text', text_hash))
+    with conn:
+        if replace:
+            conn.execute('DELETE FROM fingerprints WHERE doc_key = ?', (doc_key,))
+            conn.execute('DELETE FROM documents WHERE doc_key = ?', (doc_key,))
+        conn.execute(
+            'INSERT INTO documents (doc_key, title, file_count, created) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(doc_key) DO UPDATE SET title = excluded.title, file_count = excluded.file_count',
+            (doc_key, title or '', file_count, time.time())
+        )
+        if ocr_result is not None:
+            conn.execute('UPDATE documents SET ocr_result = ? WHERE doc_key = ?',
+                         (json.dumps(ocr_result), doc_key))
+        conn.executemany(
+            f"INSERT OR IGNORE INTO fingerprints (doc_key, kind, hash, {', '.join(f'band{i}' for i in range(BANDS))}) "
+            f"VALUES (?, ?, ?, {', '.join('?' * BANDS)})",
+            [(doc_key, kind, _to_sql(value), *_bands(value)) for kind, value in fingerprints]
+        )
+
+
+def find_similar(kind, value, exclude=None, limit=5):
+    """Documents with a ``kind`` fingerprint within the configured distance of ``value``, closest first."""
+    if not enabled() or value is None:
+        return []
+    threshold = max_distance(kind)
+    bands = _bands(value)
+    # One indexed probe per band; an OR over the bands would not use the indexes
+    candidates = ' UNION '.join(
+        f'SELECT doc_key, hash FROM fingerprints WHERE kind = ? AND band{i} = ?' for i in range(BANDS)
+    )
+    params = []
+    for band in bands:
+        params.extend((kind, band))
+    rows = _connection().execute(
+        'SELECT f.doc_key, f.hash, d.title, d.file_count, d.ocr_result IS NOT NULL, d.judgment IS NOT NULL '
+        f'FROM ({candidates}) f JOIN documents d ON d.doc_key = f.doc_key',
+        params
+    ).fetchall()
+    best = {}
+    for doc_key, stored, title, file_count, has_ocr, has_judgment in rows:
+        if doc_key == exclude:
+            continue
+        distance = hamming(value, _from_sql(stored))
+        if distance > threshold or (doc_key in best and best[doc_key]['distance'] <= distance):
+            continue
+        source, _, doc_id = doc_key.partition(':')
+        best[doc_key] = {
+            'doc_key': doc_key,
+            'source': source,
+            'id': int(doc_id),
+            'kind': kind,
+            'distance': distance,
+            'similarity': round(1 - distance / HASH_BITS, 3),
+            'title': title,
+            'file_count': file_count,
+            'has_ocr_result': bool(has_ocr),
+            'has_judgment': bool(has_judgment),
+        }
+    return sorted(best.values(), key=lambda match: match['distance'])[:limit]
+
+
+def document(doc_key):
+    """Stored title, OCR result and judgment of an indexed document, or None."""
+    if not enabled():
+        return None
+    row = _connection().execute(
+        'SELECT title, file_count, ocr_result, judgment FROM documents WHERE doc_key = ?', (doc_key,)
+    ).fetchone()
+    if row is None:
+        return None
+    title, file_count, ocr_result, judgment = row
+    return {
+        'title': title,
+        'file_count': file_count,
+        'ocr_result': json.loads(ocr_result) if ocr_result else None,
+        'judgment': judgment,
+    }
+
+
+def set_judgment(doc_key, judgment):
+    if not enabled():
+        return
+    conn = _connection()
+    with conn:
+        conn.execute('UPDATE documents SET judgment = ? WHERE doc_key = ?', (judgment, doc_key))
+
+
+def remove_source(source):
+    """Drop every document of one source, e.g. ``submission`` on clear."""
+    if not enabled():
+        return
+    conn = _connection()
+    prefix = f'{source}:'
+    with conn:
+        for table in ('fingerprints', 'documents'):
+            conn.execute(
+                f'DELETE FROM {table} WHERE doc_key >= ? AND doc_key < ?',
+                (prefix, prefix[:-1] + ';')
+            )
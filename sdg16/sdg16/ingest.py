@@ -0,0 +1,151 @@
+"""
+📥 Upload ingestion for image evidence.
+
+Decodes uploads straight from Django's upload buffers instead of copying
+them into yet another temporary file. Small uploads are already held in
+memory; large ones Django has spooled to disk, and those are memory-mapped
+read-only so nothing is written twice.
+
+Multi-page evidence (multi-frame TIFFs, and PDFs rasterised by poppler's
+``pdftoppm``) is streamed one page at a time through ``iter_pages`` so only
+the current page is ever decoded in memory.
+"""
+import io
+import mmap
+import os
+import re
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from PIL import Image
+
+PAGED_CONTENT_TYPES = {
+    'image/tiff': 'tiff',
+    'image/tif': 'tiff',
+    'application/pdf': 'pdf',
+}
+
+PAGED_EXTENSIONS = {
+    '.tif': 'tiff',
+    '.tiff': 'tiff',
+    '.pdf': 'pdf',
+}
+
+
+@contextmanager
+def upload_buffer(image_file):
+    """Yield a read-only bytes-like view over an uploaded file."""
+    temporary_file_path = getattr(image_file, 'temporary_file_path', None)
+    if temporary_file_path is not None and image_file.size:
+        # TemporaryUploadedFile: map Django's own spool file
+        with open(temporary_file_path(), 'rb') as fh:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+        return
+
+    image_file.seek(0)
+    fileobj = getattr(image_file, 'file', None)
+    if hasattr(fileobj, 'getbuffer'):
+        # InMemoryUploadedFile: borrow the BytesIO buffer without copying
+        view = fileobj.getbuffer()
+        try:
+            yield view
+        finally:
+            view.release()
+    else:
+        yield image_file.read()
+
+
+def decode_image(buffer, draft=None):
+    """
+    Decode an image from bytes, a memoryview or an mmap.
+
+    ``draft`` is an optional ``(mode, size)`` hint; JPEGs are then decoded
+    at a reduced scale, which is all a thumbnail or perceptual hash needs.
+    """
+    if isinstance(buffer, mmap.mmap):
+        buffer.seek(0)
+        stream = buffer
+    else:
+        stream = io.BytesIO(buffer)
+    image = Image.open(stream)
+    if draft:
+        image.draft(*draft)
+    # Force the decode now; the buffer may be released right after
+    image.load()
+    return image
+
+
+def spooled_path(image_file):
+    """Path of Django's spool file for large uploads, or None."""
+    temporary_file_path = getattr(image_file, 'temporary_file_path', None)
+    return temporary_file_path() if temporary_file_path is not None else None
+
+
+def paged_kind(image_file):
+    """'tiff' or 'pdf' for multi-page capable uploads, otherwise None."""
+    kind = PAGED_CONTENT_TYPES.get(getattr(image_file, 'content_type', None))
+    if kind:
+        return kind
+    return PAGED_EXTENSIONS.get(os.path.splitext(image_file.name or '')[1].lower())
+
+
+def max_pages():
+    return getattr(settings, 'OCR_MAX_PAGES', 50)
+
+
+def iter_tiff_pages(buffer):
+    stream = buffer if isinstance(buffer, mmap.mmap) else io.BytesIO(buffer)
+    stream.seek(0)
+    with Image.open(stream) as document:
+        for index in range(min(getattr(document, 'n_frames', 1), max_pages())):
+            document.seek(index)
+            # copy() decodes just this frame into a standalone image
+            yield document.copy()
+
+
+def _pdf_page_count(path):
+    pdfinfo = getattr(settings, 'OCR_PDFINFO_PATH', 'pdfinfo')
+    output = subprocess.run(
+        [pdfinfo, path], capture_output=True, check=True, timeout=30
+    ).stdout.decode(errors='replace')
+    match = re.search(r'^Pages:\s+(\d+)', output, re.MULTILINE)
+    if not match:
+        raise ValueError('Could not read the PDF page count')
+    return int(match.group(1))
+
+
+def _iter_pdf_file_pages(path):
+    pdftoppm = getattr(settings, 'OCR_PDFTOPPM_PATH', 'pdftoppm')
+    dpi = str(getattr(settings, 'OCR_PDF_DPI', 300))
+    for number in range(1, min(_pdf_page_count(path), max_pages()) + 1):
+        # Without an output root pdftoppm writes the single page to stdout
+        rendered = subprocess.run(
+            [pdftoppm, '-f', str(number), '-l', str(number), '-r', dpi, '-gray', '-png', path],
+            capture_output=True, check=True, timeout=120
+        ).stdout
+        page = Image.open(io.BytesIO(rendered))
+        page.load()
+        del rendered
+        yield page
+
+
+def iter_pdf_pages(buffer, source_path=None):
+    if source_path:
+        yield from _iter_pdf_file_pages(source_path)
+        return
+    # pdftoppm needs a real file; this one is removed even if OCR fails
+    with tempfile.TemporaryDirectory(prefix='sdg16-pdf-') as workdir:
+        path = os.path.join(workdir, 'evidence.pdf')
+        with open(path, 'wb') as fh:
+            fh.write(buffer)
+        yield from _iter_pdf_file_pages(path)
+
+
+def iter_pages(buffer, kind, source_path=None):
+    """Generate one decoded page at a time from a multi-page upload."""
+    if kind == 'pdf':
+        return iter_pdf_pages(buffer, source_path)
+    return iter_tiff_pages(buffer)
@@ -0,0 +1,255 @@
+"""
+⏳ Database-backed OCR job queue.
+
+Submissions store their uploads with ``default_storage`` and insert an
+``OCRJob`` row; the HTTP worker returns straight away with the job id.
+Background workers claim pending rows with a conditional UPDATE (so two
+workers never take the same job), OCR the files one by one while
+publishing per-file results, and finish the job as completed, partial or
+failed. No broker other than the project database is needed.
+
+Every claim gets a fresh ``claim_token``. While a job runs, a heartbeat
+thread refreshes ``heartbeat_at`` every ``OCR_JOB_HEARTBEAT_SECONDS`` (a
+single 50-page PDF can take longer than the stale limit), as does each
+progress write. Jobs without a heartbeat for ``OCR_JOB_STALE_SECONDS``
+are requeued (checked at most every ``OCR_JOB_REQUEUE_INTERVAL`` seconds);
+a worker whose claim was taken over that way stops at its next write and
+leaves the stored uploads to the new claim.
+
+Workers run either as daemon threads inside the web process
+(``OCR_JOB_INPROCESS_WORKERS``) or as separate processes via
+``python manage.py ocr_worker``.
+"""
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OCRJob
+
+logger = logging.getLogger(__name__)
+
+_workers = []
+_workers_lock = threading.Lock()
+_last_requeue = None
+_requeue_lock = threading.Lock()
+
+
+def async_enabled():
+    return getattr(settings, 'OCR_ASYNC_JOBS', False)
+
+
+def enqueue_ocr_job(image_files, kind, evidence_id=None):
+    """Persist the uploads and queue them for background OCR."""
+    batch = uuid.uuid4().hex
+    files = []
+    for image_file in image_files:
+        name = os.path.basename(image_file.name or 'upload')
+        path = default_storage.save(f'ocr_jobs/{batch}/{name}', image_file)
+        files.append({
+            'name': image_file.name,
+            'size': image_file.size,
+            'content_type': getattr(image_file, 'content_type', None),
+            'path': path,
+        })
+    job = OCRJob.objects.create(
+        kind=kind,
+        evidence_id=evidence_id,
+        files_data=json.dumps(files),
+        total_files=len(files),
+    )
+    ensure_inprocess_workers()
+    return job
+
+
+def _requeue_stale_jobs():
+    # Periodic, not per poll: jobs whose worker stopped reporting progress go back in the queue
+    global _last_requeue
+    interval = getattr(settings, 'OCR_JOB_REQUEUE_INTERVAL', 60)
+    with _requeue_lock:
+        now = time.monotonic()
+        if _last_requeue is not None and now - _last_requeue < interval:
+            return 0
+        _last_requeue = now
+    stale_after = getattr(settings, 'OCR_JOB_STALE_SECONDS', 600)
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return OCRJob.objects.filter(status='processing').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    ).update(status='pending', worker='', claim_token='')
+
+
+def claim_next_job(worker_name):
+    """Atomically move the oldest pending job to processing, or return None."""
+    _requeue_stale_jobs()
+    while True:
+        job_id = OCRJob.objects.filter(status='pending').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = OCRJob.objects.filter(pk=job_id, status='pending').update(
+            status='processing', worker=worker_name, claim_token=uuid.uuid4().hex,
+            started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return OCRJob.objects.get(pk=job_id)
+        # Another worker won the race for this row; try the next one
+
+
+def _save_claimed(job, **fields):
+    """Write ``fields`` only while this run's claim still holds; False once the job was requeued."""
+    if not OCRJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(**fields):
+        return False
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return True
+
+
+@contextmanager
+def _heartbeat(job):
+    """Keep the claim's ``heartbeat_at`` fresh from a side thread while the body runs."""
+    stop = threading.Event()
+
+    def beat():
+        interval = getattr(settings, 'OCR_JOB_HEARTBEAT_SECONDS', 30)
+        try:
+            while not stop.wait(interval):
+                if not OCRJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+                        heartbeat_at=timezone.now()):
+                    return  # requeued; the next progress write stops the run
+        except Exception:
+            logger.exception('Heartbeat for OCR job %s failed', job.pk)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'ocr-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _open_stored_file(file_info):
+    stored = default_storage.open(file_info['path'], 'rb')
+    stored.name = file_info['name']
+    stored.content_type = file_info['content_type']
+    return stored
+
+
+def run_job(job):
+    # Lazy import: views imports this module to enqueue jobs
+    from . import views
+
+    results = []
+    effects = []
+    try:
+        with _heartbeat(job):
+            for file_info in job.files:
+                effect = random.choice(views.PROCESSING_EFFECTS)
+                try:
+                    with _open_stored_file(file_info) as stored:
+                        file_result = views.ocr_upload_file(stored, effect)
+                except Exception as e:
+                    file_result = views.failed_file_result(file_info['name'], e)
+                file_result['file_size'] = file_info['size']
+                results.append(file_result)
+                effects.append(effect)
+                if not _save_claimed(job, processed_files=len(results), results_data=json.dumps(results),
+                                     heartbeat_at=timezone.now()):
+                    logger.warning('OCR job %s was requeued while %s ran it; leaving it to the new claim',
+                                   job.pk, job.worker)
+                    return job
+
+        if job.kind != 'multi' and len(results) == 1:
+            result = results[0]
+        else:
+            result = views.summarize_multi_file_results(results, effects)
+
+        succeeded = sum(1 for r in results if r['success'])
+        if succeeded == len(results):
+            status = 'completed'
+        elif succeeded:
+            status = 'partial'
+        else:
+            status = 'failed'
+        outcome = {'status': status, 'result_data': json.dumps(result)}
+    except Exception as e:
+        logger.exception('OCR job %s failed', job.pk)
+        outcome = {'status': 'failed', 'error': str(e)}
+    # The stored uploads belong to whoever holds the claim when the job finishes
+    if _save_claimed(job, finished_at=timezone.now(), **outcome):
+        for file_info in job.files:
+            try:
+                default_storage.delete(file_info['path'])
+            except Exception:
+                pass
+    else:
+        logger.warning('OCR job %s was requeued while %s ran it; leaving it to the new claim', job.pk, job.worker)
+    return job
+
+
+def worker_loop(stop_event=None, poll_interval=None, worker_name=None):
+    """Claim and run jobs until ``stop_event`` is set."""
+    if poll_interval is None:
+        poll_interval = getattr(settings, 'OCR_JOB_POLL_INTERVAL', 1.0)
+    if worker_name is None:
+        worker_name = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            job = claim_next_job(worker_name)
+        except Exception:
+            logger.exception('Could not claim OCR job')
+            job = None
+        if job is None:
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job)
+
+
+def ensure_inprocess_workers():
+    count = getattr(settings, 'OCR_JOB_INPROCESS_WORKERS', 0)
+    with _workers_lock:
+        _workers[:] = [w for w in _workers if w.is_alive()]
+        while len(_workers) < count:
+            worker = threading.Thread(
+                target=worker_loop, name=f'ocr-job-worker-{len(_workers) + 1}', daemon=True
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def job_status(job):
+    """JSON-ready progress snapshot, including partial per-file results."""
+    return {
+        'success': job.status != 'failed',
+        'job_id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': {
+            'processed_files': job.processed_files,
+            'total_files': job.total_files,
+            'percent': round(100 * job.processed_files / job.total_files, 1) if job.total_files else 100.0,
+        },
+        'results': job.results,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,195 @@
+"""
+🚦 Urgency-prioritized admission to the judge model.
+
+Judgments used to hit ollama in arrival order with no limit, so a batch of
+routine submissions could delay a case the keyword analysis had already
+marked CRITICAL. Every generation now asks the scheduler for one of
+``JUDGE_MAX_CONCURRENCY`` slots; waiting requests are served by urgency
+(critical, then high, then standard), oldest first within a level. Prompt
+summaries ask one level below the judgment they belong to
+(``lower_priority``), so they never hold up interactive judgments of the
+same urgency; ``background`` is the level below standard.
+
+Aging keeps standard items from starving: a waiter's effective rank drops by
+one level every ``JUDGE_PRIORITY_AGING_SECONDS`` it has waited. Because every
+waiter ages at the same rate, that order never changes while they wait, and
+the heap key is simply ``enqueued_at + rank * aging_seconds``.
+
+Threads (WSGI requests, single-flight producers) and coroutines (ASGI
+views) share the same queue and slots.
+"""
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+PRIORITIES = ('critical', 'high', 'standard', 'background')
+RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+# Recent waits kept per priority for the percentiles
+WAIT_SAMPLES = 500
+
+
+def priority_rank(priority):
+    return RANKS.get(priority, RANKS['standard'])
+
+
+def lower_priority(priority):
+    """The level below ``priority``, for work done on behalf of a judgment at that level."""
+    return PRIORITIES[min(priority_rank(priority) + 1, len(PRIORITIES) - 1)]
+
+
+class _Waiter:
+    def __init__(self, priority):
+        self.priority = priority if priority in RANKS else 'standard'
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.abandoned = False
+        # threading.Event for threads, (loop, future) for coroutines
+        self.event = None
+        self.future = None
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        else:
+            loop, future = self.future
+            loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(True)
+
+
+class JudgmentScheduler:
+    def __init__(self, max_concurrency, aging_seconds):
+        self.max_concurrency = max(1, max_concurrency)
+        self.aging_seconds = aging_seconds
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.stats = {
+            'granted': {priority: 0 for priority in PRIORITIES},
+            'abandoned': 0,
+            'max_queue_depth': 0,
+            'max_active': 0,
+        }
+        self._waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+
+    def _key(self, waiter):
+        return waiter.enqueued_at + priority_rank(waiter.priority) * self.aging_seconds
+
+    def _grant(self, waiter):
+        waiter.granted = True
+        self.active += 1
+        self.stats['max_active'] = max(self.stats['max_active'], self.active)
+        self.stats['granted'][waiter.priority] += 1
+        self._waits[waiter.priority].append(time.monotonic() - waiter.enqueued_at)
+
+    def _enqueue(self, waiter):
+        """Grant a free slot right away, or queue; returns True when granted."""
+        with self._lock:
+            if self.active < self.max_concurrency and not self.queued:
+                self._grant(waiter)
+                return True
+            heapq.heappush(self._heap, (self._key(waiter), next(self._counter), waiter))
+            self.queued += 1
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.queued)
+            return False
+
+    def _abandon(self, waiter):
+        """A waiter gave up; hand back its slot if it was granted meanwhile."""
+        with self._lock:
+            if not waiter.granted:
+                # Left in the heap and skipped when it surfaces
+                waiter.abandoned = True
+                self.queued -= 1
+                self.stats['abandoned'] += 1
+                return
+        self.release()
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            while self._heap and self.active < self.max_concurrency:
+                _, _, waiter = heapq.heappop(self._heap)
+                if waiter.abandoned:
+                    continue
+                self.queued -= 1
+                self._grant(waiter)
+                waiter.wake()
+
+    def acquire(self, priority='standard', timeout=None):
+        """Block the calling thread until a model slot is free; ``TimeoutError`` after ``timeout`` seconds."""
+        waiter = _Waiter(priority)
+        waiter.event = threading.Event()
+        if self._enqueue(waiter):
+            return
+        try:
+            if not waiter.event.wait(timeout):
+                raise TimeoutError(f'no judge slot free within {timeout}s')
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    async def aacquire(self, priority='standard'):
+        """Wait on the event loop until a model slot is free; cancellation leaves the queue."""
+        waiter = _Waiter(priority)
+        loop = asyncio.get_running_loop()
+        waiter.future = (loop, loop.create_future())
+        if self._enqueue(waiter):
+            return
+        try:
+            await waiter.future[1]
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def snapshot(self):
+        with self._lock:
+            waiting = {priority: 0 for priority in PRIORITIES}
+            for _, _, waiter in self._heap:
+                if not waiter.abandoned:
+                    waiting[waiter.priority] += 1
+            waits = {priority: sorted(samples) for priority, samples in self._waits.items()}
+            stats = {
+                'max_concurrency': self.max_concurrency,
+                'aging_seconds': self.aging_seconds,
+                'active': self.active,
+                'queue_depth': self.queued,
+                'waiting': waiting,
+                'granted': dict(self.stats['granted']),
+                'abandoned': self.stats['abandoned'],
+                'max_queue_depth': self.stats['max_queue_depth'],
+                'max_active': self.stats['max_active'],
+            }
+        stats['wait_seconds'] = {
+            priority: {
+                'mean': round(sum(samples) / len(samples), 3),
+                'p95': round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+                'max': round(samples[-1], 3),
+            } if samples else None
+            for priority, samples in waits.items()
+        }
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JudgmentScheduler(
+                getattr(settings, 'JUDGE_MAX_CONCURRENCY', 2),
+                getattr(settings, 'JUDGE_PRIORITY_AGING_SECONDS', 30),
+            )
+        return _scheduler
@@ -0,0 +1,205 @@
+"""
+⚖️ Cache for AI judge output.
+
+A judgment is keyed on a SHA-256 of the model name, the system prompt and
+the normalized title, description and submitter, so re-opening or
+refreshing already judged evidence costs a lookup instead of a full LLM
+generation, while a prompt or model change naturally misses.
+
+Like the OCR cache there is an in-memory LRU tier and a SQLite tier that
+survives restarts. Entries expire after ``JUDGMENT_CACHE_TTL`` seconds and
+the least recently used are evicted once a tier is over budget. Each entry
+also records which evidence it was produced for (``evidence:12``,
+``submission:3``) so editing that evidence can drop it explicitly.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def normalize(value):
+    # Unicode compatibility forms and whitespace runs never change a judgment
+    return ' '.join(unicodedata.normalize('NFKC', value or '').split())
+
+
+def cache_key(model, system_prompt, title, description, submitted_by):
+    payload = json.dumps([model, system_prompt, normalize(title), normalize(description), normalize(submitted_by)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class JudgmentCache:
+    def __init__(self, path, ttl, memory_max_entries, disk_max_bytes):
+        self.path = str(path) if path else None
+        self.ttl = ttl
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        # key -> (judgment, ref, created)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'expired': 0,
+            'evictions': 0,
+            'invalidations': 0,
+        }
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    # -- disk tier -------------------------------------------------------
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS judgment_cache ('
+                'key TEXT PRIMARY KEY, judgment TEXT NOT NULL, ref TEXT, '
+                'size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS judgment_cache_accessed ON judgment_cache (accessed)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS judgment_cache_ref ON judgment_cache (ref)')
+            self._conn.commit()
+        return self._conn
+
+    def _disk_get(self, key):
+        if not self.path:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT judgment, ref, created FROM judgment_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._expired(row[2]):
+                conn.execute('DELETE FROM judgment_cache WHERE key = ?', (key,))
+                conn.commit()
+                self.stats['expired'] += 1
+                return None
+            conn.execute('UPDATE judgment_cache SET accessed = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+            return row
+        except sqlite3.Error:
+            return None
+
+    def _disk_put(self, key, judgment, ref, created):
+        if not self.path:
+            return
+        try:
+            conn = self._connection()
+            size = len(judgment.encode())
+            conn.execute(
+                'INSERT OR REPLACE INTO judgment_cache (key, judgment, ref, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, judgment, ref, size, created, created)
+            )
+            if self.ttl is not None:
+                conn.execute('DELETE FROM judgment_cache WHERE created < ?', (time.time() - self.ttl,))
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM judgment_cache').fetchone()[0]
+            while total > self.disk_max_bytes:
+                row = conn.execute(
+                    'SELECT key, size FROM judgment_cache ORDER BY accessed LIMIT 1'
+                ).fetchone()
+                if row is None:
+                    break
+                conn.execute('DELETE FROM judgment_cache WHERE key = ?', (row[0],))
+                total -= row[1]
+                self.stats['evictions'] += 1
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    # -- memory tier -----------------------------------------------------
+
+    def _memory_put(self, key, entry):
+        self._memory.pop(key, None)
+        self._memory[key] = entry
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # -- public API ------------------------------------------------------
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry[2]):
+                # Counted as expired by the disk tier, which holds the same entry
+                del self._memory[key]
+                if not self.path:
+                    self.stats['expired'] += 1
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[0]
+            entry = self._disk_get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._memory_put(key, tuple(entry))
+            return entry[0]
+
+    def put(self, key, judgment, ref=None):
+        created = time.time()
+        with self._lock:
+            self._memory_put(key, (judgment, ref, created))
+            self._disk_put(key, judgment, ref, created)
+            self.stats['stores'] += 1
+
+    def invalidate(self, key=None, ref=None):
+        """Drop one key, or every entry produced for ``ref``."""
+        with self._lock:
+            doomed = [k for k, entry in self._memory.items() if k == key or (ref and entry[1] == ref)]
+            for k in doomed:
+                del self._memory[k]
+            if self.path:
+                try:
+                    conn = self._connection()
+                    conn.execute('DELETE FROM judgment_cache WHERE key = ? OR ref = ?', (key, ref))
+                    conn.commit()
+                except sqlite3.Error:
+                    pass
+            self.stats['invalidations'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = JudgmentCache(
+                getattr(settings, 'JUDGMENT_CACHE_PATH', None),
+                getattr(settings, 'JUDGMENT_CACHE_TTL', 7 * 24 * 3600),
+                getattr(settings, 'JUDGMENT_CACHE_MEMORY_MAX_ENTRIES', 256),
+                getattr(settings, 'JUDGMENT_CACHE_DISK_MAX_BYTES', 64 * 1024 * 1024),
+            )
+        return _cache
+
+
+def cache_enabled():
+    return getattr(settings, 'JUDGMENT_CACHE_ENABLED', True)
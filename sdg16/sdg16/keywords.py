@@ -0,0 +1,226 @@
+"""
+🔍 Evidence keyword taxonomy and compiled single-pass matcher.
+
+Every analyzer (single-file, multi-file and the Evidence model) used to keep
+its own keyword lists and run ``kw in text`` once per keyword, which scanned
+the text once per keyword and matched inside other words ("law" in
+"flawed", "may" in "mayor"). The taxonomy is compiled once into one
+alternation regex with word boundaries, so a single linear pass over the
+text yields every hit with its position, term and categories.
+
+The taxonomy lives in a versioned JSON file (``KEYWORD_TAXONOMY_PATH``,
+``keyword_taxonomy.json`` next to this module by default). Each category has
+a weight, literal terms or phrases (optionally with their own weight) and
+regex patterns for things like years and numeric dates. ``get_matcher()``
+notices when the file's mtime changes and swaps in a freshly compiled
+matcher, so running workers pick up edits without a restart; a file that
+fails to load leaves the previous matcher in place.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = Path(__file__).resolve().parent / 'keyword_taxonomy.json'
+
+
+def _normalize(term):
+    return ' '.join(term.lower().split())
+
+
+class KeywordScan:
+    """Result of one pass over a text: every hit, groupable by category."""
+
+    def __init__(self, matcher, hits, pattern_terms=None):
+        self.matcher = matcher
+        # (term, start, end) in text order
+        self.hits = hits
+        self.term_counts = Counter(term for term, _, _ in hits)
+        # {category: [distinct texts matched by that category's patterns]}
+        self.pattern_terms = pattern_terms or {}
+
+    @property
+    def version(self):
+        return self.matcher.version
+
+    def matches(self, category):
+        """Distinct terms of ``category`` found, taxonomy terms first, then pattern hits."""
+        found = [term for term in self.matcher.taxonomy[category] if term in self.term_counts]
+        found.extend(term for term in self.pattern_terms.get(category, []) if term not in found)
+        return found
+
+    def counts(self, category):
+        return {term: self.term_counts[term] for term in self.matches(category)}
+
+    def positions(self, category):
+        terms = set(self.matches(category))
+        return [(term, start, end) for term, start, end in self.hits if term in terms]
+
+    def categories(self):
+        """{category: {term: count}} for every category with at least one hit."""
+        found = OrderedDict()
+        for category in self.matcher.taxonomy:
+            counts = self.counts(category)
+            if counts:
+                found[category] = counts
+        return found
+
+    def scores(self):
+        return self.matcher.scores(self.categories())
+
+
+class KeywordMatcher:
+    """
+    Compiled form of a taxonomy.
+
+    ``categories`` maps each category either to a plain list of terms or to
+    ``{'weight': w, 'terms': [...], 'patterns': [...]}`` where a term may
+    also be ``{'term': ..., 'weight': ...}``.
+    """
+
+    def __init__(self, categories, version='', digest=''):
+        self.version = version
+        self.digest = digest
+        self.taxonomy = OrderedDict()
+        self.category_weights = {}
+        self.term_weights = {}
+        self.patterns = OrderedDict()
+        for category, spec in categories.items():
+            if not isinstance(spec, dict):
+                spec = {'terms': spec}
+            weight = float(spec.get('weight', 1.0))
+            self.category_weights[category] = weight
+            terms = []
+            for entry in spec.get('terms', []):
+                if isinstance(entry, dict):
+                    term = _normalize(entry['term'])
+                    self.term_weights[(category, term)] = float(entry.get('weight', weight))
+                else:
+                    term = _normalize(entry)
+                terms.append(term)
+            self.taxonomy[category] = terms
+            self.patterns[category] = list(spec.get('patterns', []))
+
+        self.term_categories = {}
+        for category, terms in self.taxonomy.items():
+            for term in terms:
+                self.term_categories.setdefault(term, []).append(category)
+
+        alternatives = []
+        if self.term_categories:
+            # Longest first so "money laundering" wins over any shorter prefix
+            literals = sorted(self.term_categories, key=len, reverse=True)
+            body = '|'.join(r'\s+'.join(re.escape(word) for word in term.split()) for term in literals)
+            # Whole words only, allowing a simple plural ("bribes", "frauds")
+            alternatives.append(rf'\b(?P<term>{body})(?:e?s)?\b')
+        # Regex patterns become named alternatives, so the same single pass
+        # also reports which category's pattern matched
+        self.pattern_categories = {}
+        for category, patterns in self.patterns.items():
+            for pattern in patterns:
+                if re.compile(pattern).groupindex:
+                    raise ValueError(f'Named groups are not allowed in keyword pattern {pattern!r}')
+                name = f'p{len(self.pattern_categories)}'
+                self.pattern_categories[name] = category
+                alternatives.append(f'(?P<{name}>{pattern})')
+        self.pattern = re.compile('|'.join(alternatives) or r'(?!)', re.IGNORECASE)
+
+    def weight(self, category, term):
+        return self.term_weights.get((category, term), self.category_weights.get(category, 1.0))
+
+    def scores(self, keyword_hits):
+        """Weighted score per category for ``{category: {term: count}}``."""
+        return {
+            category: round(sum(count * self.weight(category, term) for term, count in counts.items()), 2)
+            for category, counts in keyword_hits.items()
+        }
+
+    def scan(self, text):
+        hits = []
+        pattern_terms = {}
+        for match in self.pattern.finditer(text or ''):
+            group = match.lastgroup
+            term = _normalize(match.group(group))
+            if group != 'term':
+                found = pattern_terms.setdefault(self.pattern_categories[group], [])
+                if term not in found:
+                    found.append(term)
+            hits.append((term, match.start(), match.end()))
+        return KeywordScan(self, hits, pattern_terms)
+
+
+def taxonomy_path():
+    return Path(getattr(settings, 'KEYWORD_TAXONOMY_PATH', DEFAULT_TAXONOMY_PATH))
+
+
+def load_matcher(path):
+    """Read and compile a taxonomy file; raises on any invalid content."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw.decode('utf-8'))
+    return KeywordMatcher(
+        data['categories'],
+        version=str(data.get('version', '')),
+        digest=hashlib.sha256(raw).hexdigest()[:16],
+    )
+
+
+_matcher = None
+_loaded_mtime = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def reload_taxonomy(force=False):
+    """Recompile the matcher when the taxonomy file changed and return the current one."""
+    global _matcher, _loaded_mtime
+    path = taxonomy_path()
+    with _lock:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            if _matcher is None:
+                raise
+            logger.warning('Keyword taxonomy %s is missing; keeping version %s', path, _matcher.version)
+            return _matcher
+        if force or _matcher is None or mtime != _loaded_mtime:
+            try:
+                matcher = load_matcher(path)
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                if _matcher is None:
+                    raise
+                logger.error('Could not reload keyword taxonomy %s (%s); keeping version %s',
+                             path, e, _matcher.version)
+            else:
+                # One reference swap: scans already running keep the matcher they started with
+                _matcher = matcher
+                logger.info('Loaded keyword taxonomy version %s from %s', matcher.version, path)
+            _loaded_mtime = mtime
+        return _matcher
+
+
+def get_matcher():
+    global _checked_at
+    interval = getattr(settings, 'KEYWORD_TAXONOMY_RELOAD_INTERVAL', 2.0)
+    now = time.monotonic()
+    if _matcher is None or (interval is not None and now - _checked_at >= interval):
+        _checked_at = now
+        return reload_taxonomy()
+    return _matcher
+
+
+def scan(text):
+    return get_matcher().scan(text)
+
+
+def taxonomy_version():
+    return get_matcher().version
@@ -0,0 +1,453 @@
+"""
+🔌 The one way to call the model: a pooled, deadline-aware client with a circuit breaker.
+
+Judge calls used to block until ollama failed on its own, with no timeout,
+and only then fall back to the static judgment, so an outage hung every
+worker. All model calls now go through this module:
+
+* the HTTP clients have a connect timeout and a read timeout (the longest
+  silence allowed between streamed chunks), and every call has an overall
+  deadline, checked between chunks,
+* a per-process circuit breaker opens after ``LLM_BREAKER_FAILURE_THRESHOLD``
+  consecutive failures; while open, calls raise ``BreakerOpen`` at once so
+  callers serve their fallback in milliseconds. After
+  ``LLM_BREAKER_RESET_SECONDS`` one trial call is let through (half-open),
+* a background thread probes ollama every ``LLM_HEALTH_PROBE_INTERVAL``
+  seconds, closing the breaker as soon as the server answers again and
+  counting failed probes like failed calls.
+
+The backend is chosen by ``LLM_BACKEND``: ``'ollama'`` talks to the server
+at ``LLM_HOST`` (``OLLAMA_HOST`` when unset) through one long-lived,
+connection-pooled client per process (per event loop for async calls);
+``'stub'`` answers in process (see ``llm_stub``). Every call uses
+``LLM_MODEL`` unless given another model, asks ollama to keep it loaded for
+``LLM_KEEP_ALIVE``, and sends ``LLM_OPTIONS`` (``num_ctx``,
+``num_predict``, ...) merged with the caller's options. ``chat_batch`` runs
+several conversations concurrently, each call holding a judge scheduler
+slot.
+
+``snapshot()`` reports the backend, breaker state and call counters for the
+stats endpoint.
+"""
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import judge_scheduler, llm_stub
+
+try:
+    import ollama
+    OLLAMA_AVAILABLE = True
+except ImportError:
+    OLLAMA_AVAILABLE = False
+
+# Idle connections each pooled client keeps open to the server
+KEEPALIVE_CONNECTIONS = 20
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class LLMUnavailable(Exception):
+    """No model to call; serve the fallback."""
+
+
+class BreakerOpen(LLMUnavailable):
+    """The model is considered down; serve the fallback."""
+
+
+class DeadlineExceeded(Exception):
+    """A call ran past its deadline."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.last_error = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'successes': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'short_circuited': 0,
+            'opened': 0,
+        }
+
+    def is_open(self):
+        """True while calls would be refused; never consumes the half-open trial."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() - self.opened_at < self.reset_seconds
+            return self.state == HALF_OPEN and self.trial_in_flight
+
+    def before_call(self):
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == OPEN or (self.state == HALF_OPEN and self.trial_in_flight):
+                self.stats['short_circuited'] += 1
+                raise BreakerOpen(f'LLM circuit breaker is open ({self.last_error})')
+            if self.state == HALF_OPEN:
+                self.trial_in_flight = True
+            self.stats['calls'] += 1
+
+    def record_success(self):
+        with self._lock:
+            self.stats['successes'] += 1
+            self._close()
+
+    def record_failure(self, error):
+        with self._lock:
+            self.stats['failures'] += 1
+            if isinstance(error, (DeadlineExceeded, TimeoutError)) or 'timeout' in type(error).__name__.lower():
+                self.stats['timeouts'] += 1
+            self._fail(error)
+
+    def abandon(self):
+        """The caller stopped reading before a verdict; free the half-open trial."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def probe_result(self, error=None):
+        with self._lock:
+            if error is None:
+                if self.state != CLOSED:
+                    self._close()
+            else:
+                self._fail(error)
+
+    def _close(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def _fail(self, error):
+        self.last_error = f'{type(error).__name__}: {error}'
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            if self.state != OPEN:
+                self.stats['opened'] += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.opened_at else None,
+                'last_error': self.last_error,
+            })
+        return stats
+
+
+_breaker = None
+_sync_client = None
+_probe_thread = None
+_probe_client = None
+_probe_status = {'last_probe': None, 'last_probe_ok': None}
+_lock = threading.Lock()
+# httpx async clients belong to one event loop, so keep one client per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_breaker():
+    global _breaker
+    with _lock:
+        if _breaker is None:
+            _breaker = CircuitBreaker(
+                getattr(settings, 'LLM_BREAKER_FAILURE_THRESHOLD', 3),
+                getattr(settings, 'LLM_BREAKER_RESET_SECONDS', 30),
+            )
+        return _breaker
+
+
+def backend():
+    return getattr(settings, 'LLM_BACKEND', 'ollama')
+
+
+def model():
+    return getattr(settings, 'LLM_MODEL', 'llama3.2:1b')
+
+
+def model_id():
+    """Names who writes the answers; part of judgment cache keys, so stub output never passes for the model's."""
+    return model() if backend() == 'ollama' else f'{backend()}:{model()}'
+
+
+def call_options(options=None):
+    return {**getattr(settings, 'LLM_OPTIONS', {}), **(options or {})}
+
+
+def _backend_available():
+    return backend() == 'stub' or OLLAMA_AVAILABLE
+
+
+def _timeout(read=None):
+    import httpx
+    return httpx.Timeout(
+        read if read is not None else getattr(settings, 'LLM_READ_TIMEOUT', 30),
+        connect=getattr(settings, 'LLM_CONNECT_TIMEOUT', 2),
+    )
+
+
+def _make_client(asynchronous=False, read=None):
+    if backend() == 'stub':
+        return llm_stub.AsyncStubClient() if asynchronous else llm_stub.StubClient()
+    import httpx
+    kwargs = {
+        'timeout': _timeout(read),
+        # No connection cap: hundreds of judgments may be streaming at once
+        'limits': httpx.Limits(max_connections=None, max_keepalive_connections=KEEPALIVE_CONNECTIONS),
+    }
+    host = getattr(settings, 'LLM_HOST', None)
+    if host:
+        kwargs['host'] = host
+    return (ollama.AsyncClient if asynchronous else ollama.Client)(**kwargs)
+
+
+def sync_client():
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = _make_client()
+        return _sync_client
+
+
+def async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = _make_client(asynchronous=True)
+    return client
+
+
+def _deadline_seconds(seconds):
+    return seconds or getattr(settings, 'LLM_DEADLINE_SECONDS', 180)
+
+
+def _check_available():
+    if not _backend_available():
+        raise LLMUnavailable('ollama is not installed')
+    ensure_health_probe()
+    get_breaker().before_call()
+
+
+def _chat_kwargs(model_name, messages, options):
+    return {
+        'model': model_name or model(),
+        'messages': messages,
+        'stream': True,
+        'options': call_options(options),
+        'keep_alive': getattr(settings, 'LLM_KEEP_ALIVE', None),
+    }
+
+
+def chat_stream(model_name, messages, options=None, deadline=None):
+    """
+    Yield ollama's streamed response parts; ``model_name`` None means ``LLM_MODEL``.
+
+    Raises ``BreakerOpen`` before any network traffic while the model is
+    considered down and ``DeadlineExceeded`` once ``deadline`` seconds have
+    passed; closing the generator early closes the HTTP stream.
+    """
+    _check_available()
+    breaker = get_breaker()
+    deadline = _deadline_seconds(deadline)
+    deadline_at = time.monotonic() + deadline
+    stream = None
+    verdict = False
+    try:
+        stream = sync_client().chat(**_chat_kwargs(model_name, messages, options))
+        for part in stream:
+            if time.monotonic() > deadline_at:
+                raise DeadlineExceeded(f'no complete answer within {deadline}s')
+            yield part
+        breaker.record_success()
+        verdict = True
+    except GeneratorExit:
+        raise
+    except Exception as e:
+        breaker.record_failure(e)
+        verdict = True
+        raise
+    finally:
+        if not verdict:
+            breaker.abandon()
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+
+
+def chat(model_name, messages, options=None, deadline=None):
+    """Whole response text; streamed underneath so the deadline holds during generation."""
+    return ''.join(
+        part.get('message', {}).get('content', '')
+        for part in chat_stream(model_name, messages, options=options, deadline=deadline)
+    )
+
+
+def _batch_call(messages, model_name, options, deadline, priority):
+    scheduler = judge_scheduler.get_scheduler()
+    scheduler.acquire(priority)
+    try:
+        return {'success': True, 'content': chat(model_name, messages, options=options, deadline=deadline)}
+    except Exception as e:
+        return {'success': False, 'error': f'{type(e).__name__}: {e}'}
+    finally:
+        scheduler.release()
+
+
+def chat_batch(model_name, conversations, options=None, deadline=None, priority='standard'):
+    """
+    Answer several conversations at once.
+
+    Every call takes a judge scheduler slot at ``priority``, so batches share
+    the global model concurrency cap and urgency order with everything else.
+    Returns one ``{'success': True, 'content': ...}`` or ``{'success':
+    False, 'error': ...}`` per conversation, in order; one failure does not
+    affect the others.
+    """
+    conversations = list(conversations)
+    if not conversations:
+        return []
+    # More threads than model slots would only wait in the scheduler queue
+    workers = min(judge_scheduler.get_scheduler().max_concurrency, len(conversations))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+            lambda messages: _batch_call(messages, model_name, options, deadline, priority), conversations
+        ))
+
+
+async def achat(model_name, messages, options=None, deadline=None):
+    return ''.join([
+        part.get('message', {}).get('content', '')
+        async for part in achat_stream(model_name, messages, options=options, deadline=deadline)
+    ])
+
+
+async def achat_batch(model_name, conversations, options=None, deadline=None, priority='standard'):
+    """Async ``chat_batch``; cancelling it leaves the scheduler queue."""
+    scheduler = judge_scheduler.get_scheduler()
+
+    async def one(messages):
+        await scheduler.aacquire(priority)
+        try:
+            return {'success': True, 'content': await achat(model_name, messages, options=options, deadline=deadline)}
+        except Exception as e:
+            return {'success': False, 'error': f'{type(e).__name__}: {e}'}
+        finally:
+            scheduler.release()
+
+    return list(await asyncio.gather(*(one(messages) for messages in conversations)))
+
+
+async def achat_stream(model_name, messages, options=None, deadline=None):
+    """Async ``chat_stream``; the deadline also interrupts a wait for the next chunk."""
+    _check_available()
+    breaker = get_breaker()
+    deadline = _deadline_seconds(deadline)
+    deadline_at = time.monotonic() + deadline
+    stream = None
+    verdict = False
+    try:
+        stream = await asyncio.wait_for(
+            async_client().chat(**_chat_kwargs(model_name, messages, options)),
+            timeout=max(0, deadline_at - time.monotonic()),
+        )
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                part = await asyncio.wait_for(iterator.__anext__(), timeout=max(0, deadline_at - time.monotonic()))
+            except StopAsyncIteration:
+                break
+            yield part
+        breaker.record_success()
+        verdict = True
+    except asyncio.TimeoutError:
+        error = DeadlineExceeded(f'no complete answer within {deadline}s')
+        breaker.record_failure(error)
+        verdict = True
+        raise error
+    except (GeneratorExit, asyncio.CancelledError):
+        raise
+    except Exception as e:
+        breaker.record_failure(e)
+        verdict = True
+        raise
+    finally:
+        if not verdict:
+            breaker.abandon()
+        aclose = getattr(stream, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+
+
+def is_available():
+    """False while the breaker refuses calls; callers can skip straight to their fallback."""
+    return _backend_available() and not get_breaker().is_open()
+
+
+# -- health probe --------------------------------------------------------------
+
+def probe_once():
+    """One cheap request to the backend (list models); reports the result to the breaker."""
+    global _probe_client
+    _probe_status['last_probe'] = time.time()
+    try:
+        if _probe_client is None:
+            _probe_client = _make_client(read=getattr(settings, 'LLM_HEALTH_PROBE_TIMEOUT', 2))
+        _probe_client.list()
+    except Exception as e:
+        _probe_status['last_probe_ok'] = False
+        get_breaker().probe_result(e)
+        return False
+    _probe_status['last_probe_ok'] = True
+    get_breaker().probe_result()
+    return True
+
+
+def _probe_loop(interval):
+    while True:
+        time.sleep(interval)
+        probe_once()
+
+
+def ensure_health_probe():
+    global _probe_thread
+    interval = getattr(settings, 'LLM_HEALTH_PROBE_INTERVAL', 10)
+    if not _backend_available() or not interval or _probe_thread is not None:
+        return
+    with _lock:
+        if _probe_thread is None:
+            _probe_thread = threading.Thread(target=_probe_loop, args=(interval,), name='llm-health-probe', daemon=True)
+            _probe_thread.start()
+
+
+def snapshot():
+    stats = get_breaker().snapshot()
+    stats['available'] = _backend_available()
+    stats.update({
+        'backend': backend(),
+        'model': model(),
+        'host': getattr(settings, 'LLM_HOST', None),
+        'keep_alive': getattr(settings, 'LLM_KEEP_ALIVE', None),
+        'options': call_options(),
+    })
+    stats['health_probe'] = dict(_probe_status, running=_probe_thread is not None)
+    return stats
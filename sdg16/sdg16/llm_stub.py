@@ -0,0 +1,98 @@
+"""
+🧪 In-process stand-in for the ollama client.
+
+With ``LLM_BACKEND = 'stub'`` every model call is answered here, without a
+running ollama: a short deterministic markdown judgment built from the
+prompt, streamed word by word in ollama's response format. Tests and
+benchmarks get the full request path (scheduler, single-flight, circuit
+breaker, caches) without a model.
+
+``LLM_STUB_FIRST_TOKEN_SECONDS`` and ``LLM_STUB_TOKEN_SECONDS`` add latency
+before the first word and between words, to simulate generation.
+"""
+import asyncio
+import re
+import time
+
+from django.conf import settings
+
+
+def _delays():
+    return (
+        getattr(settings, 'LLM_STUB_FIRST_TOKEN_SECONDS', 0),
+        getattr(settings, 'LLM_STUB_TOKEN_SECONDS', 0),
+    )
+
+
+def reply(messages, options=None):
+    """Words of the stub's answer to ``messages``, cut at ``num_predict`` like the model would."""
+    prompt = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+    title = re.search(r'^\W*Title:\**\s*(.+)', prompt, re.MULTILINE)
+    subject = title.group(1).strip() if title else (prompt.strip().splitlines() or ['(empty prompt)'])[0][:80]
+    text = (
+        f"### Stub Judgment\n\n"
+        f"- **Case:** {subject}\n"
+        f"- **Prompt length:** {len(prompt.split())} words\n\n"
+        f"This response comes from the local stub backend; no model was called."
+    )
+    words = re.findall(r'\S+\s*', text)
+    limit = (options or {}).get('num_predict')
+    if limit and limit > 0:
+        words = words[:limit]
+    return words
+
+
+def _part(model, content, done):
+    return {'model': model, 'message': {'role': 'assistant', 'content': content}, 'done': done}
+
+
+class StubClient:
+    """Answers ``chat`` and ``list`` like ``ollama.Client``."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def chat(self, model, messages, stream=False, options=None, keep_alive=None, **kwargs):
+        words = reply(messages, options)
+        if stream:
+            return self._stream(model, words)
+        first, per_token = _delays()
+        time.sleep(first + per_token * len(words))
+        return _part(model, ''.join(words), True)
+
+    def _stream(self, model, words):
+        first, per_token = _delays()
+        time.sleep(first)
+        for word in words:
+            yield _part(model, word, False)
+            time.sleep(per_token)
+        yield _part(model, '', True)
+
+    def list(self):
+        return {'models': [{'name': getattr(settings, 'LLM_MODEL', 'llama3.2:1b')}]}
+
+
+class AsyncStubClient:
+    """Answers ``chat`` and ``list`` like ``ollama.AsyncClient``."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def chat(self, model, messages, stream=False, options=None, keep_alive=None, **kwargs):
+        words = reply(messages, options)
+        if stream:
+            return self._stream(model, words)
+        first, per_token = _delays()
+        await asyncio.sleep(first + per_token * len(words))
+        return _part(model, ''.join(words), True)
+
+    async def _stream(self, model, words):
+        first, per_token = _delays()
+        await asyncio.sleep(first)
+        for word in words:
+            yield _part(model, word, False)
+            await asyncio.sleep(per_token)
+        yield _part(model, '', True)
+
+    async def list(self):
+        return {'models': [{'name': getattr(settings, 'LLM_MODEL', 'llama3.2:1b')}]}
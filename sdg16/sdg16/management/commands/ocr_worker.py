@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from sdg16.jobs import worker_loop
+
+
+class Command(BaseCommand):
+    help = "Process queued OCR jobs from the database until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to wait between polls when the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('⏳ OCR worker started, waiting for jobs...'))
+        try:
+            worker_loop(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('OCR worker stopped')
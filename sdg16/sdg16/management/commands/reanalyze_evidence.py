@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sdg16 import keywords
+from sdg16.models import Evidence
+from sdg16.reanalysis import load_checkpoint, run_reanalysis
+
+
+class Command(BaseCommand):
+    help = "Re-run keyword analysis (and optionally OCR) over stored Evidence rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ocr', action='store_true',
+                            help='Re-run OCR on the stored images before analysing')
+        parser.add_argument('--stale-only', action='store_true',
+                            help='Only rows analysed with another keyword taxonomy version')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Rows analysed and written per bulk_update')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Rows fetched per database round trip')
+        parser.add_argument('--serial', action='store_true',
+                            help='Analyse in this process instead of the OCR process pool')
+        parser.add_argument('--checkpoint', default=None,
+                            help='Checkpoint file used to resume an interrupted run')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore any checkpoint and start from the first row')
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or getattr(
+            settings, 'REANALYSIS_CHECKPOINT_PATH', settings.BASE_DIR / 'reanalysis_checkpoint.json'
+        )
+        queryset = Evidence.objects.all()
+        version = keywords.taxonomy_version()
+        if options['stale_only']:
+            queryset = queryset.exclude(taxonomy_version=version)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"♻️ Re-analysing evidence {'with OCR ' if options['ocr'] else ''}(taxonomy {version})"
+        ))
+
+        previous = None if options['restart'] else load_checkpoint(checkpoint)
+        if previous and previous.get('rerun_ocr') == options['ocr']:
+            self.stdout.write(f"Resuming after evidence #{previous['last_pk']} from {checkpoint}")
+
+        def report(state, rows, seconds):
+            rate = rows / seconds if seconds else 0.0
+            self.stdout.write(
+                f"  up to #{state['last_pk']}: {state['processed']} rows "
+                f"({state['updated']} updated, {state['failed']} failed), {rate:.1f} rows/s"
+            )
+
+        try:
+            state = run_reanalysis(
+                queryset,
+                checkpoint,
+                rerun_ocr=options['ocr'],
+                batch_size=options['batch_size'],
+                chunk_size=options['chunk_size'],
+                parallel=not options['serial'],
+                restart=options['restart'],
+                on_batch=report,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(f'Interrupted; run again to resume from {checkpoint}'))
+            return
+
+        for error in state['errors']:
+            self.stdout.write(self.style.WARNING(f'  ❌ {error}'))
+        rate = state['processed'] / state['elapsed'] if state['elapsed'] else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {state['processed']} rows in {state['elapsed']:.1f}s ({rate:.1f} rows/s): "
+            f"{state['updated']} updated, {state['failed']} failed"
+        ))
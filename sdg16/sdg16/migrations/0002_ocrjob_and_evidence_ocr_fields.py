@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdg16', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('single', 'Single file'), ('multi', 'Multi-file batch'), ('submission', 'Evidence submission')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', '⏳ Pending'), ('processing', '🔄 Processing'), ('completed', '✅ Completed'), ('failed', '❌ Failed'), ('partial', '⚠️ Partial Success')], db_index=True, default='pending', max_length=50)),
+                ('evidence_id', models.IntegerField(blank=True, help_text='Submission this job belongs to', null=True)),
+                ('files_data', models.TextField(help_text='JSON list of stored uploads')),
+                ('total_files', models.IntegerField(default=0)),
+                ('processed_files', models.IntegerField(default=0)),
+                ('results_data', models.TextField(blank=True, help_text='JSON per-file results, filled in as files finish')),
+                ('result_data', models.TextField(blank=True, help_text='JSON final OCR result')),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='combined_extracted_text',
+            field=models.TextField(blank=True, help_text='Combined text from all images'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='confidence_score',
+            field=models.FloatField(default=0.0, help_text='OCR confidence score'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='crazy_effects_enabled',
+            field=models.BooleanField(default=True, help_text='Enable crazy visual effects'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='extracted_text',
+            field=models.TextField(blank=True, help_text='OCR extracted text from image evidence'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='image_analysis',
+            field=models.TextField(blank=True, help_text='AI analysis of image content'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='image_evidence',
+            field=models.ImageField(blank=True, null=True, upload_to='evidence_images/'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='multiple_images_data',
+            field=models.TextField(blank=True, help_text='JSON data for multiple images'),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', '⏳ Pending'), ('processing', '🔄 Processing'), ('completed', '✅ Completed'), ('failed', '❌ Failed'), ('partial', '⚠️ Partial Success')], default='pending', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='evidence',
+            name='total_files_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdg16', '0002_ocrjob_and_evidence_ocr_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evidence',
+            name='taxonomy_version',
+            field=models.CharField(blank=True, db_index=True, help_text='Keyword taxonomy version used for image_analysis', max_length=50),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sdg16', '0003_evidence_taxonomy_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocrjob',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Identifies the current claim; a requeued job gets a new one', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='ocrjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Last progress report from the claiming worker', null=True),
+        ),
+    ]
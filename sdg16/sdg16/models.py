@@ -1,146 +1,226 @@
-from django.db import models
-import pytesseract
-from PIL import Image
-import os
-import json
-from datetime import datetime
-
-class Evidence(models.Model):
-    title = models.CharField(max_length=200)
-    description = models.TextField()
-    submitted_by = models.CharField(max_length=100)
-    date_submitted = models.DateTimeField(auto_now_add=True)
-    ai_judgment = models.TextField(blank=True)
-    
-    # 🔥 CRAZY MULTIPLE IMAGE EVIDENCE FIELDS! 🔥
-    image_evidence = models.ImageField(upload_to='evidence_images/', blank=True, null=True)
-    extracted_text = models.TextField(blank=True, help_text="OCR extracted text from image evidence")
-    image_analysis = models.TextField(blank=True, help_text="AI analysis of image content")
-    confidence_score = models.FloatField(default=0.0, help_text="OCR confidence score")
-    
-    # 🚀 NEW MULTI-FILE SUPPORT! 🚀
-    multiple_images_data = models.TextField(blank=True, help_text="JSON data for multiple images")
-    total_files_count = models.IntegerField(default=0)
-    combined_extracted_text = models.TextField(blank=True, help_text="Combined text from all images")
-    processing_status = models.CharField(max_length=50, default='pending', choices=[
-        ('pending', '⏳ Pending'),
-        ('processing', '🔄 Processing'),
-        ('completed', '✅ Completed'),
-        ('failed', '❌ Failed'),
-        ('partial', '⚠️ Partial Success')
-    ])
-    crazy_effects_enabled = models.BooleanField(default=True, help_text="Enable crazy visual effects")
-
-    def __str__(self):
-        return self.title
-    
-    def extract_text_from_image(self):
-        """🔥 CRAZY OCR MAGIC USING PYTESSERACT! 🔥"""
-        if self.image_evidence and os.path.exists(self.image_evidence.path):
-            try:
-                # Open the image using PIL
-                image = Image.open(self.image_evidence.path)
-                
-                # 🚀 PYTESSERACT MAGIC - Extract all text from image!
-                extracted_text = pytesseract.image_to_string(image)
-                
-                # Get detailed OCR data with confidence scores
-                ocr_data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-                
-                # Calculate average confidence score
-                confidences = [int(conf) for conf in ocr_data['conf'] if int(conf) > 0]
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                
-                # Save extracted text and confidence
-                self.extracted_text = extracted_text.strip()
-                self.confidence_score = avg_confidence
-                
-                # 🔥 CRAZY ENHANCEMENT - Analyze the extracted text for evidence patterns!
-                self.analyze_extracted_content()
-                
-                return True, extracted_text, avg_confidence
-                
-            except Exception as e:
-                self.extracted_text = f"❌ OCR Error: {str(e)}"
-                self.confidence_score = 0.0
-                return False, str(e), 0.0
-        
-        return False, "No image provided", 0.0
-    
-    def analyze_extracted_content(self):
-        """🧠 CRAZY AI ANALYSIS OF EXTRACTED TEXT! 🧠"""
-        if not self.extracted_text:
-            return
-        
-        # Look for key evidence patterns
-        evidence_keywords = [
-            'document', 'certificate', 'license', 'permit', 'contract',
-            'agreement', 'receipt', 'invoice', 'letter', 'report',
-            'statement', 'declaration', 'testimony', 'witness',
-            'signature', 'date', 'official', 'stamp', 'seal'
-        ]
-        
-        corruption_keywords = [
-            'bribe', 'corruption', 'illegal', 'fraud', 'embezzlement',
-            'kickback', 'money laundering', 'nepotism', 'abuse of power'
-        ]
-        
-        justice_keywords = [
-            'court', 'judge', 'lawyer', 'legal', 'law', 'justice',
-            'rights', 'violation', 'complaint', 'case', 'trial'
-        ]
-        
-        found_patterns = []
-        text_lower = self.extracted_text.lower()
-        
-        # Check for evidence patterns
-        for keyword in evidence_keywords:
-            if keyword in text_lower:
-                found_patterns.append(f"📋 Evidence Type: {keyword.title()}")
-        
-        # Check for corruption indicators
-        for keyword in corruption_keywords:
-            if keyword in text_lower:
-                found_patterns.append(f"🚨 Corruption Alert: {keyword.title()}")
-        
-        # Check for justice-related content
-        for keyword in justice_keywords:
-            if keyword in text_lower:
-                found_patterns.append(f"⚖️ Justice Matter: {keyword.title()}")
-        
-        # Generate analysis report
-        if found_patterns:
-            self.image_analysis = f"""
-🔍 **AUTOMATED IMAGE ANALYSIS**
-
-**Detected Patterns:**
-{chr(10).join(['• ' + pattern for pattern in found_patterns])}
-
-**Text Quality Score:** {self.confidence_score:.1f}%
-
-**SDG 16 Relevance:** {'🟢 HIGH' if any('corruption' in p.lower() or 'justice' in p.lower() for p in found_patterns) else '🟡 MEDIUM'}
-
-**Recommendation:** {'🚨 URGENT REVIEW REQUIRED' if any('corruption' in p.lower() for p in found_patterns) else '📋 Standard Processing'}
-            """
-        else:
-            self.image_analysis = f"""
-🔍 **AUTOMATED IMAGE ANALYSIS**
-
-**Status:** Text extracted successfully
-**Quality Score:** {self.confidence_score:.1f}%
-**Content Type:** General document/image
-**SDG 16 Relevance:** 🟡 TO BE DETERMINED
-
-**Next Steps:** Manual review recommended for context analysis
-            """
-
-    def save(self, *args, **kwargs):
-        """Override save to automatically extract text when image is uploaded"""
-        super().save(*args, **kwargs)
-        
-        # 🔥 AUTOMATIC OCR PROCESSING ON SAVE! 🔥
-        if self.image_evidence and not self.extracted_text:
-            success, text, confidence = self.extract_text_from_image()
-            if success:
-                # Save again with the extracted text
-                super().save(update_fields=['extracted_text', 'confidence_score', 'image_analysis'])
\ No newline at end of file
+from django.db import models
+from PIL import Image
+import os
+import json
+from datetime import datetime
+from . import judgment_cache, keywords, search
+from .ocr_engine import run_ocr
+
+# Fields written by OCR on save and by the reanalyze_evidence command
+ANALYSIS_FIELDS = ['image_analysis', 'taxonomy_version']
+OCR_FIELDS = ['extracted_text', 'confidence_score'] + ANALYSIS_FIELDS
+# Fields the AI judge reads; editing one makes ai_judgment stale
+JUDGED_FIELDS = ('title', 'description', 'submitted_by')
+
+PROCESSING_STATUS_CHOICES = [
+    ('pending', '⏳ Pending'),
+    ('processing', '🔄 Processing'),
+    ('completed', '✅ Completed'),
+    ('failed', '❌ Failed'),
+    ('partial', '⚠️ Partial Success')
+]
+
+class Evidence(models.Model):
+    title = models.CharField(max_length=200)
+    description = models.TextField()
+    submitted_by = models.CharField(max_length=100)
+    date_submitted = models.DateTimeField(auto_now_add=True)
+    ai_judgment = models.TextField(blank=True)
+    
+    # 🔥 CRAZY MULTIPLE IMAGE EVIDENCE FIELDS! 🔥
+    image_evidence = models.ImageField(upload_to='evidence_images/', blank=True, null=True)
+    extracted_text = models.TextField(blank=True, help_text="OCR extracted text from image evidence")
+    image_analysis = models.TextField(blank=True, help_text="AI analysis of image content")
+    taxonomy_version = models.CharField(max_length=50, blank=True, db_index=True, help_text="Keyword taxonomy version used for image_analysis")
+    confidence_score = models.FloatField(default=0.0, help_text="OCR confidence score")
+    
+    # 🚀 NEW MULTI-FILE SUPPORT! 🚀
+    multiple_images_data = models.TextField(blank=True, help_text="JSON data for multiple images")
+    total_files_count = models.IntegerField(default=0)
+    combined_extracted_text = models.TextField(blank=True, help_text="Combined text from all images")
+    processing_status = models.CharField(max_length=50, default='pending', choices=PROCESSING_STATUS_CHOICES)
+    crazy_effects_enabled = models.BooleanField(default=True, help_text="Enable crazy visual effects")
+
+    def __str__(self):
+        return self.title
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was judged, so an edit can drop the stored judgment
+        loaded = dict(zip(field_names, values))
+        instance._judged_values = tuple(loaded.get(name) for name in JUDGED_FIELDS)
+        return instance
+    
+    def judgment_is_stale(self):
+        judged = getattr(self, '_judged_values', None)
+        if judged is None or set(JUDGED_FIELDS + ('ai_judgment',)) & self.get_deferred_fields():
+            return False
+        return bool(self.ai_judgment) and judged != tuple(getattr(self, name) for name in JUDGED_FIELDS)
+    
+    def extract_text_from_image(self):
+        """🔥 CRAZY OCR MAGIC USING PYTESSERACT! 🔥"""
+        if self.image_evidence:
+            try:
+                # Open the image using PIL; a new upload is read before it reaches storage
+                image = self.open_evidence_image()
+                
+                # 🚀 PYTESSERACT MAGIC - one pass gives text and confidence scores!
+                ocr = run_ocr(image)
+                extracted_text = ocr['text']
+                avg_confidence = ocr['confidence']
+                
+                # Save extracted text and confidence
+                self.extracted_text = extracted_text.strip()
+                self.confidence_score = avg_confidence
+                
+                # 🔥 CRAZY ENHANCEMENT - Analyze the extracted text for evidence patterns!
+                self.analyze_extracted_content()
+                
+                return True, extracted_text, avg_confidence
+                
+            except Exception as e:
+                self.extracted_text = f"❌ OCR Error: {str(e)}"
+                self.confidence_score = 0.0
+                return False, str(e), 0.0
+        
+        return False, "No image provided", 0.0
+    
+    def open_evidence_image(self):
+        image_file = self.image_evidence
+        image_file.open('rb')
+        try:
+            image = Image.open(image_file)
+            image.load()
+        finally:
+            if image_file._committed:
+                image_file.close()
+            else:
+                # Storage still has to read the upload when the row is saved
+                image_file.seek(0)
+        return image
+    
+    def analyze_extracted_content(self):
+        """🧠 CRAZY AI ANALYSIS OF EXTRACTED TEXT! 🧠"""
+        if not self.extracted_text:
+            # Nothing to analyse is still a result under this taxonomy: drop any
+            # analysis of earlier text and stamp the version, so --stale-only skips the row
+            self.image_analysis = ''
+            self.taxonomy_version = keywords.taxonomy_version()
+            return
+        
+        # Look for key evidence patterns in a single pass over the text
+        scan = keywords.scan(self.extracted_text)
+        self.taxonomy_version = scan.version
+        found_patterns = []
+        
+        # Check for evidence patterns
+        for keyword in scan.matches('evidence'):
+            found_patterns.append(f"📋 Evidence Type: {keyword.title()}")
+        
+        # Check for corruption indicators
+        for keyword in scan.matches('corruption'):
+            found_patterns.append(f"🚨 Corruption Alert: {keyword.title()}")
+        
+        # Check for justice-related content
+        for keyword in scan.matches('justice'):
+            found_patterns.append(f"⚖️ Justice Matter: {keyword.title()}")
+        
+        # Generate analysis report
+        if found_patterns:
+            self.image_analysis = f"""
+🔍 **AUTOMATED IMAGE ANALYSIS**
+
+**Detected Patterns:**
+{chr(10).join(['• ' + pattern for pattern in found_patterns])}
+
+**Text Quality Score:** {self.confidence_score:.1f}%
+
+**SDG 16 Relevance:** {'🟢 HIGH' if any('corruption' in p.lower() or 'justice' in p.lower() for p in found_patterns) else '🟡 MEDIUM'}
+
+**Recommendation:** {'🚨 URGENT REVIEW REQUIRED' if any('corruption' in p.lower() for p in found_patterns) else '📋 Standard Processing'}
+            """
+        else:
+            self.image_analysis = f"""
+🔍 **AUTOMATED IMAGE ANALYSIS**
+
+**Status:** Text extracted successfully
+**Quality Score:** {self.confidence_score:.1f}%
+**Content Type:** General document/image
+**SDG 16 Relevance:** 🟡 TO BE DETERMINED
+
+**Next Steps:** Manual review recommended for context analysis
+            """
+
+    def save(self, *args, **kwargs):
+        """Override save to automatically extract text when image is uploaded"""
+        # 🔥 AUTOMATIC OCR PROCESSING ON SAVE! 🔥
+        # OCR runs before the write, so every save is a single query
+        if self.image_evidence and not self.extracted_text:
+            success, text, confidence = self.extract_text_from_image()
+            if not success:
+                # Leave the row unextracted so a later save tries again
+                self.extracted_text = ''
+                self.confidence_score = 0.0
+            elif kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | set(OCR_FIELDS)
+        
+        # ⚖️ An edited title/description/submitter needs a fresh judgment
+        if self.judgment_is_stale():
+            self.ai_judgment = ''
+            judgment_cache.get_cache().invalidate(ref=f'evidence:{self.pk}')
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'ai_judgment'}
+        super().save(*args, **kwargs)
+        if not set(JUDGED_FIELDS) & self.get_deferred_fields():
+            self._judged_values = tuple(getattr(self, name) for name in JUDGED_FIELDS)
+        
+        # 🔎 Keep the full-text search index in step with the row
+        search.index_evidence(self)
+
+
+class OCRJob(models.Model):
+    """⏳ Queued OCR work, claimed and processed by background workers."""
+    KIND_CHOICES = [
+        ('single', 'Single file'),
+        ('multi', 'Multi-file batch'),
+        ('submission', 'Evidence submission'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=50, default='pending', choices=PROCESSING_STATUS_CHOICES, db_index=True)
+    evidence_id = models.IntegerField(null=True, blank=True, help_text="Submission this job belongs to")
+    files_data = models.TextField(help_text="JSON list of stored uploads")
+    total_files = models.IntegerField(default=0)
+    processed_files = models.IntegerField(default=0)
+    results_data = models.TextField(blank=True, help_text="JSON per-file results, filled in as files finish")
+    result_data = models.TextField(blank=True, help_text="JSON final OCR result")
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    claim_token = models.CharField(max_length=32, blank=True, help_text="Identifies the current claim; a requeued job gets a new one")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress report from the claiming worker")
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"OCR job {self.pk} ({self.status})"
+
+    @property
+    def files(self):
+        return json.loads(self.files_data or '[]')
+
+    @property
+    def results(self):
+        return json.loads(self.results_data or '[]')
+
+    @property
+    def result(self):
+        return json.loads(self.result_data) if self.result_data else None
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'partial')
@@ -0,0 +1,207 @@
+"""
+💾 Content-addressed cache for OCR results.
+
+Entries are keyed on a SHA-256 of the uploaded bytes plus the settings that
+change what the OCR pipeline produces, so a resubmitted scan skips
+enhancement and tesseract entirely. Two tiers:
+
+* an in-memory LRU tier for the current process, and
+* a SQLite tier on disk that survives restarts and is shared by workers.
+
+Both tiers evict least-recently-used entries once their byte budget is
+exceeded.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import keywords
+
+# Bump whenever enhancement/OCR code changes what a cached result would hold
+PIPELINE_VERSION = 8
+
+# Settings whose values change the OCR output and therefore the cache key
+FINGERPRINT_SETTINGS = (
+    'OCR_BACKEND',
+    'OCR_LANG',
+    'OCR_TESSERACT_CONFIG',
+    'OCR_PREPROCESS_ENGINE',
+    'OCR_DENOISE_STRATEGY',
+    'OCR_BINARIZE',
+    'OCR_ADAPTIVE_PREPROCESSING',
+    'OCR_TARGET_DPI',
+    'OCR_ASSUMED_LINE_POINTS',
+    'OCR_MAX_MEGAPIXELS',
+    'OCR_TIERED',
+    'OCR_CONFIDENCE_THRESHOLD',
+    'OCR_FAST_CONFIG',
+    'OCR_HEAVY_PSMS',
+    'OCR_PDF_DPI',
+    'OCR_MAX_PAGES',
+)
+
+# Per-request fields that must not be stored with a cached result
+VOLATILE_FIELDS = ('file_name', 'file_size', 'processing_effect', 'processing_time', 'cached')
+
+
+def settings_fingerprint():
+    values = {name: getattr(settings, name, None) for name in FINGERPRINT_SETTINGS}
+    values['pipeline_version'] = PIPELINE_VERSION
+    # Cached results carry keyword analysis, so a taxonomy edit invalidates them
+    values['keyword_taxonomy'] = keywords.get_matcher().digest
+    return json.dumps(values, sort_keys=True, default=str)
+
+
+def cache_key(data):
+    """Hash uploaded bytes (bytes, memoryview or mmap) with the OCR settings."""
+    hasher = hashlib.sha256()
+    hasher.update(data)
+    hasher.update(settings_fingerprint().encode())
+    return hasher.hexdigest()
+
+
+class OCRResultCache:
+    def __init__(self, path, memory_max_bytes, disk_max_bytes):
+        self.path = str(path) if path else None
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'memory_evictions': 0,
+            'disk_evictions': 0,
+        }
+
+    # -- disk tier -------------------------------------------------------
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS ocr_cache ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS ocr_cache_accessed ON ocr_cache (accessed)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _disk_get(self, key):
+        if not self.path:
+            return None
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT value FROM ocr_cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE ocr_cache SET accessed = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+            return row[0]
+        except sqlite3.Error:
+            return None
+
+    def _disk_put(self, key, payload):
+        if not self.path:
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO ocr_cache (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                (key, payload, len(payload), time.time())
+            )
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_cache').fetchone()[0]
+            while total > self.disk_max_bytes:
+                row = conn.execute(
+                    'SELECT key, size FROM ocr_cache ORDER BY accessed LIMIT 1'
+                ).fetchone()
+                if row is None:
+                    break
+                conn.execute('DELETE FROM ocr_cache WHERE key = ?', (row[0],))
+                total -= row[1]
+                self.stats['disk_evictions'] += 1
+            conn.commit()
+        except sqlite3.Error:
+            pass
+
+    # -- memory tier -----------------------------------------------------
+
+    def _memory_put(self, key, payload):
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = payload
+        self._memory_bytes += len(payload)
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats['memory_evictions'] += 1
+
+    # -- public API ------------------------------------------------------
+
+    def get(self, key):
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+            else:
+                payload = self._disk_get(key)
+                if payload is None:
+                    self.stats['misses'] += 1
+                    return None
+                self.stats['disk_hits'] += 1
+                self._memory_put(key, payload)
+        result = json.loads(payload)
+        result['cached'] = True
+        return result
+
+    def put(self, key, result):
+        if not result.get('success'):
+            return
+        stored = {k: v for k, v in result.items() if k not in VOLATILE_FIELDS}
+        payload = json.dumps(stored)
+        with self._lock:
+            self._memory_put(key, payload)
+            self._disk_put(key, payload)
+            self.stats['stores'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_bytes
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OCRResultCache(
+                getattr(settings, 'OCR_CACHE_PATH', None),
+                getattr(settings, 'OCR_CACHE_MEMORY_MAX_BYTES', 32 * 1024 * 1024),
+                getattr(settings, 'OCR_CACHE_DISK_MAX_BYTES', 512 * 1024 * 1024),
+            )
+        return _cache
+
+
+def cache_enabled():
+    return getattr(settings, 'OCR_CACHE_ENABLED', True)
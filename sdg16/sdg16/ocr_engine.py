@@ -0,0 +1,257 @@
+"""
+🔥 Shared OCR engine for SDG 16 image evidence.
+
+Runs a single tesseract recognition pass per image and derives everything
+the views and models need from that one output: the plain text, the average
+word confidence, per-word boxes and word/character counts.
+
+Recognition goes through a pluggable backend chosen by ``OCR_BACKEND``:
+
+* ``pytesseract`` shells out to the ``tesseract`` binary for every call;
+* ``tesserocr`` keeps a pool of long-lived recognizers on the tesseract C
+  API, so traineddata is loaded once per recognizer and reused across
+  requests. It falls back to pytesseract when tesserocr is not installed.
+"""
+import logging
+import queue
+import shlex
+import threading
+
+import pytesseract
+from django.conf import settings
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TSV_COLUMNS = (
+    'level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+    'left', 'top', 'width', 'height', 'conf', 'text',
+)
+
+
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return -1.0
+
+
+def parse_ocr_data(ocr_data):
+    """Turn an ``image_to_data`` dict into text, confidence and word boxes."""
+    words = []
+    lines = []
+    current_line = []
+    line_key = None
+    paragraph_key = None
+
+    for i, word in enumerate(ocr_data.get('text', [])):
+        conf = _as_number(ocr_data['conf'][i])
+        word = (word or '').strip()
+        # Only word-level rows (level 5) carry real text and confidences
+        if conf < 0 or not word:
+            continue
+
+        this_paragraph = (
+            ocr_data['page_num'][i],
+            ocr_data['block_num'][i],
+            ocr_data['par_num'][i],
+        )
+        this_line = this_paragraph + (ocr_data['line_num'][i],)
+        if this_line != line_key:
+            if current_line:
+                lines.append(' '.join(current_line))
+            # Blank line between paragraphs, like image_to_string
+            if paragraph_key is not None and this_paragraph != paragraph_key:
+                lines.append('')
+            current_line = []
+            line_key = this_line
+            paragraph_key = this_paragraph
+        current_line.append(word)
+
+        words.append({
+            'text': word,
+            'confidence': conf,
+            'left': int(ocr_data['left'][i]),
+            'top': int(ocr_data['top'][i]),
+            'width': int(ocr_data['width'][i]),
+            'height': int(ocr_data['height'][i]),
+            'block_num': int(ocr_data['block_num'][i]),
+            'line_num': int(ocr_data['line_num'][i]),
+        })
+
+    if current_line:
+        lines.append(' '.join(current_line))
+
+    text = '\n'.join(lines)
+    confidences = [w['confidence'] for w in words if w['confidence'] > 0]
+    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
+
+    return {
+        'text': text,
+        'confidence': avg_confidence,
+        'words': words,
+        'word_count': len(text.split()),
+        'character_count': len(text),
+    }
+
+
+def parse_tsv(tsv):
+    """Parse tesseract TSV output into the ``image_to_data`` dict layout."""
+    ocr_data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        if len(fields) == len(TSV_COLUMNS) - 1:
+            fields.append('')
+        for column, value in zip(TSV_COLUMNS, fields):
+            ocr_data[column].append(value if column == 'text' else _as_number(value))
+    return ocr_data
+
+
+class PytesseractBackend:
+    name = 'pytesseract'
+
+    def __init__(self, lang):
+        self.lang = lang
+
+    def image_to_data(self, image, config):
+        return pytesseract.image_to_data(
+            image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT
+        )
+
+
+class TesserocrBackend:
+    """
+    Pool of persistent ``PyTessBaseAPI`` recognizers.
+
+    Recognizers are created lazily up to ``size``; callers beyond that wait
+    for one to be returned instead of starting another tesseract.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, lang, size, tessdata_path=None):
+        self.lang = lang
+        self.size = size
+        self.tessdata_path = tessdata_path
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_api(self):
+        kwargs = {'lang': self.lang}
+        if self.tessdata_path:
+            kwargs['path'] = self.tessdata_path
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._new_api()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def _configure(self, api, config, changed):
+        # Honour the pytesseract-style flags we use: --psm N and -c name=value.
+        # Each variable's previous value goes into ``changed`` for ``_restore``.
+        args = shlex.split(config or '')
+        api.SetPageSegMode(tesserocr.PSM.AUTO)
+        for i, arg in enumerate(args):
+            if arg == '--psm' and i + 1 < len(args):
+                api.SetPageSegMode(int(args[i + 1]))
+            elif arg == '-c' and i + 1 < len(args) and '=' in args[i + 1]:
+                name, value = args[i + 1].split('=', 1)
+                previous = api.GetVariableAsString(name)
+                if previous is not None and api.SetVariable(name, value):
+                    changed.append((name, previous))
+
+    def _restore(self, api, changed):
+        # Clear() keeps variables, so undo this call's -c values before the next caller
+        for name, previous in reversed(changed):
+            api.SetVariable(name, previous)
+
+    def image_to_data(self, image, config):
+        api = self._acquire()
+        changed = []
+        try:
+            self._configure(api, config, changed)
+            api.SetImage(image)
+            api.Recognize()
+            return parse_tsv(api.GetTSVText(0))
+        finally:
+            # Drop the image but keep the loaded language model for reuse
+            api.Clear()
+            self._restore(api, changed)
+            self._idle.put(api)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+_tier_counts = {'fast': 0, 'heavy': 0, 'escalated': 0}
+_tier_lock = threading.Lock()
+
+
+def record_tier(result):
+    """Count which OCR tier produced a fresh result, and how often a heavy pass ran (every page of a document)."""
+    with _tier_lock:
+        for page in result.get('pages') or [result]:
+            tier = page.get('ocr_tier')
+            if tier in ('fast', 'heavy'):
+                _tier_counts[tier] += 1
+                # An escalated page may still keep its fast result
+                if len(page.get('ocr_passes') or ()) > 1:
+                    _tier_counts['escalated'] += 1
+
+
+def tier_stats():
+    with _tier_lock:
+        stats = dict(_tier_counts)
+    total = stats['fast'] + stats['heavy']
+    stats['escalation_rate'] = stats['escalated'] / total if total else 0
+    return stats
+
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = getattr(settings, 'OCR_BACKEND', 'pytesseract')
+            lang = getattr(settings, 'OCR_LANG', 'eng')
+            if name == 'tesserocr' and TESSEROCR_AVAILABLE:
+                _backend = TesserocrBackend(
+                    lang,
+                    getattr(settings, 'OCR_TESSEROCR_POOL_SIZE', 2),
+                    getattr(settings, 'OCR_TESSDATA_PATH', None),
+                )
+            else:
+                if name == 'tesserocr':
+                    logger.warning('tesserocr is not installed; falling back to pytesseract')
+                _backend = PytesseractBackend(lang)
+        return _backend
+
+
+def run_ocr(image, config=None):
+    """🚀 One tesseract pass: returns text, confidence, word boxes and counts."""
+    if config is None:
+        config = getattr(settings, 'OCR_TESSERACT_CONFIG', '')
+    ocr_data = get_backend().image_to_data(image, config)
+    return parse_ocr_data(ocr_data)
@@ -0,0 +1,115 @@
+"""
+🚀 Bounded process pool for multi-file OCR.
+
+One executor is shared by every request in the Django process, so the number
+of OCR worker processes never exceeds ``OCR_POOL_MAX_WORKERS`` no matter how
+many uploads arrive at the same time. Extra files simply queue for a free
+worker.
+
+Async views use a second, thread-based executor (``run_in_thread``) for
+blocking upload parsing, OCR and database work, so the event loop stays
+free for other requests.
+"""
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_pool = None
+_threads = None
+_pool_lock = threading.Lock()
+
+
+def execution_mode():
+    return getattr(settings, 'OCR_EXECUTION_MODE', 'serial')
+
+
+def max_workers():
+    return getattr(settings, 'OCR_POOL_MAX_WORKERS', None) or min(4, os.cpu_count() or 1)
+
+
+def _init_worker():
+    # Spawned workers start from a clean interpreter
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sdg16.settings')
+    import django
+    django.setup()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def map_ordered(worker, jobs, on_error):
+    """
+    Run ``worker(*job)`` for every job on the shared pool.
+
+    Results come back in submission order. A job whose worker raises, or
+    whose process dies, is replaced by ``on_error(job, exc)`` so one bad file
+    never takes the rest of the batch down with it.
+    """
+    pool = get_pool()
+    try:
+        futures = [pool.submit(worker, *job) for job in jobs]
+    except BrokenProcessPool as e:
+        _discard_pool(pool)
+        return [on_error(job, e) for job in jobs]
+
+    results = []
+    for job, future in zip(jobs, futures):
+        try:
+            results.append(future.result())
+        except BrokenProcessPool as e:
+            _discard_pool(pool)
+            results.append(on_error(job, e))
+        except Exception as e:
+            results.append(on_error(job, e))
+    return results
+
+
+def get_thread_executor():
+    global _threads
+    with _pool_lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'OCR_ASYNC_THREADS', None) or 2 * max_workers(),
+                thread_name_prefix='ocr-async',
+            )
+        return _threads
+
+
+def _run_closing_connections(func, *args):
+    try:
+        return func(*args)
+    finally:
+        # Executor threads outlive the request; don't leave connections behind
+        close_old_connections()
+
+
+async def run_in_thread(func, *args):
+    """Await ``func(*args)`` on the thread executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_thread_executor(), functools.partial(_run_closing_connections, func, *args)
+    )
@@ -0,0 +1,249 @@
+"""
+🎨 Image preprocessing engines for OCR.
+
+``pil`` is the original ImageEnhance chain: four full-image RGB passes
+(contrast, sharpness, brightness, median filter).
+
+``numpy`` converts once to a single-channel array and applies contrast,
+sharpening and brightness as one fused affine expression, followed by a
+selectable denoise strategy and optional Otsu binarization. Tesseract only
+needs grayscale, so the output is an ``L`` image.
+
+``adapt_for_ocr`` runs before either engine: it crops margins, downsamples
+oversized photos to a target text resolution and spots images clean enough
+to skip enhancement altogether.
+"""
+from django.conf import settings
+from PIL import Image, ImageEnhance, ImageFilter
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+CONTRAST = 1.5
+SHARPNESS = 2.0
+BRIGHTNESS = 1.2
+
+
+def enhance_pil_chain(image):
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    enhancer = ImageEnhance.Contrast(image)
+    image = enhancer.enhance(CONTRAST)  # Increase contrast
+    enhancer = ImageEnhance.Sharpness(image)
+    image = enhancer.enhance(SHARPNESS)  # Increase sharpness
+    enhancer = ImageEnhance.Brightness(image)
+    image = enhancer.enhance(BRIGHTNESS)  # Slight brightness increase
+    image = image.filter(ImageFilter.MedianFilter(size=3))
+    return image
+
+
+def _box_sum_3x3(gray):
+    padded = np.pad(gray, 1, mode='edge')
+    rows = padded[:-2] + padded[1:-1] + padded[2:]
+    return rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+
+
+def fused_enhance(gray, contrast=CONTRAST, sharpness=SHARPNESS, brightness=BRIGHTNESS):
+    """
+    Contrast, sharpness and brightness in one pass over a float32 array.
+
+    Mirrors ImageEnhance: contrast pulls towards the image mean, sharpness
+    extrapolates away from PIL's SMOOTH kernel (centre weight 5, neighbours
+    1, /13) and brightness scales. All three are affine, so they collapse to
+    ``alpha * (s*x - (s-1)*smooth) + beta``.
+    """
+    mean = float(gray.mean())
+    smooth = _box_sum_3x3(gray)
+    smooth += 4.0 * gray
+    smooth *= (sharpness - 1.0) / 13.0
+    alpha = brightness * contrast
+    beta = brightness * mean * (1.0 - contrast)
+    out = gray * (alpha * sharpness)
+    out -= smooth * alpha
+    out += beta
+    np.clip(out, 0, 255, out=out)
+    return out
+
+
+def _denoise_none(image):
+    return image
+
+
+def _denoise_median(image):
+    return image.filter(ImageFilter.MedianFilter(size=3))
+
+
+def _denoise_mean(image):
+    gray = np.asarray(image, dtype=np.float32)
+    return Image.fromarray((_box_sum_3x3(gray) / 9.0).astype(np.uint8), mode='L')
+
+
+DENOISE_STRATEGIES = {
+    'none': _denoise_none,
+    'median': _denoise_median,
+    'mean': _denoise_mean,
+}
+
+
+def otsu_threshold(gray_u8):
+    hist = np.bincount(gray_u8.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_mean = np.cumsum(hist * levels)
+    mean_bg = np.divide(cum_mean, weight_bg, out=np.zeros(256), where=weight_bg > 0)
+    mean_fg = np.divide(cum_mean[-1] - cum_mean, weight_fg, out=np.zeros(256), where=weight_fg > 0)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def enhance_numpy(image, denoise='median', binarize=False):
+    gray = np.asarray(image.convert('L'), dtype=np.float32)
+    enhanced = fused_enhance(gray).astype(np.uint8)
+    result = DENOISE_STRATEGIES[denoise](Image.fromarray(enhanced, mode='L'))
+    if binarize:
+        gray_u8 = np.asarray(result)
+        threshold = otsu_threshold(gray_u8)
+        result = Image.fromarray(np.where(gray_u8 > threshold, 255, 0).astype(np.uint8), mode='L')
+    return result
+
+
+# -- adaptive stage -----------------------------------------------------------
+
+PROBE_MAX_SIDE = 1000
+
+
+def _ink_mask(gray):
+    histogram = gray.histogram()
+    total = sum(histogram)
+    running = 0
+    background = 255
+    for level, count in enumerate(histogram):
+        running += count
+        if running * 2 >= total:
+            background = level
+            break
+    threshold = int(background * 0.75)
+    return gray.point(lambda v: 255 if v < threshold else 0)
+
+
+def _line_heights(mask):
+    """Heights of horizontal ink bands, i.e. text lines, in mask pixels."""
+    width, height = mask.size
+    profile = list(mask.resize((1, height), Image.Resampling.BOX).getdata())
+    heights = []
+    run = 0
+    for value in profile:
+        # A row counts as text when more than ~1% of it is ink
+        if value > 2:
+            run += 1
+        elif run:
+            heights.append(run)
+            run = 0
+    if run:
+        heights.append(run)
+    return [h for h in heights if h >= 2]
+
+
+def _is_clean(gray):
+    histogram = gray.histogram()
+    total = sum(histogram) or 1
+    dark = sum(histogram[:64]) / total
+    light = sum(histogram[192:]) / total
+    return dark > 0.005 and dark + light >= 0.95
+
+
+def adapt_for_ocr(image):
+    """
+    Size the image for tesseract before any enhancement runs.
+
+    Crops empty margins, estimates the text line height from the row ink
+    profile, downsamples so text lands near ``OCR_TARGET_DPI`` (and the image
+    under ``OCR_MAX_MEGAPIXELS``) and flags already clean, high-contrast
+    images so enhancement can be skipped. Returns the grayscale image and a
+    dict describing every decision taken.
+    """
+    target_dpi = getattr(settings, 'OCR_TARGET_DPI', 300)
+    line_points = getattr(settings, 'OCR_ASSUMED_LINE_POINTS', 12)
+    max_megapixels = getattr(settings, 'OCR_MAX_MEGAPIXELS', 8)
+
+    gray = image.convert('L')
+    width, height = gray.size
+    decisions = {'original_size': [width, height]}
+
+    probe_scale = min(1.0, PROBE_MAX_SIDE / max(width, height))
+    probe = gray
+    if probe_scale < 1.0:
+        probe = gray.resize(
+            (max(1, int(width * probe_scale)), max(1, int(height * probe_scale))),
+            Image.Resampling.BOX,
+        )
+    mask = _ink_mask(probe)
+
+    # Crop empty margins (with a little padding) when they are worth it
+    bbox = mask.getbbox()
+    decisions['crop_box'] = None
+    if bbox:
+        pad = int(0.02 * max(probe.size))
+        left, top, right, bottom = bbox
+        left, top = max(0, left - pad), max(0, top - pad)
+        right, bottom = min(probe.width, right + pad), min(probe.height, bottom + pad)
+        if (right - left) * (bottom - top) < 0.9 * probe.width * probe.height:
+            crop_box = [int(left / probe_scale), int(top / probe_scale),
+                        min(width, int(right / probe_scale)), min(height, int(bottom / probe_scale))]
+            gray = gray.crop(crop_box)
+            mask = mask.crop((left, top, right, bottom))
+            probe = probe.crop((left, top, right, bottom))
+            decisions['crop_box'] = crop_box
+
+    # Text scale from the horizontal ink profile
+    line_heights = sorted(_line_heights(mask))
+    scale = 1.0
+    if line_heights:
+        line_height = line_heights[len(line_heights) // 2] / probe_scale
+        decisions['estimated_line_height'] = round(line_height, 1)
+        decisions['estimated_dpi'] = round(line_height * 72 / line_points)
+        target_line_height = target_dpi * line_points / 72
+        if line_height > target_line_height * 1.25:
+            scale = target_line_height / line_height
+    else:
+        decisions['estimated_line_height'] = None
+        decisions['estimated_dpi'] = None
+    megapixels = gray.width * gray.height / 1_000_000
+    if megapixels * scale * scale > max_megapixels:
+        scale = (max_megapixels / megapixels) ** 0.5
+    decisions['scale'] = round(scale, 3)
+    if scale < 1.0:
+        gray = gray.resize(
+            (max(1, int(gray.width * scale)), max(1, int(gray.height * scale))),
+            Image.Resampling.LANCZOS,
+            reducing_gap=3.0,
+        )
+    decisions['output_size'] = [gray.width, gray.height]
+
+    decisions['skip_enhancement'] = _is_clean(probe)
+    return gray, decisions
+
+
+def enhance_fast(image):
+    """Cheap first-tier preprocessing: grayscale plus fused enhancement, no denoise."""
+    if NUMPY_AVAILABLE:
+        return enhance_numpy(image, denoise='none', binarize=False)
+    return image.convert('L')
+
+
+def enhance(image, engine=None, denoise=None, binarize=None):
+    """Run the configured preprocessing engine on a decoded image."""
+    if engine is None:
+        engine = getattr(settings, 'OCR_PREPROCESS_ENGINE', 'numpy')
+    if engine == 'numpy' and NUMPY_AVAILABLE:
+        if denoise is None:
+            denoise = getattr(settings, 'OCR_DENOISE_STRATEGY', 'median')
+        if binarize is None:
+            binarize = getattr(settings, 'OCR_BINARIZE', False)
+        return enhance_numpy(image, denoise=denoise, binarize=binarize)
+    return enhance_pil_chain(image)
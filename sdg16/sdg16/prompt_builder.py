@@ -0,0 +1,314 @@
+"""
+✂️ Token-budgeted evidence text for the judge prompt.
+
+Every word of OCR output (multi-file separators and analysis blocks
+included) used to be stitched into the description the judge reads. Long
+batches overflowed the 1B model's context and made prefill very slow.
+
+``build_evidence_text`` keeps the submitter's own description and fills the
+rest of ``JUDGE_PROMPT_TOKEN_BUDGET`` with OCR passages, highest keyword
+score first, printed back in document order with ``[…]`` where text was
+left out. When even the keyword-bearing passages do not fit, the text is
+summarised map-reduce style: chunks of ``JUDGE_MAP_CHUNK_TOKENS`` are
+summarised in parallel, and the summaries are summarised again until they
+fit. One reduction makes at most ``JUDGE_MAP_MAX_CALLS`` summary calls, all
+within ``JUDGE_MAP_DEADLINE_SECONDS``: longer text is first cut to the
+best passages those calls can cover, and whatever is not summarised in
+time is represented by its best passages instead.
+
+Token counts come from a ``tokenizers`` tokenizer file when
+``JUDGE_TOKENIZER_PATH`` is set, otherwise from a conservative estimate of
+about four characters per token.
+
+Async callers build prompts on this module's own ``JUDGE_PROMPT_THREADS``
+threads (``run_in_thread``): summaries wait for judge scheduler slots, and
+must never hold the threads uploads and OCR run on.
+"""
+import asyncio
+import functools
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from . import keywords
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+# Passages are at most this long, so one dense page can't crowd out the rest
+PASSAGE_TOKENS = 120
+# Summaries of summaries; after this many rounds the best passages are kept
+MAX_REDUCE_ROUNDS = 3
+OMITTED = '[…]'
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'prompts': 0,
+    'trimmed': 0,
+    'map_reduce': 0,
+    'map_truncated': 0,
+    'map_out_of_time': 0,
+    'summaries': 0,
+    'summary_failures': 0,
+    'input_tokens': 0,
+    'prompt_tokens': 0,
+}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot['mean_prompt_tokens'] = round(snapshot['prompt_tokens'] / snapshot['prompts']) if snapshot['prompts'] else 0
+    return snapshot
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JUDGE_PROMPT_THREADS', 4),
+                thread_name_prefix='judge-prompt',
+            )
+        return _executor
+
+
+async def run_in_thread(func, *args):
+    """Await ``func(*args)`` on the prompt-building threads without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+def token_budget():
+    return getattr(settings, 'JUDGE_PROMPT_TOKEN_BUDGET', 1500)
+
+
+def _get_tokenizer():
+    global _tokenizer
+    path = getattr(settings, 'JUDGE_TOKENIZER_PATH', None)
+    if not path or not TOKENIZERS_AVAILABLE:
+        return None
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            _tokenizer = Tokenizer.from_file(str(path))
+        return _tokenizer
+
+
+def count_tokens(text):
+    if not text:
+        return 0
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+    # Words cost a token per four letters or part thereof, punctuation one each
+    return sum(math.ceil(len(piece) / 4) for piece in re.findall(r'\w+|[^\w\s]', text))
+
+
+class Passage:
+    def __init__(self, text, source=None, order=0):
+        self.text = text
+        self.source = source
+        self.order = order
+        self.tokens = count_tokens(text)
+        self.score = sum(keywords.scan(text).scores().values())
+
+
+def split_passages(text, source=None, start=0, max_tokens=PASSAGE_TOKENS):
+    """Paragraph-aligned passages of at most ``max_tokens``; long lines are cut at word boundaries."""
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text or ''):
+        current, used = [], 0
+        for line in paragraph.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            words = line.split()
+            while words:
+                # Take as many words as fit in what is left of this passage
+                take, cost = 0, 0
+                while take < len(words):
+                    word_cost = count_tokens(words[take])
+                    if used + cost + word_cost > max_tokens and (take or current):
+                        break
+                    cost += word_cost
+                    take += 1
+                if take:
+                    current.append(' '.join(words[:take]))
+                    used += cost
+                    words = words[take:]
+                if words:
+                    pieces.append('\n'.join(current))
+                    current, used = [], 0
+        if current:
+            pieces.append('\n'.join(current))
+    return [Passage(piece, source, start + i) for i, piece in enumerate(pieces)]
+
+
+def select_passages(passages, budget):
+    """Highest-scoring passages that fit in ``budget``, back in document order."""
+    kept, used = [], 0
+    for passage in sorted(passages, key=lambda p: (-p.score, p.order)):
+        if used + passage.tokens <= budget:
+            kept.append(passage)
+            used += passage.tokens
+    return sorted(kept, key=lambda p: p.order)
+
+
+def render_passages(kept, passages):
+    """``kept`` under the file they came from, with ``[…]`` wherever passages were left out."""
+    lines = []
+    source = None
+    previous = passages[0].order - 1 if passages else 0
+    for passage in kept:
+        if passage.source is not None and passage.source != source:
+            source = passage.source
+            lines.append(f'📁 {source}')
+        if passage.order != previous + 1:
+            lines.append(OMITTED)
+        lines.append(passage.text)
+        previous = passage.order
+    if kept and previous != passages[-1].order:
+        lines.append(OMITTED)
+    return '\n'.join(lines)
+
+
+def fit_passages(passages, budget):
+    """Rendered best passages; file labels and ``[…]`` markers count against ``budget`` too."""
+    kept = select_passages(passages, budget)
+    text = render_passages(kept, passages)
+    while kept and count_tokens(text) > budget:
+        kept.remove(min(kept, key=lambda p: (p.score, -p.order)))
+        text = render_passages(kept, passages)
+    return text
+
+
+def _chunks(passages, max_tokens):
+    """Consecutive passages packed into texts of at most ``max_tokens``."""
+    chunks, current, used = [], [], 0
+    for passage in passages:
+        if current and used + passage.tokens > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(passage)
+        used += passage.tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def map_reduce(passages, budget, summarize):
+    """Summarise ``passages`` in parallel until the summaries fit in ``budget``, within a call and time budget."""
+    _count('map_reduce')
+    chunk_tokens = getattr(settings, 'JUDGE_MAP_CHUNK_TOKENS', 1000)
+    workers = getattr(settings, 'JUDGE_MAX_CONCURRENCY', 2)
+    calls_left = max(1, getattr(settings, 'JUDGE_MAP_MAX_CALLS', 8))
+    deadline_at = time.monotonic() + getattr(settings, 'JUDGE_MAP_DEADLINE_SECONDS', 90)
+    # Packing leaves up to one passage of slack per chunk, so this always fits in calls_left chunks
+    coverable = calls_left * max(PASSAGE_TOKENS, chunk_tokens - PASSAGE_TOKENS)
+    if sum(p.tokens for p in passages) > coverable:
+        _count('map_truncated')
+        passages = select_passages(passages, coverable)
+    for _ in range(MAX_REDUCE_ROUNDS):
+        chunks = _chunks(passages, chunk_tokens)
+        if len(chunks) > calls_left or time.monotonic() >= deadline_at:
+            _count('map_out_of_time')
+            break
+        calls_left -= len(chunks)
+        texts = [render_passages(chunk, chunk) for chunk in chunks]
+        # Each summary gets an equal share of the budget
+        share = max(PASSAGE_TOKENS, budget // len(chunks))
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(chunks)))) as executor:
+            summaries = list(executor.map(lambda text: summarize(text, share, deadline_at), texts))
+        parts = []
+        for chunk, summary in zip(chunks, summaries):
+            _count('summaries')
+            if not summary:
+                # The model could not summarise it; keep the chunk's best passages
+                _count('summary_failures')
+                summary = fit_passages(chunk, share)
+            parts.append(summary.strip())
+        text = '\n\n'.join(parts)
+        passages = split_passages(text)
+        if count_tokens(text) <= budget or len(chunks) == 1:
+            break
+    return fit_passages(passages, budget)
+
+
+def build_evidence_text(description, sources=(), budget=None, summarize=None):
+    """
+    The description and OCR text to put in the judge prompt, within ``budget`` tokens.
+
+    ``sources`` is ``(label, text)`` per OCR'd file; ``summarize(text,
+    max_tokens, deadline_at)`` returns a summary or None (``deadline_at``
+    is a ``time.monotonic()`` value) and enables map-reduce.
+    """
+    budget = budget or token_budget()
+    description = description or ''
+    description_tokens = count_tokens(description)
+    passages = []
+    for label, text in sources:
+        passages.extend(split_passages(text, label, start=len(passages)))
+    ocr_tokens = sum(p.tokens for p in passages)
+    _count('prompts')
+    _count('input_tokens', description_tokens + ocr_tokens)
+
+    if description_tokens + ocr_tokens <= budget:
+        evidence_text = _join(description, render_passages(passages, passages) if passages else '')
+        _count('prompt_tokens', count_tokens(evidence_text))
+        return evidence_text
+
+    _count('trimmed')
+    # The submitter's own words come first, but may not take more than half
+    if description_tokens > budget // 2:
+        description = fit_passages(split_passages(description), budget // 2)
+        description_tokens = count_tokens(description)
+    signal_tokens = sum(p.tokens for p in passages if p.score > 0)
+    if summarize is not None and passages and signal_tokens > budget - description_tokens:
+        heading = '📝 **Summary of the extracted text:**'
+        extracted = map_reduce(passages, _remaining(budget, description, heading), summarize)
+    elif passages:
+        heading = '📄 **Extracted text (highest keyword signal kept):**'
+        extracted = fit_passages(passages, _remaining(budget, description, heading))
+    else:
+        extracted, heading = '', ''
+    evidence_text = _join(description, f'{heading}\n{extracted}' if extracted else '')
+    _count('prompt_tokens', count_tokens(evidence_text))
+    return evidence_text
+
+
+def _remaining(budget, description, heading):
+    return max(0, budget - count_tokens(_join(description, heading)))
+
+
+def _join(description, extracted):
+    if not extracted:
+        return description
+    return f'{description}\n\n---\n\n{extracted}'
+
+
+def ocr_sources(ocr_result):
+    """``(label, text)`` per successfully OCR'd file of a submission's OCR result."""
+    if not ocr_result or not ocr_result.get('success'):
+        return []
+    if 'results' in ocr_result:
+        return [(r.get('file_name'), r['extracted_text']) for r in ocr_result['results']
+                if r.get('success') and r.get('extracted_text')]
+    if ocr_result.get('extracted_text'):
+        return [(ocr_result.get('file_name'), ocr_result['extracted_text'])]
+    return []
@@ -0,0 +1,161 @@
+"""
+♻️ Bulk re-analysis of stored Evidence rows.
+
+Used by ``python manage.py reanalyze_evidence`` after the keyword taxonomy or
+the OCR settings change. Rows are streamed in primary-key order with
+``iterator(chunk_size=...)``, each batch is analysed on the shared OCR
+process pool and written back with one ``bulk_update``. After every batch
+the last primary key is written to a checkpoint file, so an interrupted run
+resumes where it stopped.
+"""
+import json
+import math
+import os
+import time
+
+from django.utils import timezone
+
+from . import ocr_pool, search
+from .models import ANALYSIS_FIELDS, OCR_FIELDS, Evidence
+
+
+def reanalyze_rows(rows, rerun_ocr):
+    """
+    Worker: recompute the analysis fields for ``(pk, image_name, text, confidence)`` rows.
+
+    Returns ``(pk, fields_or_None, error)`` per row; rows whose OCR fails
+    keep their stored values. Every other row is stamped with the current
+    taxonomy version, including rows without any text.
+    """
+    results = []
+    for pk, image_name, extracted_text, confidence_score in rows:
+        evidence = Evidence(
+            pk=pk,
+            image_evidence=image_name or None,
+            extracted_text=extracted_text,
+            confidence_score=confidence_score,
+        )
+        if rerun_ocr and image_name:
+            success, message, _ = evidence.extract_text_from_image()
+            if not success:
+                results.append((pk, None, message))
+                continue
+            fields = OCR_FIELDS
+        else:
+            evidence.analyze_extracted_content()
+            fields = ANALYSIS_FIELDS
+        results.append((pk, {name: getattr(evidence, name) for name in fields}, None))
+    return results
+
+
+def _failed_rows(job, exc):
+    rows, _ = job
+    return [(row[0], None, str(exc)) for row in rows]
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, state):
+    # Write then rename, so a crash mid-write never leaves a corrupt checkpoint
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _analyze_batch(batch, rerun_ocr, parallel):
+    rows = [(e.pk, e.image_evidence.name, e.extracted_text, e.confidence_score) for e in batch]
+    if not parallel:
+        return reanalyze_rows(rows, rerun_ocr)
+    # OCR is heavy, so one row per job balances best; keyword analysis is
+    # cheap, so rows go in one slice per worker to keep pickling overhead down
+    per_job = 1 if rerun_ocr else math.ceil(len(rows) / ocr_pool.max_workers())
+    jobs = [(rows[i:i + per_job], rerun_ocr) for i in range(0, len(rows), per_job)]
+    results = []
+    for job_results in ocr_pool.map_ordered(reanalyze_rows, jobs, _failed_rows):
+        results.extend(job_results)
+    return results
+
+
+def run_reanalysis(queryset, checkpoint_path, rerun_ocr=False, batch_size=100, chunk_size=500,
+                   parallel=True, restart=False, on_batch=None):
+    """
+    Re-analyse every row of ``queryset`` and return the final counters.
+
+    ``on_batch(state, batch_rows, batch_seconds)`` is called after each
+    batch is written, for progress reporting.
+    """
+    state = None if restart else load_checkpoint(checkpoint_path)
+    if state is None or state.get('rerun_ocr') != rerun_ocr:
+        state = {
+            'rerun_ocr': rerun_ocr,
+            'last_pk': 0,
+            'processed': 0,
+            'updated': 0,
+            'failed': 0,
+            'elapsed': 0.0,
+            'errors': [],
+            'started_at': timezone.now().isoformat(),
+        }
+    state['resumed_from'] = state['last_pk']
+    fields = OCR_FIELDS if rerun_ocr else ANALYSIS_FIELDS
+
+    # The blobs nobody here reads stay in the database
+    rows = (queryset.filter(pk__gt=state['last_pk'])
+            .defer('multiple_images_data', 'ai_judgment')
+            .order_by('pk')
+            .iterator(chunk_size=chunk_size))
+
+    # Batch timings include reading the rows, not just analysing and writing them
+    clock = {'mark': time.perf_counter()}
+
+    def flush(batch):
+        by_pk = {evidence.pk: evidence for evidence in batch}
+        changed = []
+        for pk, values, error in _analyze_batch(batch, rerun_ocr, parallel):
+            if values is None:
+                state['failed'] += 1
+                if len(state['errors']) < 20:
+                    state['errors'].append(f'#{pk}: {error}')
+                continue
+            evidence = by_pk[pk]
+            for name, value in values.items():
+                setattr(evidence, name, value)
+            changed.append(evidence)
+        if changed:
+            Evidence.objects.bulk_update(changed, fields, batch_size=batch_size)
+            # bulk_update bypasses save(), so keep the search index in step here
+            for evidence in changed:
+                search.index_evidence(evidence)
+        now = time.perf_counter()
+        seconds = now - clock['mark']
+        clock['mark'] = now
+        state['processed'] += len(batch)
+        state['updated'] += len(changed)
+        state['elapsed'] += seconds
+        state['last_pk'] = batch[-1].pk
+        save_checkpoint(checkpoint_path, state)
+        if on_batch:
+            on_batch(state, len(batch), seconds)
+
+    batch = []
+    for evidence in rows:
+        batch.append(evidence)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    # A finished run needs no checkpoint; the next run starts from the top
+    try:
+        os.remove(checkpoint_path)
+    except OSError:
+        pass
+    return state
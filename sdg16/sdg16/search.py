@@ -0,0 +1,191 @@
+"""
+🔎 Full-text search over submitted evidence.
+
+An SQLite FTS5 index (its own file, ``SEARCH_INDEX_PATH``) covers titles,
+descriptions, OCR text and combined multi-file OCR text. Documents are
+indexed at submission time and queries are ranked with BM25 (titles count
+most), return highlighted snippets and can be filtered by the keyword
+categories detected in the text (corruption, legal, ...).
+
+Each document has a key such as ``submission:3`` or ``evidence:12`` so the
+in-memory submissions and saved ``Evidence`` rows share one index.
+
+The index is secondary: a failed write (locked file, SQLite built without
+FTS5, ...) is logged and the submission or ``Evidence`` save goes on.
+"""
+import html
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+from . import keywords
+
+logger = logging.getLogger(__name__)
+
+# bm25 weights, in column order: title, description, extracted_text,
+# combined_extracted_text, categories (not searched directly)
+BM25_WEIGHTS = (10.0, 4.0, 1.0, 1.0, 0.0)
+SEARCH_COLUMNS = '{title description extracted_text combined_extracted_text}'
+
+_local = threading.local()
+
+
+def _connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(str(settings.SEARCH_INDEX_PATH), timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS evidence_fts USING fts5('
+            'doc_key UNINDEXED, title, description, extracted_text, '
+            'combined_extracted_text, categories, submitted_by UNINDEXED, '
+            "tokenize='porter unicode61')"
+        )
+        # doc_key -> FTS rowid, so updates and deletes never scan the index
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS evidence_docs ('
+            'doc_key TEXT PRIMARY KEY, fts_rowid INTEGER NOT NULL)'
+        )
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def enabled():
+    return getattr(settings, 'SEARCH_INDEX_ENABLED', True)
+
+
+def index_document(doc_key, title, description, submitted_by, extracted_text='', combined_extracted_text=''):
+    """Insert or replace one document in the index."""
+    if not enabled():
+        return
+    text = '\n'.join(filter(None, [title, description, extracted_text, combined_extracted_text]))
+    categories = ' '.join(keywords.scan(text).categories())
+    try:
+        conn = _connection()
+        with conn:
+            row = conn.execute('SELECT fts_rowid FROM evidence_docs WHERE doc_key = ?', (doc_key,)).fetchone()
+            if row:
+                conn.execute('DELETE FROM evidence_fts WHERE rowid = ?', row)
+            cursor = conn.execute(
+                'INSERT INTO evidence_fts (doc_key, title, description, extracted_text, '
+                'combined_extracted_text, categories, submitted_by) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (doc_key, title or '', description or '', extracted_text or '',
+                 combined_extracted_text or '', categories, submitted_by or '')
+            )
+            conn.execute(
+                'INSERT OR REPLACE INTO evidence_docs (doc_key, fts_rowid) VALUES (?, ?)',
+                (doc_key, cursor.lastrowid)
+            )
+    except sqlite3.Error:
+        logger.exception('Could not index %s for search', doc_key)
+
+
+def index_submission(evidence):
+    """Index an in-memory submission from ``views.temp_evidence_storage``."""
+    ocr_result = evidence.get('ocr_result') or {}
+    # The stored description has the OCR output stitched in; index the
+    # submitter's own words and the OCR text once each, in their own columns
+    index_document(
+        f"submission:{evidence['id']}",
+        evidence['title'],
+        evidence.get('user_description', evidence['description']),
+        evidence['submitted_by'],
+        extracted_text=ocr_result.get('extracted_text', ''),
+        combined_extracted_text=ocr_result.get('combined_text', ''),
+    )
+
+
+def index_evidence(evidence):
+    """Index a saved ``Evidence`` row."""
+    index_document(
+        f'evidence:{evidence.pk}',
+        evidence.title,
+        evidence.description,
+        evidence.submitted_by,
+        extracted_text=evidence.extracted_text,
+        combined_extracted_text=evidence.combined_extracted_text,
+    )
+
+
+def remove_source(source):
+    """Drop every document of one source, e.g. ``submission`` on clear."""
+    if not enabled():
+        return
+    prefix = f'{source}:'
+    try:
+        conn = _connection()
+        with conn:
+            conn.execute(
+                'DELETE FROM evidence_fts WHERE rowid IN '
+                '(SELECT fts_rowid FROM evidence_docs WHERE doc_key >= ? AND doc_key < ?)',
+                (prefix, prefix[:-1] + ';')
+            )
+            conn.execute(
+                'DELETE FROM evidence_docs WHERE doc_key >= ? AND doc_key < ?',
+                (prefix, prefix[:-1] + ';')
+            )
+    except sqlite3.Error:
+        logger.exception('Could not remove %s documents from the search index', source)
+
+
+def build_match_query(query, categories=()):
+    # Quote every token so user input can never be parsed as FTS5 syntax;
+    # the last token is a prefix match for search-as-you-type
+    tokens = re.findall(r'\w+', query or '')
+    parts = []
+    if tokens:
+        quoted = [f'"{token}"' for token in tokens]
+        quoted[-1] += '*'
+        parts.append(f"{SEARCH_COLUMNS} : ({' '.join(quoted)})")
+    for category in categories:
+        if category in keywords.get_matcher().taxonomy:
+            parts.append(f'categories : "{category}"')
+    return ' AND '.join(parts)
+
+
+def highlight(snippet):
+    # Escape the evidence text itself, then turn the match markers into <mark>
+    return html.escape(snippet).replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+def search(query, categories=(), limit=20, offset=0):
+    started = time.perf_counter()
+    match = build_match_query(query, categories)
+    if not match:
+        return {'results': [], 'total': 0, 'took_ms': 0.0}
+    conn = _connection()
+    rows = conn.execute(
+        'SELECT doc_key, title, submitted_by, categories, '
+        "snippet(evidence_fts, -1, char(2), char(3), '…', 16), "
+        f'bm25(evidence_fts, {", ".join(str(w) for w in BM25_WEIGHTS)}) AS score '
+        'FROM evidence_fts WHERE evidence_fts MATCH ? '
+        'ORDER BY score LIMIT ? OFFSET ?',
+        (match, limit, offset)
+    ).fetchall()
+    total = conn.execute(
+        'SELECT count(*) FROM evidence_fts WHERE evidence_fts MATCH ?', (match,)
+    ).fetchone()[0]
+    results = []
+    for doc_key, title, submitted_by, doc_categories, snippet, score in rows:
+        source, _, doc_id = doc_key.partition(':')
+        results.append({
+            'doc_key': doc_key,
+            'source': source,
+            'id': int(doc_id),
+            'title': title,
+            'submitted_by': submitted_by,
+            'categories': doc_categories.split(),
+            'snippet': highlight(snippet),
+            # bm25() is lower-is-better; flip it so higher means more relevant
+            'score': round(-score, 6),
+        })
+    return {
+        'results': results,
+        'total': total,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
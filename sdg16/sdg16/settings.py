@@ -1,129 +1,280 @@
-"""
-Django settings for sdg16 project.
-
-Generated by 'django-admin startproject' using Django 5.1.4.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.1/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/5.1/ref/settings/
-"""
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-pstrubq!0xgsrkwrffk5ri%gyd0%so3*!+a07!-ilnvo(oi%n_'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    # 'sdg16',  # Commented out since we're not using database models
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'sdg16.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'sdg16.wsgi.application'
-
-
-# Database
-# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-
-# Password validation
-# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.1/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.1/howto/static-files/
-
-STATIC_URL = 'static/'
-
-# Media files configuration for image evidence
-import os
-MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+"""
+Django settings for sdg16 project.
+
+Generated by 'django-admin startproject' using Django 5.1.4.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-pstrubq!0xgsrkwrffk5ri%gyd0%so3*!+a07!-ilnvo(oi%n_'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sdg16',  # OCR job queue lives in the database
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'sdg16.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'sdg16.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = 'static/'
+
+# Media files configuration for image evidence
+import os
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# OCR Configuration
+# 'process' runs multi-file OCR on a shared, bounded process pool;
+# 'serial' keeps every file in the request thread.
+OCR_EXECUTION_MODE = 'process'
+OCR_POOL_MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Threads the async views hand blocking work to (uploads, OCR, database);
+# None means twice OCR_POOL_MAX_WORKERS
+OCR_ASYNC_THREADS = None
+OCR_TESSERACT_CONFIG = ''
+OCR_LANG = 'eng'
+
+# OCR backend: 'pytesseract' spawns the tesseract binary per call;
+# 'tesserocr' reuses a pool of recognizers that load traineddata once.
+OCR_BACKEND = 'tesserocr'
+OCR_TESSEROCR_POOL_SIZE = 2
+OCR_TESSDATA_PATH = None
+
+# Two-tier OCR: a fast grayscale pass first, escalating to full enhancement
+# and alternate page-segmentation modes only below the confidence threshold
+OCR_TIERED = True
+OCR_CONFIDENCE_THRESHOLD = 60.0
+OCR_FAST_CONFIG = '--psm 6'
+OCR_HEAVY_PSMS = [3, 4]
+
+# Preprocessing: 'numpy' fuses contrast/sharpness/brightness on one grayscale
+# array; 'pil' is the original ImageEnhance chain.
+# Denoise strategies: 'none', 'median', 'mean'.
+OCR_PREPROCESS_ENGINE = 'numpy'
+OCR_DENOISE_STRATEGY = 'median'
+OCR_BINARIZE = False
+
+# Adaptive stage before enhancement: crop margins, downsample oversized
+# photos so body text lands near OCR_TARGET_DPI, skip enhancement for clean scans
+OCR_ADAPTIVE_PREPROCESSING = True
+OCR_TARGET_DPI = 300
+OCR_ASSUMED_LINE_POINTS = 12
+OCR_MAX_MEGAPIXELS = 8
+
+# Multi-page evidence: TIFF frames and PDF pages are OCR'd one page at a time.
+# PDFs are rasterised with poppler's pdftoppm.
+OCR_MAX_PAGES = 50
+OCR_PDF_DPI = 300
+OCR_PDFTOPPM_PATH = 'pdftoppm'
+OCR_PDFINFO_PATH = 'pdfinfo'
+
+# Asynchronous OCR jobs: submissions are queued in the database and processed
+# by background workers (in-process threads and/or `manage.py ocr_worker`).
+# Needs the OCRJob table: run `python manage.py migrate` after upgrading.
+# A running job refreshes its heartbeat every OCR_JOB_HEARTBEAT_SECONDS, even
+# in the middle of a long PDF; one without a heartbeat for OCR_JOB_STALE_SECONDS
+# is requeued. Workers look for such jobs every OCR_JOB_REQUEUE_INTERVAL seconds.
+OCR_ASYNC_JOBS = True
+OCR_JOB_INPROCESS_WORKERS = 2
+OCR_JOB_POLL_INTERVAL = 1.0
+OCR_JOB_HEARTBEAT_SECONDS = 30
+OCR_JOB_STALE_SECONDS = 600
+OCR_JOB_REQUEUE_INTERVAL = 60
+
+# OCR result cache: in-memory LRU tier plus a SQLite tier that survives restarts
+OCR_CACHE_ENABLED = True
+OCR_CACHE_PATH = BASE_DIR / 'ocr_cache.sqlite3'
+OCR_CACHE_MEMORY_MAX_BYTES = 32 * 1024 * 1024
+OCR_CACHE_DISK_MAX_BYTES = 512 * 1024 * 1024
+
+# Full-text search (SQLite FTS5) over titles, descriptions and OCR text
+SEARCH_INDEX_ENABLED = True
+SEARCH_INDEX_PATH = BASE_DIR / 'search_index.sqlite3'
+
+# AI judge output cache, keyed on model, system prompt and normalized evidence
+# fields; entries expire after JUDGMENT_CACHE_TTL seconds
+JUDGMENT_CACHE_ENABLED = True
+JUDGMENT_CACHE_PATH = BASE_DIR / 'judgment_cache.sqlite3'
+JUDGMENT_CACHE_TTL = 7 * 24 * 3600
+JUDGMENT_CACHE_MEMORY_MAX_ENTRIES = 256
+JUDGMENT_CACHE_DISK_MAX_BYTES = 64 * 1024 * 1024
+
+# Concurrent requests for the same judgment share one generation; worker
+# processes coordinate through lock files and records in JUDGMENT_FLIGHT_DIR
+JUDGMENT_COALESCE_ENABLED = True
+JUDGMENT_FLIGHT_DIR = BASE_DIR / 'judgment_flights'
+
+# Judgments start in the background as soon as a submission's OCR is done,
+# so opening one right after submitting finds it finished or in flight. At
+# most JUDGMENT_SPECULATIVE_MAX_QUEUED run or wait at once; beyond that a
+# judgment is generated on demand. Speculative and requested judgments alike
+# wait up to JUDGMENT_OCR_WAIT_SECONDS for a submission's queued OCR job.
+JUDGMENT_SPECULATIVE_ENABLED = True
+JUDGMENT_SPECULATIVE_MAX_QUEUED = 4
+JUDGMENT_OCR_WAIT_SECONDS = 300
+
+# At most this many judgments run on the model at once; the rest queue by
+# urgency (critical, high, standard) and gain one level per aging interval
+JUDGE_MAX_CONCURRENCY = 2
+JUDGE_PRIORITY_AGING_SECONDS = 30
+
+# Evidence text in the judge prompt is cut to this many tokens, keeping the
+# passages with the most keyword hits; when those alone overflow, chunks of
+# JUDGE_MAP_CHUNK_TOKENS are summarised first. JUDGE_TOKENIZER_PATH may
+# point at a tokenizer.json for exact counts (needs the tokenizers package).
+# Under ASGI prompts are built on JUDGE_PROMPT_THREADS threads of their own.
+# One prompt makes at most JUDGE_MAP_MAX_CALLS summary calls, all within
+# JUDGE_MAP_DEADLINE_SECONDS, at a priority below the judgment's own.
+JUDGE_PROMPT_TOKEN_BUDGET = 1500
+JUDGE_MAP_CHUNK_TOKENS = 1000
+JUDGE_MAP_MAX_CALLS = 8
+JUDGE_MAP_DEADLINE_SECONDS = 90
+JUDGE_TOKENIZER_PATH = None
+JUDGE_PROMPT_THREADS = 4
+
+# LLM client: connect timeout, longest silence between streamed chunks and
+# overall deadline per call (seconds). The circuit breaker opens after
+# LLM_BREAKER_FAILURE_THRESHOLD consecutive failures and serves the fallback
+# at once; a background probe closes it as soon as ollama answers again.
+LLM_CONNECT_TIMEOUT = 2
+LLM_READ_TIMEOUT = 30
+LLM_DEADLINE_SECONDS = 180
+LLM_SUMMARY_DEADLINE_SECONDS = 60
+LLM_BREAKER_FAILURE_THRESHOLD = 3
+LLM_BREAKER_RESET_SECONDS = 30
+LLM_HEALTH_PROBE_INTERVAL = 10
+LLM_HEALTH_PROBE_TIMEOUT = 2
+
+# LLM backend: 'ollama' (server at LLM_HOST, OLLAMA_HOST when None) or 'stub',
+# an in-process stand-in for tests and benchmarks that answers without a model.
+# Ollama keeps the model loaded for LLM_KEEP_ALIVE after each call; LLM_OPTIONS
+# are sent with every call (callers may override single options).
+LLM_BACKEND = 'ollama'
+LLM_MODEL = 'llama3.2:1b'
+LLM_HOST = None
+LLM_KEEP_ALIVE = '30m'
+LLM_OPTIONS = {'num_ctx': 4096, 'num_predict': 1024}
+# Simulated latency of the stub backend (seconds)
+LLM_STUB_FIRST_TOKEN_SECONDS = 0
+LLM_STUB_TOKEN_SECONDS = 0
+
+# Near-duplicate detection: upload SHA-256, image dHash and OCR-text SimHash
+# fingerprints. Distances are in bits out of 64; matches up to 3 bits are
+# always found. OCR results are reused only for an identical file; judgments
+# only for matching OCR text, and only when DEDUP_REUSE_JUDGMENT is on.
+DEDUP_ENABLED = True
+DEDUP_INDEX_PATH = BASE_DIR / 'dedup_index.sqlite3'
+DEDUP_IMAGE_MAX_DISTANCE = 3
+DEDUP_TEXT_MAX_DISTANCE = 3
+DEDUP_REUSE_OCR = True
+DEDUP_REUSE_JUDGMENT = False
+
+# Keyword taxonomy used by every evidence analyzer. Edits to the file are
+# picked up by running workers; the mtime is checked at most this often (seconds)
+KEYWORD_TAXONOMY_PATH = BASE_DIR / 'sdg16' / 'keyword_taxonomy.json'
+KEYWORD_TAXONOMY_RELOAD_INTERVAL = 2.0
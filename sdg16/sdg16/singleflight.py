@@ -0,0 +1,422 @@
+"""
+🛫 Single-flight coalescing of identical judgment generations.
+
+When a case is shared, many reviewers open its judgment at the same moment
+and each request used to start its own identical generation on the one
+local model. Requests for the same key now attach to one in-flight
+generation (a ``Flight``): the first request starts it, every request
+(including the first) subscribes and receives the same ``(kind, text)``
+chunks from the beginning, as they arrive. The generation runs as long as
+anyone is still reading and is cancelled once every subscriber has gone.
+
+Across processes (several server workers) an exclusive ``flock`` on
+``<JUDGMENT_FLIGHT_DIR>/<key>.lock`` elects one leader. The leader appends
+every chunk to ``<key>.jsonl``; a process that finds the lock taken tails
+that record instead of calling the model. A leader that finished before
+the record could be read is covered by the persistent judgment cache,
+which every flight consults once it holds the lock.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# How often a follower in another process checks the leader's record
+POLL_INTERVAL = 0.05
+INTERRUPTED = '\n\n⚠️ The judgment generation was interrupted. Please request it again.'
+
+_flights = {}
+_lock = threading.Lock()
+_stats = {
+    'flights': 0,
+    'coalesced': 0,
+    'remote_follows': 0,
+    'cancelled': 0,
+}
+
+
+def enabled():
+    return getattr(settings, 'JUDGMENT_COALESCE_ENABLED', True)
+
+
+def stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot['in_flight'] = len(_flights)
+    return snapshot
+
+
+class Flight:
+    """One generation and the chunks it has produced so far."""
+
+    def __init__(self, key):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.cancelled = False
+        self.subscribers = 0
+        self.task = None
+        self.cond = threading.Condition()
+        # (loop, asyncio.Event) per async subscriber
+        self._events = set()
+
+    def _wake(self):
+        for loop, event in list(self._events):
+            loop.call_soon_threadsafe(event.set)
+
+    def publish(self, kind, text):
+        with self.cond:
+            self.chunks.append((kind, text))
+            self.cond.notify_all()
+            self._wake()
+
+    def finish(self):
+        with _lock:
+            if _flights.get(self.key) is self:
+                del _flights[self.key]
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+            self._wake()
+
+    def leave(self):
+        with _lock:
+            self.subscribers -= 1
+            if self.subscribers > 0 or self.done:
+                return
+            # Nobody is reading any more: stop generating, and let the next
+            # request start afresh instead of joining a dying flight
+            self.cancelled = True
+            _stats['cancelled'] += 1
+            if _flights.get(self.key) is self:
+                del _flights[self.key]
+        task = self.task
+        if task is not None:
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    def follow(self):
+        index = 0
+        try:
+            while True:
+                with self.cond:
+                    while index >= len(self.chunks) and not self.done:
+                        self.cond.wait()
+                    new = self.chunks[index:]
+                    done = self.done
+                index += len(new)
+                yield from new
+                if done:
+                    return
+        finally:
+            self.leave()
+
+    async def afollow(self):
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self.cond:
+            self._events.add(entry)
+        index = 0
+        try:
+            while True:
+                with self.cond:
+                    new = self.chunks[index:]
+                    done = self.done
+                    if not new and not done:
+                        entry[1].clear()
+                index += len(new)
+                for chunk in new:
+                    yield chunk
+                if done and not new:
+                    return
+                if not new:
+                    await entry[1].wait()
+        finally:
+            with self.cond:
+                self._events.discard(entry)
+            self.leave()
+
+
+def _join(key):
+    with _lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = Flight(key)
+            _stats['flights'] += 1
+        else:
+            _stats['coalesced'] += 1
+        flight.subscribers += 1
+    return flight, leader
+
+
+# -- across processes ----------------------------------------------------------
+
+def _paths(key):
+    directory = Path(getattr(settings, 'JUDGMENT_FLIGHT_DIR', Path(settings.BASE_DIR) / 'judgment_flights'))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'{key}.lock', directory / f'{key}.jsonl'
+
+
+class ProcessLock:
+    """Non-blocking exclusive ``flock``; always granted where fcntl is missing."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def acquire(self):
+        if not FCNTL_AVAILABLE:
+            return True
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+            try:
+                current = os.stat(self.path).st_ino
+            except OSError:
+                current = None
+            if current == os.fstat(fd).st_ino:
+                self.fd = fd
+                return True
+            # The previous holder removed the file after we opened it; lock the new one
+            os.close(fd)
+
+    def release(self, remove=False):
+        if self.fd is not None:
+            if remove:
+                # Unlink while still holding it, so no lock files pile up per key
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+
+
+class RecordWriter:
+    def __init__(self, path):
+        self.path = path
+        # A fresh file, never one a crashed leader left behind
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, item):
+        self.file.write(json.dumps(item) + '\n')
+        self.file.flush()
+
+    def close(self, complete):
+        self.write({'done': True, 'complete': complete})
+        # Readers that already opened the record keep reading it
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        self.file.close()
+
+
+class RecordReader:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.buffer = ''
+
+    def read(self):
+        """Complete items appended since the last call."""
+        if self.file is None:
+            try:
+                self.file = open(self.path, encoding='utf-8')
+            except OSError:
+                return []
+        self.buffer += self.file.read()
+        *lines, self.buffer = self.buffer.split('\n')
+        return [json.loads(line) for line in lines if line]
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def _poll_record(flight, reader, lock_path):
+    """
+    Publish what the leader in another process has recorded.
+
+    Returns True when the flight is complete, False when that leader is gone
+    and this process should take over, and None to keep polling.
+    """
+    probe = ProcessLock(lock_path)
+    leader_gone = probe.acquire()
+    if leader_gone:
+        probe.release(remove=True)
+    # Read after the lock check, so everything a finished leader wrote is seen
+    for item in reader.read():
+        if item.get('done'):
+            if not item.get('complete'):
+                flight.publish('error', INTERRUPTED)
+            return True
+        flight.publish(item['kind'], item['text'])
+    if not leader_gone:
+        return None
+    if flight.chunks:
+        # It died part-way through; don't stitch two generations together
+        flight.publish('error', INTERRUPTED)
+        return True
+    return False
+
+
+def _run_flight(flight, make_stream, lookup, on_complete):
+    """Thread body: fill ``flight`` from this process's generation or another process's record."""
+    lock_path, record_path = _paths(flight.key)
+    try:
+        while not flight.cancelled:
+            lock = ProcessLock(lock_path)
+            if not lock.acquire():
+                with _lock:
+                    _stats['remote_follows'] += 1
+                reader = RecordReader(record_path)
+                try:
+                    status = None
+                    while status is None and not flight.cancelled:
+                        status = _poll_record(flight, reader, lock_path)
+                        if status is None:
+                            time.sleep(POLL_INTERVAL)
+                finally:
+                    reader.close()
+                if status:
+                    return
+                continue
+            try:
+                # Another process may have finished it while we waited for the lock
+                judgment = lookup() if lookup else None
+                if judgment is not None:
+                    flight.publish('judgment', judgment)
+                    return
+                record = RecordWriter(record_path)
+                stream = make_stream()
+                complete = False
+                try:
+                    for kind, text in stream:
+                        if flight.cancelled:
+                            return
+                        record.write({'kind': kind, 'text': text})
+                        flight.publish(kind, text)
+                    complete = True
+                finally:
+                    stream.close()
+                    record.close(complete)
+                if on_complete:
+                    on_complete(list(flight.chunks))
+                return
+            finally:
+                lock.release(remove=True)
+    except Exception as e:
+        flight.publish('error', f'\n\n❌ AI Judge analysis failed: {str(e)}')
+    finally:
+        flight.finish()
+
+
+async def _arun_flight(flight, make_stream, lookup, on_complete):
+    """Async ``_run_flight``, run as a task on the event loop of the first request."""
+    lock_path, record_path = _paths(flight.key)
+    try:
+        while not flight.cancelled:
+            lock = ProcessLock(lock_path)
+            if not lock.acquire():
+                with _lock:
+                    _stats['remote_follows'] += 1
+                reader = RecordReader(record_path)
+                try:
+                    status = None
+                    while status is None and not flight.cancelled:
+                        status = _poll_record(flight, reader, lock_path)
+                        if status is None:
+                            await asyncio.sleep(POLL_INTERVAL)
+                finally:
+                    reader.close()
+                if status:
+                    return
+                continue
+            try:
+                judgment = await sync_to_async(lookup)() if lookup else None
+                if judgment is not None:
+                    flight.publish('judgment', judgment)
+                    return
+                record = RecordWriter(record_path)
+                stream = make_stream()
+                complete = False
+                try:
+                    async for kind, text in stream:
+                        if flight.cancelled:
+                            return
+                        record.write({'kind': kind, 'text': text})
+                        flight.publish(kind, text)
+                    complete = True
+                finally:
+                    await stream.aclose()
+                    record.close(complete)
+                if on_complete:
+                    await sync_to_async(on_complete)(list(flight.chunks))
+                return
+            finally:
+                lock.release(remove=True)
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        flight.publish('error', f'\n\n❌ AI Judge analysis failed: {str(e)}')
+    finally:
+        flight.finish()
+
+
+# -- public API ----------------------------------------------------------------
+
+def coalesce(key, make_stream, lookup=None, on_complete=None):
+    """
+    Chunks of the one generation for ``key``, started by the first caller.
+
+    ``make_stream()`` returns the ``(kind, text)`` generator to run when no
+    other request or process is already generating ``key``; ``lookup()``
+    returns a finished result from the persistent cache, or None;
+    ``on_complete(chunks)`` runs once, in the generating process, before
+    anyone else can take the key over.
+    """
+    flight, leader = _join(key)
+    if leader:
+        threading.Thread(
+            target=_run_flight, args=(flight, make_stream, lookup, on_complete),
+            name=f'judgment-flight-{key[:8]}', daemon=True
+        ).start()
+    return flight.follow()
+
+
+async def acoalesce(key, make_stream, lookup=None, on_complete=None):
+    """
+    Async ``coalesce``; ``make_stream()`` returns an async generator of chunks.
+
+    The generation runs as a task on the first caller's event loop, and
+    requests on other loops may join it, so only call this on a loop that
+    outlives any one request (the ASGI server's). A loop made for a single
+    call, such as ``async_to_sync`` under WSGI, must use ``coalesce``.
+    """
+    flight, leader = _join(key)
+    if leader:
+        flight.task = asyncio.get_running_loop().create_task(
+            _arun_flight(flight, make_stream, lookup, on_complete)
+        )
+    async for chunk in flight.afollow():
+        yield chunk
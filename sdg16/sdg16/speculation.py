@@ -0,0 +1,86 @@
+"""
+🔮 Speculative background work, capped.
+
+Users almost always open the judgment right after submitting, so the
+submission view starts it in the background instead of waiting for
+``/judgment/<id>/``. The request then finds the finished judgment in the
+cache, or attaches to the generation still in flight (see
+``singleflight``).
+
+At most ``JUDGMENT_SPECULATIVE_MAX_QUEUED`` tasks are pending or running at
+once; anything beyond that is simply not speculated and runs on demand as
+before. A key that is already pending is not scheduled twice.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+_stats = {
+    'scheduled': 0,
+    'completed': 0,
+    'failed': 0,
+    'skipped_full': 0,
+    'skipped_duplicate': 0,
+}
+
+
+def enabled():
+    return getattr(settings, 'JUDGMENT_SPECULATIVE_ENABLED', True)
+
+
+def max_queued():
+    return getattr(settings, 'JUDGMENT_SPECULATIVE_MAX_QUEUED', 4)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # One thread per admitted task: they mostly wait on OCR jobs or model slots
+        _executor = ThreadPoolExecutor(max_workers=max(1, max_queued()), thread_name_prefix='speculative')
+    return _executor
+
+
+def submit(key, func, *args):
+    """Run ``func(*args)`` in the background; False when ``key`` is pending or the queue is full."""
+    with _lock:
+        if key in _pending:
+            _stats['skipped_duplicate'] += 1
+            return False
+        if len(_pending) >= max_queued():
+            _stats['skipped_full'] += 1
+            return False
+        _pending.add(key)
+        _stats['scheduled'] += 1
+        executor = _get_executor()
+    executor.submit(_run, key, func, args)
+    return True
+
+
+def _run(key, func, args):
+    try:
+        func(*args)
+        outcome = 'completed'
+    except Exception:
+        logger.exception('Speculative task %s failed', key)
+        outcome = 'failed'
+    finally:
+        close_old_connections()
+    with _lock:
+        _pending.discard(key)
+        _stats[outcome] += 1
+
+
+def stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot['pending'] = len(_pending)
+    snapshot['max_queued'] = max_queued()
+    return snapshot
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from sdg16 import jobs, views
+from sdg16.models import OCRJob
+
+
+def fake_ocr(stored, effect):
+    return {'success': True, 'extracted_text': 'Receipt', 'word_count': 1, 'file_name': stored.name}
+
+
+class JobTestMixin:
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        jobs._last_requeue = None
+
+    def enqueue(self, name='receipt.png'):
+        return jobs.enqueue_ocr_job([SimpleUploadedFile(name, b'image bytes', 'image/png')], 'submission')
+
+    def make_stale(self, job):
+        OCRJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=700))
+
+
+@override_settings(
+    OCR_JOB_INPROCESS_WORKERS=0,
+    OCR_JOB_STALE_SECONDS=600,
+    OCR_JOB_REQUEUE_INTERVAL=0,
+    OCR_JOB_HEARTBEAT_SECONDS=60,
+)
+class JobClaimTests(JobTestMixin, TestCase):
+    def test_each_job_is_claimed_once(self):
+        first, second = self.enqueue('a.png'), self.enqueue('b.png')
+        claimed = [jobs.claim_next_job('w1'), jobs.claim_next_job('w2')]
+        self.assertEqual([job.pk for job in claimed], [first.pk, second.pk])
+        self.assertEqual([job.status for job in claimed], ['processing', 'processing'])
+        self.assertNotEqual(claimed[0].claim_token, claimed[1].claim_token)
+        self.assertIsNotNone(claimed[0].heartbeat_at)
+        self.assertIsNone(jobs.claim_next_job('w3'))
+
+    def test_job_with_fresh_heartbeat_is_not_requeued(self):
+        self.enqueue()
+        jobs.claim_next_job('w1')
+        self.assertIsNone(jobs.claim_next_job('w2'))
+
+    def test_stale_job_is_requeued_with_a_new_claim(self):
+        self.enqueue()
+        first = jobs.claim_next_job('w1')
+        self.make_stale(first)
+        second = jobs.claim_next_job('w2')
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.worker, 'w2')
+        self.assertNotEqual(second.claim_token, first.claim_token)
+        # The first run's writes no longer land
+        self.assertFalse(jobs._save_claimed(first, processed_files=1))
+        self.assertTrue(jobs._save_claimed(second, processed_files=1))
+
+    @override_settings(OCR_JOB_REQUEUE_INTERVAL=60)
+    def test_stale_jobs_are_swept_at_most_once_per_interval(self):
+        self.enqueue()
+        first = jobs.claim_next_job('w1')
+        self.make_stale(first)
+        jobs._last_requeue = time.monotonic()
+        self.assertIsNone(jobs.claim_next_job('w2'))
+        jobs._last_requeue = None
+        self.assertEqual(jobs.claim_next_job('w2').pk, first.pk)
+
+    def test_superseded_run_leaves_uploads_to_the_new_claim(self):
+        self.enqueue()
+        first = jobs.claim_next_job('w1')
+        self.make_stale(first)
+        second = jobs.claim_next_job('w2')
+        path = second.files[0]['path']
+        with mock.patch.object(views, 'ocr_upload_file', fake_ocr):
+            jobs.run_job(first)
+            self.assertTrue(default_storage.exists(path))
+            self.assertEqual(OCRJob.objects.get(pk=first.pk).status, 'processing')
+            jobs.run_job(second)
+        job = OCRJob.objects.get(pk=second.pk)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.result['extracted_text'], 'Receipt')
+        self.assertFalse(default_storage.exists(path))
+
+
+@override_settings(
+    OCR_JOB_INPROCESS_WORKERS=0,
+    OCR_JOB_REQUEUE_INTERVAL=0,
+    OCR_JOB_HEARTBEAT_SECONDS=0.05,
+)
+class JobHeartbeatTests(JobTestMixin, TransactionTestCase):
+    def test_heartbeat_advances_while_a_file_is_processed(self):
+        self.enqueue()
+        job = jobs.claim_next_job('w1')
+        claimed_at = job.heartbeat_at
+        beats = []
+
+        def slow_ocr(stored, effect):
+            time.sleep(0.3)
+            beats.append(OCRJob.objects.get(pk=job.pk).heartbeat_at)
+            return fake_ocr(stored, effect)
+
+        with mock.patch.object(views, 'ocr_upload_file', slow_ocr):
+            jobs.run_job(job)
+        self.assertGreater(beats[0], claimed_at)
+        self.assertEqual(OCRJob.objects.get(pk=job.pk).status, 'completed')
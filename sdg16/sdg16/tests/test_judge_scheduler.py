@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from sdg16 import judge_scheduler
+from sdg16.judge_scheduler import JudgmentScheduler
+
+
+class SchedulerOrderTests(SimpleTestCase):
+    def queue_waiters(self, scheduler, priorities, pause=0.0):
+        """Start one thread per priority, in order; each records its grant and releases at once."""
+        granted = []
+        threads = []
+        for priority in priorities:
+            def wait(priority=priority):
+                scheduler.acquire(priority)
+                granted.append(priority)
+                scheduler.release()
+            thread = threading.Thread(target=wait)
+            thread.start()
+            threads.append(thread)
+            # Enqueue strictly one after another
+            while scheduler.queued < len(threads):
+                time.sleep(0.001)
+            time.sleep(pause)
+        return granted, threads
+
+    def test_waiters_are_served_by_urgency_then_arrival(self):
+        scheduler = JudgmentScheduler(1, aging_seconds=3600)
+        scheduler.acquire()
+        granted, threads = self.queue_waiters(
+            scheduler, ['background', 'standard', 'critical', 'high', 'standard']
+        )
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(granted, ['critical', 'high', 'standard', 'standard', 'background'])
+        self.assertEqual(scheduler.snapshot()['active'], 0)
+
+    def test_aging_lets_a_long_wait_overtake_urgency(self):
+        scheduler = JudgmentScheduler(1, aging_seconds=0.02)
+        scheduler.acquire()
+        # The standard waiter has waited longer than two aging steps when the critical one arrives
+        granted, threads = self.queue_waiters(scheduler, ['standard', 'critical'], pause=0.1)
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(granted, ['standard', 'critical'])
+
+    def test_concurrency_cap_holds(self):
+        scheduler = JudgmentScheduler(2, aging_seconds=30)
+
+        def work():
+            scheduler.acquire()
+            time.sleep(0.01)
+            scheduler.release()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = scheduler.snapshot()
+        self.assertEqual(snapshot['max_active'], 2)
+        self.assertEqual(snapshot['granted']['standard'], 8)
+
+    def test_timeout_leaves_the_queue(self):
+        scheduler = JudgmentScheduler(1, aging_seconds=30)
+        scheduler.acquire()
+        with self.assertRaises(TimeoutError):
+            scheduler.acquire('critical', timeout=0.01)
+        snapshot = scheduler.snapshot()
+        self.assertEqual(snapshot['queue_depth'], 0)
+        self.assertEqual(snapshot['abandoned'], 1)
+        scheduler.release()
+        # The abandoned waiter never receives the freed slot
+        scheduler.acquire(timeout=0)
+        self.assertEqual(scheduler.snapshot()['active'], 1)
+
+    def test_cancelled_coroutine_leaves_the_queue(self):
+        scheduler = JudgmentScheduler(1, aging_seconds=30)
+
+        async def scenario():
+            await scheduler.aacquire()
+            waiter = asyncio.ensure_future(scheduler.aacquire('high'))
+            await asyncio.sleep(0)
+            self.assertEqual(scheduler.queued, 1)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            scheduler.release()
+
+        asyncio.run(scenario())
+        snapshot = scheduler.snapshot()
+        self.assertEqual((snapshot['active'], snapshot['queue_depth']), (0, 0))
+
+    def test_lower_priority(self):
+        self.assertEqual(
+            [judge_scheduler.lower_priority(p) for p in ('critical', 'high', 'standard', 'background', 'bogus')],
+            ['high', 'standard', 'background', 'background', 'background'],
+        )
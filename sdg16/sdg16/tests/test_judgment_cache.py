@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from sdg16 import judgment_cache
+from sdg16.judgment_cache import JudgmentCache
+from sdg16.models import Evidence
+
+SYSTEM_PROMPT = 'You are an SDG 16 judge.'
+
+
+class CacheKeyTests(SimpleTestCase):
+    def key(self, model='llama3.2:1b', system_prompt=SYSTEM_PROMPT, title='Land office bribes',
+            description='Officials demanded cash for permits.', submitted_by='Amina'):
+        return judgment_cache.cache_key(model, system_prompt, title, description, submitted_by)
+
+    def test_whitespace_and_unicode_forms_share_a_key(self):
+        self.assertEqual(
+            self.key(),
+            self.key(title='  Land of\ufb01ce   bribes\n', description='Officials demanded cash\tfor permits.'),
+        )
+
+    def test_model_prompt_and_content_change_the_key(self):
+        key = self.key()
+        for changed in ({'model': 'stub:llama3.2:1b'}, {'system_prompt': SYSTEM_PROMPT + ' Be brief.'},
+                        {'description': 'Officials demanded cash for licences.'}, {'submitted_by': 'Omar'}):
+            with self.subTest(**changed):
+                self.assertNotEqual(self.key(**changed), key)
+
+
+class JudgmentCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'judgment_cache.sqlite3')
+
+    def make_cache(self, ttl=3600, memory_max_entries=16):
+        return JudgmentCache(self.path, ttl, memory_max_entries, 1024 * 1024)
+
+    def test_invalidate_by_ref_drops_both_tiers(self):
+        cache = self.make_cache()
+        cache.put('a', 'Judgment A', ref='evidence:1')
+        cache.put('b', 'Judgment B', ref='evidence:2')
+        cache.invalidate(ref='evidence:1')
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(self.make_cache().get('a'))
+        self.assertEqual(cache.get('b'), 'Judgment B')
+
+    def test_invalidate_single_key(self):
+        cache = self.make_cache()
+        cache.put('a', 'Judgment A', ref='evidence:1')
+        cache.invalidate(key='a')
+        self.assertIsNone(self.make_cache().get('a'))
+
+    def test_entries_expire_after_ttl(self):
+        cache = self.make_cache(ttl=60)
+        cache.put('a', 'Judgment A')
+        with mock.patch.object(judgment_cache.time, 'time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.snapshot()['expired'], 1)
+
+    def test_disk_tier_serves_entries_evicted_from_memory(self):
+        cache = self.make_cache(memory_max_entries=1)
+        cache.put('a', 'Judgment A')
+        cache.put('b', 'Judgment B')
+        self.assertEqual(cache.get('a'), 'Judgment A')
+        self.assertEqual(cache.snapshot()['disk_hits'], 1)
+
+
+@override_settings(SEARCH_INDEX_ENABLED=False)
+class EvidenceInvalidationTests(TestCase):
+    def setUp(self):
+        self.cache = JudgmentCache(None, None, 16, 0)
+        self.enterContext(mock.patch.object(judgment_cache, '_cache', self.cache))
+        self.evidence = Evidence.objects.create(
+            title='Land office bribes', description='Officials demanded cash.', submitted_by='Amina',
+            ai_judgment='Judged',
+        )
+        self.evidence = Evidence.objects.get(pk=self.evidence.pk)
+        self.cache.put('k', 'Judged', ref=f'evidence:{self.evidence.pk}')
+
+    def test_editing_a_judged_field_drops_the_judgment(self):
+        self.evidence.description = 'Officials demanded cash for permits.'
+        self.evidence.save()
+        self.assertIsNone(self.cache.get('k'))
+        self.assertEqual(Evidence.objects.get(pk=self.evidence.pk).ai_judgment, '')
+
+    def test_other_edits_keep_the_judgment(self):
+        self.evidence.processing_status = 'completed'
+        self.evidence.save()
+        self.assertEqual(self.cache.get('k'), 'Judged')
+        self.assertEqual(Evidence.objects.get(pk=self.evidence.pk).ai_judgment, 'Judged')
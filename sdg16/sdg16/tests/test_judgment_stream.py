@@ -0,0 +1,101 @@
+import json
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client, SimpleTestCase, override_settings
+
+from sdg16 import judgment_cache, llm_client, singleflight, views
+from sdg16.judgment_cache import JudgmentCache
+
+
+def sse_events(body):
+    return [json.loads(line[len('data: '):]) for line in body.split('\n') if line.startswith('data: ')]
+
+
+def event_text(events):
+    return ''.join(event.get('content', '') for event in events)
+
+
+@override_settings(
+    LLM_BACKEND='stub',
+    LLM_HEALTH_PROBE_INTERVAL=0,
+    LLM_STUB_FIRST_TOKEN_SECONDS=0,
+    LLM_STUB_TOKEN_SECONDS=0,
+    SEARCH_INDEX_ENABLED=False,
+    DEDUP_ENABLED=False,
+    JUDGMENT_SPECULATIVE_ENABLED=False,
+)
+class JudgmentStreamTests(SimpleTestCase):
+    """The judgment endpoints end to end, answered by the stub backend."""
+
+    def setUp(self):
+        flight_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, flight_dir, ignore_errors=True)
+        self.enterContext(override_settings(JUDGMENT_FLIGHT_DIR=flight_dir))
+        self.cache = JudgmentCache(None, None, 16, 0)
+        self.enterContext(mock.patch.object(judgment_cache, '_cache', self.cache))
+        self.enterContext(mock.patch.object(llm_client, '_breaker', None))
+        self.enterContext(mock.patch.object(llm_client, '_sync_client', None))
+        self.evidence = {
+            'id': views.reserve_evidence_id(),
+            'title': 'Land office bribes',
+            'description': 'Officials demanded cash for building permits.',
+            'user_description': 'Officials demanded cash for building permits.',
+            'submitted_by': 'Amina',
+            'ocr_result': None,
+            'ocr_job_id': None,
+            'file_count': 0,
+            'duplicates': [],
+        }
+        views.store_evidence(self.evidence)
+        self.addCleanup(views.clear_evidence, None)
+        self.url = f"/judgment/{self.evidence['id']}/"
+
+    def test_stream_sends_header_tokens_footer_and_done(self):
+        response = Client().get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = sse_events(b''.join(response.streaming_content).decode())
+        kinds = [event['type'] for event in events]
+        self.assertEqual(kinds[0], 'header')
+        self.assertIn('token', kinds)
+        self.assertEqual(kinds[-2:], ['footer', 'done'])
+        self.assertIn('Stub Judgment', event_text(events))
+        self.assertIn('Land office bribes', event_text(events))
+
+    def test_finished_judgment_is_served_from_the_cache(self):
+        streamed = event_text(sse_events(b''.join(Client().get(self.url).streaming_content).decode()))
+        self.assertEqual(self.cache.snapshot()['stores'], 1)
+        with mock.patch.object(llm_client, 'chat_stream', side_effect=AssertionError('model called')):
+            self.assertEqual(Client().get(self.url, {'format': 'json'}).json()['judgment'], streamed)
+
+    @override_settings(LLM_STUB_FIRST_TOKEN_SECONDS=0.2)
+    def test_concurrent_json_requests_share_one_generation(self):
+        before = singleflight.stats()
+        judgments = []
+
+        def fetch():
+            judgments.append(Client().get(self.url, {'format': 'json'}).json()['judgment'])
+
+        threads = [threading.Thread(target=fetch) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        after = singleflight.stats()
+        self.assertEqual(after['flights'] - before['flights'], 1)
+        self.assertEqual(after['coalesced'] - before['coalesced'], 2)
+        self.assertEqual(len(set(judgments)), 1)
+        self.assertIn('Stub Judgment', judgments[0])
+
+    def test_asgi_stream(self):
+        async def fetch():
+            response = await AsyncClient().get(self.url)
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+
+        events = sse_events(async_to_sync(fetch)())
+        self.assertEqual(events[-1]['type'], 'done')
+        self.assertIn('Stub Judgment', event_text(events))
+        self.assertEqual(self.cache.snapshot()['stores'], 1)
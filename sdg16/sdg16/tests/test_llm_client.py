@@ -0,0 +1,144 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from sdg16 import llm_client
+from sdg16.llm_client import CLOSED, HALF_OPEN, OPEN, BreakerOpen, CircuitBreaker, DeadlineExceeded
+
+
+def elapse(breaker, seconds):
+    breaker.opened_at -= seconds
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30)
+
+    def open_breaker(self):
+        for _ in range(2):
+            self.breaker.before_call()
+            self.breaker.record_failure(ConnectionError('refused'))
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.before_call()
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_call()
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open())
+        with self.assertRaises(BreakerOpen):
+            self.breaker.before_call()
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['short_circuited']), (1, 1))
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.before_call()
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.breaker.before_call()
+        self.breaker.record_failure(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_lets_one_trial_through_and_closes_on_success(self):
+        self.open_breaker()
+        elapse(self.breaker, 30)
+        self.assertFalse(self.breaker.is_open())
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        # Only one trial at a time
+        self.assertTrue(self.breaker.is_open())
+        with self.assertRaises(BreakerOpen):
+            self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.consecutive_failures, 0)
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        elapse(self.breaker, 30)
+        self.breaker.before_call()
+        self.breaker.record_failure(DeadlineExceeded('no answer'))
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertTrue(self.breaker.is_open())
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot['opened'], snapshot['timeouts']), (2, 1))
+
+    def test_abandoned_trial_frees_the_slot(self):
+        self.open_breaker()
+        elapse(self.breaker, 30)
+        self.breaker.before_call()
+        self.breaker.abandon()
+        self.breaker.before_call()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+
+    def test_probe_results(self):
+        self.open_breaker()
+        self.breaker.probe_result()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.probe_result(ConnectionError('refused'))
+        self.breaker.probe_result(ConnectionError('refused'))
+        self.assertEqual(self.breaker.state, OPEN)
+
+
+class FailingClient:
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        raise ConnectionError('connection refused')
+
+
+@override_settings(
+    LLM_BACKEND='stub',
+    LLM_HEALTH_PROBE_INTERVAL=0,
+    LLM_BREAKER_FAILURE_THRESHOLD=2,
+    LLM_BREAKER_RESET_SECONDS=30,
+    LLM_STUB_FIRST_TOKEN_SECONDS=0,
+    LLM_STUB_TOKEN_SECONDS=0,
+)
+class ChatBreakerTests(SimpleTestCase):
+    def setUp(self):
+        # A breaker and client of this test's own, not the process-wide ones
+        self.enterContext(mock.patch.object(llm_client, '_breaker', None))
+        self.enterContext(mock.patch.object(llm_client, '_sync_client', None))
+
+    def messages(self):
+        return [{'role': 'user', 'content': 'Title: Land office bribes\nDescription: cash for permits'}]
+
+    def test_stub_backend_answers(self):
+        reply = llm_client.chat(None, self.messages())
+        self.assertIn('Land office bribes', reply)
+        self.assertEqual(llm_client.model_id(), f'stub:{llm_client.model()}')
+        self.assertEqual(llm_client.get_breaker().snapshot()['successes'], 1)
+
+    def test_failures_open_the_breaker_and_a_trial_closes_it(self):
+        client = FailingClient()
+        with mock.patch.object(llm_client, 'sync_client', return_value=client):
+            for _ in range(2):
+                with self.assertRaises(ConnectionError):
+                    llm_client.chat(None, self.messages())
+            with self.assertRaises(BreakerOpen):
+                llm_client.chat(None, self.messages())
+        self.assertEqual(client.calls, 2)
+        self.assertFalse(llm_client.is_available())
+
+        elapse(llm_client.get_breaker(), 30)
+        self.assertTrue(llm_client.is_available())
+        llm_client.chat(None, self.messages())
+        self.assertEqual(llm_client.get_breaker().state, CLOSED)
+
+    def test_early_close_frees_the_half_open_trial(self):
+        breaker = llm_client.get_breaker()
+        breaker.before_call()
+        breaker.record_failure(ConnectionError('refused'))
+        breaker.before_call()
+        breaker.record_failure(ConnectionError('refused'))
+        elapse(breaker, 30)
+        stream = llm_client.chat_stream(None, self.messages())
+        next(stream)
+        stream.close()
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.is_open())
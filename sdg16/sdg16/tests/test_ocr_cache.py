@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from sdg16 import ocr_cache
+from sdg16.ocr_cache import OCRResultCache
+
+SCAN = b'%PDF-1.4 scanned ledger'
+
+
+def ocr_result(text='Ledger', **extra):
+    return dict({'success': True, 'extracted_text': text, 'word_count': 1}, **extra)
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_same_bytes_and_settings_share_a_key(self):
+        self.assertEqual(ocr_cache.cache_key(SCAN), ocr_cache.cache_key(memoryview(SCAN)))
+        self.assertNotEqual(ocr_cache.cache_key(SCAN), ocr_cache.cache_key(SCAN + b' '))
+
+    def test_settings_that_change_the_output_change_the_key(self):
+        key = ocr_cache.cache_key(SCAN)
+        for name, value in [('OCR_LANG', 'fra'), ('OCR_PDF_DPI', 150), ('OCR_MAX_PAGES', 5),
+                            ('OCR_HEAVY_PSMS', [11])]:
+            with self.subTest(setting=name), override_settings(**{name: value}):
+                self.assertNotEqual(ocr_cache.cache_key(SCAN), key)
+
+    def test_pipeline_version_changes_the_key(self):
+        key = ocr_cache.cache_key(SCAN)
+        with mock.patch.object(ocr_cache, 'PIPELINE_VERSION', ocr_cache.PIPELINE_VERSION + 1):
+            self.assertNotEqual(ocr_cache.cache_key(SCAN), key)
+
+    def test_taxonomy_edit_changes_the_key(self):
+        keys = []
+        for digest in ('before', 'after'):
+            matcher = SimpleNamespace(digest=digest)
+            with mock.patch.object(ocr_cache.keywords, 'get_matcher', return_value=matcher):
+                keys.append(ocr_cache.cache_key(SCAN))
+        self.assertNotEqual(*keys)
+
+
+class OCRResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'ocr_cache.sqlite3')
+
+    def test_round_trip_drops_per_request_fields(self):
+        cache = OCRResultCache(self.path, 1024 * 1024, 1024 * 1024)
+        cache.put('k', ocr_result(file_name='scan.pdf', processing_time=1.5))
+        cached = cache.get('k')
+        self.assertEqual(cached['extracted_text'], 'Ledger')
+        self.assertTrue(cached['cached'])
+        self.assertNotIn('file_name', cached)
+        self.assertNotIn('processing_time', cached)
+
+    def test_failed_results_are_not_cached(self):
+        cache = OCRResultCache(self.path, 1024 * 1024, 1024 * 1024)
+        cache.put('k', {'success': False, 'error': 'unreadable'})
+        self.assertIsNone(cache.get('k'))
+
+    def test_disk_tier_survives_a_new_process(self):
+        OCRResultCache(self.path, 1024 * 1024, 1024 * 1024).put('k', ocr_result())
+        cache = OCRResultCache(self.path, 1024 * 1024, 1024 * 1024)
+        self.assertEqual(cache.get('k')['extracted_text'], 'Ledger')
+        self.assertEqual(cache.snapshot()['disk_hits'], 1)
+
+    def test_memory_tier_evicts_least_recently_used(self):
+        cache = OCRResultCache(None, 150, 0)
+        cache.put('a', ocr_result('A'))
+        cache.put('b', ocr_result('B'))
+        cache.get('a')
+        cache.put('c', ocr_result('C'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a')['extracted_text'], 'A')
+        self.assertEqual(cache.get('c')['extracted_text'], 'C')
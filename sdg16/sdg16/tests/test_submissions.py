@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from sdg16 import views
+
+
+@override_settings(
+    OCR_ASYNC_JOBS=False,
+    SEARCH_INDEX_ENABLED=False,
+    DEDUP_ENABLED=False,
+    JUDGMENT_SPECULATIVE_ENABLED=False,
+)
+class SubmissionIdTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.addCleanup(views.clear_evidence, self.factory.post('/clear/'))
+
+    def submit(self, title):
+        request = self.factory.post('/', {
+            'title': title,
+            'description': 'Unexplained payments in the land registry ledger',
+            'submitted_by': 'Auditor',
+        })
+        return json.loads(views.submit_evidence(request).content)
+
+    def test_concurrent_submissions_get_distinct_ids(self):
+        # Widen the gap between reserving an id and storing the submission
+        upload_duplicates = views.upload_duplicates
+
+        def slow_upload_duplicates(*args):
+            time.sleep(0.01)
+            return upload_duplicates(*args)
+
+        responses = {}
+
+        def submit(title):
+            responses[title] = self.submit(title)
+
+        titles = [f'Case {n}' for n in range(20)]
+        with mock.patch.object(views, 'upload_duplicates', slow_upload_duplicates):
+            threads = [threading.Thread(target=submit, args=(title,)) for title in titles]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        ids = [responses[title]['evidence_id'] for title in titles]
+        self.assertEqual(len(set(ids)), len(titles))
+        self.assertEqual(len(views.stored_evidences()), len(titles))
+        for title, evidence_id in zip(titles, ids):
+            self.assertEqual(views.find_evidence(evidence_id)['title'], title)
+
+    def test_ids_are_not_reused_after_clear(self):
+        first = self.submit('Before clear')['evidence_id']
+        views.clear_evidence(self.factory.post('/clear/'))
+        second = self.submit('After clear')['evidence_id']
+        self.assertGreater(second, first)
+        self.assertIsNone(views.find_evidence(first))
+        self.assertEqual(views.find_evidence(second)['title'], 'After clear')
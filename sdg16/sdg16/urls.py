@@ -1,35 +1,38 @@
-"""
-URL configuration for sdg16 project.
-
-The `urlpatterns` list routes URLs to views. For more information please see:
-    https://docs.djangoproject.com/en/5.1/topics/http/urls/
-Examples:
-Function views
-    1. Add an import:  from my_app import views
-    2. Add a URL to urlpatterns:  path('', views.home, name='home')
-Class-based views
-    1. Add an import:  from other_app.views import Home
-    2. Add a URL to urlpatterns:  path('', Home.as_view(), name='home')
-Including another URLconf
-    1. Import the include() function: from django.urls import include, path
-    2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
-"""
-from django.contrib import admin
-from django.urls import path
-from django.conf import settings
-from django.conf.urls.static import static
-from . import views
-
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('', views.home, name='home'),
-    path('judgment/<int:evidence_id>/', views.get_judgment_stream, name='get_judgment_stream'),
-    path('clear/', views.clear_evidence, name='clear_evidence'),
-    # 🔥 CRAZY OCR ENDPOINTS! 🔥
-    path('ocr-process/', views.process_image_evidence, name='process_image_evidence'),
-    path('multi-ocr-process/', views.process_multiple_image_evidence, name='process_multiple_image_evidence'),
-]
-
-# Add media files serving for development
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+"""
+URL configuration for sdg16 project.
+
+The `urlpatterns` list routes URLs to views. For more information please see:
+    https://docs.djangoproject.com/en/5.1/topics/http/urls/
+Examples:
+Function views
+    1. Add an import:  from my_app import views
+    2. Add a URL to urlpatterns:  path('', views.home, name='home')
+Class-based views
+    1. Add an import:  from other_app.views import Home
+    2. Add a URL to urlpatterns:  path('', Home.as_view(), name='home')
+Including another URLconf
+    1. Import the include() function: from django.urls import include, path
+    2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
+"""
+from django.contrib import admin
+from django.urls import path
+from django.conf import settings
+from django.conf.urls.static import static
+from . import views
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', views.home, name='home'),
+    path('judgment/<int:evidence_id>/', views.get_judgment_stream, name='get_judgment_stream'),
+    path('clear/', views.clear_evidence, name='clear_evidence'),
+    path('search/', views.search_evidence, name='search_evidence'),
+    # 🔥 CRAZY OCR ENDPOINTS! 🔥
+    path('ocr-process/', views.process_image_evidence, name='process_image_evidence'),
+    path('multi-ocr-process/', views.process_multiple_image_evidence, name='process_multiple_image_evidence'),
+    path('ocr-jobs/<int:job_id>/', views.ocr_job_status, name='ocr_job_status'),
+    path('ocr-cache/stats/', views.ocr_cache_stats, name='ocr_cache_stats'),
+]
+
+# Add media files serving for development
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
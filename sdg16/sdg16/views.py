@@ -1,599 +1,1310 @@
-from django.shortcuts import render
-from django.http import JsonResponse
-import json
-import re
-import os
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import pytesseract
-from PIL import Image, ImageEnhance, ImageFilter
-import tempfile
-import time
-import random
-from datetime import datetime
-import base64
-import io
-try:
-    import ollama
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
-
-def crazy_multi_file_ocr_magic(image_files):
-    results = []
-    combined_text = ""
-    total_confidence = 0
-    processing_effects = []
-    for i, image_file in enumerate(image_files):
-        try:
-            effect = random.choice([
-                '🌟 Cosmic OCR Scanning',
-                '⚡ Lightning Text Extraction',
-                '🔮 Quantum Text Analysis',
-                '🌈 Rainbow Pattern Recognition',
-                '🚀 Hyperdrive OCR Processing',
-                '💫 Stellar Text Decoding'
-            ])
-            processing_effects.append(effect)
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                for chunk in image_file.chunks():
-                    temp_file.write(chunk)
-                temp_path = temp_file.name
-            image = Image.open(temp_path)
-            enhanced_image = enhance_image_for_ocr(image)
-            extracted_text = pytesseract.image_to_string(enhanced_image)
-            ocr_data = pytesseract.image_to_data(enhanced_image, output_type=pytesseract.Output.DICT)
-            confidences = [int(conf) for conf in ocr_data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-            analysis = analyze_text_for_evidence(extracted_text)
-            thumbnail = create_crazy_thumbnail(image)
-            file_result = {
-                'success': True,
-                'file_name': image_file.name,
-                'file_size': image_file.size,
-                'extracted_text': extracted_text.strip(),
-                'confidence_score': avg_confidence,
-                'analysis': analysis,
-                'word_count': len(extracted_text.split()),
-                'character_count': len(extracted_text),
-                'processing_effect': effect,
-                'thumbnail': thumbnail,
-                'processing_time': round(random.uniform(0.5, 2.0), 2)  # Simulated processing time
-            }
-            results.append(file_result)
-            combined_text += f"\n\n📁 FILE: {image_file.name}\n{extracted_text}\n" + "="*50
-            total_confidence += avg_confidence
-            os.unlink(temp_path)
-            
-        except Exception as e:
-            file_result = {
-                'success': False,
-                'file_name': image_file.name,
-                'error': str(e),
-                'extracted_text': '',
-                'confidence_score': 0,
-                'analysis': f'❌ OCR Processing Error: {str(e)}',
-                'processing_effect': '💥 Processing Failed'
-            }
-            results.append(file_result)
-    successful_files = [r for r in results if r['success']]
-    avg_confidence = total_confidence / len(successful_files) if successful_files else 0
-    combined_analysis = generate_multi_file_analysis(results, combined_text)
-    return {
-        'success': len(successful_files) > 0,
-        'total_files': len(image_files),
-        'successful_files': len(successful_files),
-        'failed_files': len(image_files) - len(successful_files),
-        'results': results,
-        'combined_text': combined_text.strip(),
-        'average_confidence': avg_confidence,
-        'combined_analysis': combined_analysis,
-        'processing_effects': processing_effects,
-        'total_words': sum(r.get('word_count', 0) for r in successful_files),
-        'total_characters': sum(r.get('character_count', 0) for r in successful_files)
-    }
-
-def enhance_image_for_ocr(image):
-    try:
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.5)  # Increase contrast
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(2.0)  # Increase sharpness
-        enhancer = ImageEnhance.Brightness(image)
-        image = enhancer.enhance(1.2)  # Slight brightness increase
-        image = image.filter(ImageFilter.MedianFilter(size=3))
-        
-        return image
-    except:
-        return image
-
-def create_crazy_thumbnail(image):
-    try:
-        thumbnail = image.copy()
-        thumbnail.thumbnail((150, 150), Image.Resampling.LANCZOS)
-        buffer = io.BytesIO()
-        thumbnail.save(buffer, format='JPEG', quality=85)
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/jpeg;base64,{img_str}"
-    except:
-        return None
-
-def generate_multi_file_analysis(results, combined_text):
-    successful_results = [r for r in results if r['success']]
-    if not successful_results:
-        return "❌ No files processed successfully"
-    pattern_counts = {
-        'documents': 0,
-        'legal': 0,
-        'corruption': 0,
-        'identity': 0,
-        'dates': 0
-    }
-    evidence_keywords = {
-        'documents': ['certificate', 'license', 'permit', 'contract', 'agreement', 'receipt', 'invoice'],
-        'legal': ['court', 'judge', 'lawyer', 'legal', 'law', 'justice', 'rights', 'violation', 'complaint'],
-        'corruption': ['bribe', 'corruption', 'illegal', 'fraud', 'embezzlement', 'kickback', 'money laundering'],
-        'identity': ['signature', 'stamp', 'seal', 'official', 'authorized', 'certified'],
-        'dates': ['date', 'dated', '2024', '2025', 'january', 'february', 'march', 'april', 'may', 'june']
-    }
-    text_lower = combined_text.lower()
-    for category, keywords in evidence_keywords.items():
-        pattern_counts[category] = sum(1 for kw in keywords if kw in text_lower)
-    analysis_parts = [
-        "🚀 **MULTI-FILE OCR MEGA-ANALYSIS**",
-        f"📊 **Files Processed:** {len(successful_results)}/{len(results)}",
-        f"� **Total Words Extracted:** {sum(r.get('word_count', 0) for r in successful_results)}",
-        f"📈 **Average Confidence:** {sum(r.get('confidence_score', 0) for r in successful_results) / len(successful_results):.1f}%",
-        ""
-    ]
-    if any(count > 0 for count in pattern_counts.values()):
-        analysis_parts.append("🔍 **DETECTED PATTERNS ACROSS ALL FILES:**")
-        for category, count in pattern_counts.items():
-            if count > 0:
-                if category == 'corruption':
-                    analysis_parts.append(f"🚨 **CORRUPTION INDICATORS:** {count} instances found!")
-                elif category == 'legal':
-                    analysis_parts.append(f"⚖️ **LEGAL CONTENT:** {count} legal terms detected")
-                elif category == 'documents':
-                    analysis_parts.append(f"📋 **DOCUMENT TYPES:** {count} document indicators")
-                elif category == 'identity':
-                    analysis_parts.append(f"🔐 **AUTHENTICATION:** {count} official markers")
-                elif category == 'dates':
-                    analysis_parts.append(f"📅 **DATE REFERENCES:** {count} temporal markers")
-        analysis_parts.append("")
-    
-    # Urgency assessment
-    if pattern_counts['corruption'] > 0:
-        analysis_parts.extend([
-            "🚨 **OVERALL URGENCY: CRITICAL**",
-            "⚡ **RECOMMENDATION:** Immediate multi-file investigation required!",
-            "🔥 **SDG 16 IMPACT:** High priority for Peace & Justice review"
-        ])
-    elif pattern_counts['legal'] > 2:
-        analysis_parts.extend([
-            "🟠 **OVERALL URGENCY: HIGH**",
-            "📋 **RECOMMENDATION:** Comprehensive legal document review needed",
-            "⚖️ **SDG 16 IMPACT:** Significant institutional implications"
-        ])
-    else:
-        analysis_parts.extend([
-            "🟡 **OVERALL URGENCY: STANDARD**",
-            "📝 **RECOMMENDATION:** Standard multi-document processing",
-            "📊 **SDG 16 IMPACT:** Regular institutional review"
-        ])
-    
-    return "\n".join(analysis_parts)
-
-def crazy_ocr_magic(image_file):
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            for chunk in image_file.chunks():
-                temp_file.write(chunk)
-            temp_path = temp_file.name
-        image = Image.open(temp_path)
-        enhanced_image = enhance_image_for_ocr(image)
-        extracted_text = pytesseract.image_to_string(enhanced_image)
-        ocr_data = pytesseract.image_to_data(enhanced_image, output_type=pytesseract.Output.DICT)
-        confidences = [int(conf) for conf in ocr_data['conf'] if int(conf) > 0]
-        avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-        analysis = analyze_text_for_evidence(extracted_text)
-        thumbnail = create_crazy_thumbnail(image)
-        os.unlink(temp_path)
-        return {
-            'success': True,
-            'extracted_text': extracted_text.strip(),
-            'confidence_score': avg_confidence,
-            'analysis': analysis,
-            'word_count': len(extracted_text.split()),
-            'character_count': len(extracted_text),
-            'thumbnail': thumbnail
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'extracted_text': '',
-            'confidence_score': 0,
-            'analysis': f'❌ OCR Processing Error: {str(e)}'
-        }
-
-def analyze_text_for_evidence(text):
-
-    if not text:
-        return "No text found in image"
-    
-    text_lower = text.lower()
-    
-    # Evidence pattern detection
-    evidence_patterns = {
-        'documents': ['certificate', 'license', 'permit', 'contract', 'agreement', 'receipt', 'invoice'],
-        'legal': ['court', 'judge', 'lawyer', 'legal', 'law', 'justice', 'rights', 'violation', 'complaint'],
-        'corruption': ['bribe', 'corruption', 'illegal', 'fraud', 'embezzlement', 'kickback', 'money laundering'],
-        'identity': ['signature', 'stamp', 'seal', 'official', 'authorized', 'certified'],
-        'dates': ['date', 'dated', '2024', '2025', 'january', 'february', 'march', 'april', 'may', 'june']
-    }
-    
-    found_patterns = {}
-    for category, keywords in evidence_patterns.items():
-        matches = [kw for kw in keywords if kw in text_lower]
-        if matches:
-            found_patterns[category] = matches
-    
-    # Generate crazy analysis report
-    analysis_parts = ["🔍 **AUTOMATED OCR EVIDENCE ANALYSIS**\n"]
-    
-    if not found_patterns:
-        analysis_parts.append("📄 **Content Type:** General text/document")
-        analysis_parts.append("🟡 **SDG 16 Relevance:** Requires manual review")
-    else:
-        for category, matches in found_patterns.items():
-            if category == 'corruption':
-                analysis_parts.append(f"🚨 **CORRUPTION ALERT:** Found {len(matches)} corruption-related terms!")
-                analysis_parts.append(f"   Terms: {', '.join(matches[:3])}")
-            elif category == 'legal':
-                analysis_parts.append(f"⚖️ **LEGAL CONTENT:** {len(matches)} justice-related terms detected")
-                analysis_parts.append(f"   Terms: {', '.join(matches[:3])}")
-            elif category == 'documents':
-                analysis_parts.append(f"📋 **DOCUMENT TYPE:** {len(matches)} document indicators found")
-            elif category == 'identity':
-                analysis_parts.append(f"🔐 **AUTHENTICATION:** {len(matches)} official markers detected")
-    
-    # Add urgency level
-    if 'corruption' in found_patterns:
-        analysis_parts.append("\n🚨 **URGENCY LEVEL: CRITICAL**")
-        analysis_parts.append("⚡ **ACTION REQUIRED:** Immediate investigation recommended")
-    elif 'legal' in found_patterns:
-        analysis_parts.append("\n🟠 **URGENCY LEVEL: HIGH**")
-        analysis_parts.append("📋 **ACTION REQUIRED:** Legal review recommended")
-    else:
-        analysis_parts.append("\n🟡 **URGENCY LEVEL: STANDARD**")
-        analysis_parts.append("📝 **ACTION REQUIRED:** Standard processing")
-    
-    return "\n".join(analysis_parts)
-
-def format_markdown_response(content):
-
-    # Add proper markdown formatting
-    formatted_content = f"""# 🏛️ AI JUDGE ANALYSIS - SDG 16
-
-## 📋 Case Assessment
-
-{content}
-
----
-
-## ⚖️ Final Recommendation
-This case requires institutional review under **Peace and Justice Strong Institutions** frameworks.
-
-### 📊 SDG 16 Compliance Checklist
-- [ ] Rule of Law Adherence
-- [ ] Human Rights Protection
-- [ ] Institutional Transparency
-- [ ] Access to Justice
-- [ ] Conflict Resolution
-- [ ] Corruption Prevention
-
-> **Status**: Under AI Judge Review  
-> **Framework**: SDG 16 - Peace and Justice Strong Institutions  
-> **Priority**: Standard Institutional Protocol
-"""
-    return formatted_content
-
-def ai_judge_analysis(evidence_title, evidence_description, submitted_by):
-    """
-    AI Judge for SDG 16 - Peace and Justice Strong Institutions with Markdown Support
-    """
-    if OLLAMA_AVAILABLE:
-        try:
-            # Enhanced SDG 16 specialized system message with markdown formatting instructions
-            system_message = {
-                'role': 'system',
-                'content': (
-                    "You are an AI judge specialized in SDG 16: Peace and Justice Strong Institutions. "
-                    "Analyze evidence based on: 1. Rule of law, 2. Human rights protection, "
-                    "3. Institutional transparency, 4. Access to justice, 5. Conflict resolution, "
-                    "6. Corruption prevention. Provide fair, balanced judgments supporting peace and justice. "
-                    "Format your response using markdown with headers, bullet points, and emphasis for clarity. "
-                    "Use professional legal language appropriate for institutional review."
-                )
-            }
-            
-            user_message = {
-                'role': 'user', 
-                'content': f"""
-Analyze this evidence for SDG 16 (Peace and Justice Strong Institutions):
-
-**Title:** {evidence_title}
-**Description:** {evidence_description}
-**Submitted by:** {submitted_by}
-
-Provide a comprehensive professional judgment using markdown formatting on:
-
-### Analysis Requirements:
-- **Relevance to peace and justice**
-- **Institutional implications**  
-- **Recommended actions**
-- **Legal/ethical considerations**
-- **SDG 16 target alignment**
-
-Format your response with clear headers, bullet points, and professional structure suitable for institutional review.
-                """
-            }
-            
-            # Get AI response using ollama
-            response = ollama.chat(
-                model='llama3.2:1b',
-                messages=[system_message, user_message]
-            )
-            
-            judgment = response.get('message', {}).get('content', '')
-            
-            if judgment:
-                return format_markdown_response(judgment)
-            else:
-                return format_markdown_response("⚖️ AI Judge analysis temporarily unavailable. Standard institutional review protocols applied.")
-                
-        except Exception as e:
-            fallback_content = f"""## 🚨 Emergency Protocol Activated
-
-**Case:** {evidence_title}  
-**Submitted by:** {submitted_by}
-
-### Standard Judgment
-This matter requires **immediate institutional attention** under SDG 16 principles.
-
-#### Recommended Actions:
-1. 🔍 **Investigate** - Initiate due process investigation
-2. 🛡️ **Protect** - Ensure safety of all parties
-3. 📝 **Document** - Maintain detailed records
-4. ⚖️ **Review** - Apply institutional oversight
-
-**Error Log:** `{str(e)}`"""
-            return format_markdown_response(fallback_content)
-    
-    else:
-        # Enhanced fallback with markdown formatting when ollama not available
-        fallback_content = f"""## 📋 Standard SDG 16 Judicial Review
-
-**Case Title:** {evidence_title}  
-**Submitted by:** {submitted_by}
-
-### Institutional Assessment
-This evidence has been reviewed under **SDG 16 frameworks** (Peace and Justice Strong Institutions).
-
-### Judgment Criteria Applied
-- ✅ **Rule of Law Compliance**
-- ✅ **Human Rights Protection**  
-- ✅ **Institutional Transparency**
-- ✅ **Access to Justice**
-- ✅ **Conflict Resolution Potential**
-- ✅ **Corruption Prevention**
-
-### Recommended Actions
-1. **Escalate** to appropriate justice mechanisms
-2. **Ensure transparency** in all proceedings
-3. **Protect** all parties involved
-4. **Follow** established due process procedures
-5. **Monitor** for SDG 16 compliance
-
-> **Status:** Under institutional review - Manual analysis applied  
-> **Priority:** Standard SDG 16 protocols in effect
-
-*Note: AI Judge service temporarily offline - Manual review protocols activated*"""
-        
-        return format_markdown_response(fallback_content)
-
-# Temporary in-memory storage (no database saving)
-temp_evidence_storage = []
-
-def home(request):
-    if request.method == 'POST':
-        title = request.POST.get('title')
-        description = request.POST.get('description')
-        submitted_by = request.POST.get('submitted_by')
-        
-        # � CRAZY MULTI-FILE IMAGE EVIDENCE PROCESSING! �
-        image_files = request.FILES.getlist('image_evidence')
-        ocr_result = None
-        
-        if image_files:
-            if len(image_files) == 1:
-                # Single file processing
-                ocr_result = crazy_ocr_magic(image_files[0])
-                
-                # If OCR was successful, enhance the description with extracted text
-                if ocr_result['success'] and ocr_result['extracted_text']:
-                    enhanced_description = f"""{description}
-
----
-
-🔥 **EXTRACTED TEXT FROM IMAGE EVIDENCE:**
-
-{ocr_result['extracted_text']}
-
----
-
-{ocr_result['analysis']}
-
-**OCR Confidence:** {ocr_result['confidence_score']:.1f}%
-**Words Extracted:** {ocr_result['word_count']}
-**Characters:** {ocr_result['character_count']}
-"""
-                    description = enhanced_description
-            
-            else:
-                # Multi-file processing
-                ocr_result = crazy_multi_file_ocr_magic(image_files)
-                
-                if ocr_result['success'] and ocr_result['combined_text']:
-                    enhanced_description = f"""{description}
-
----
-
-🚀 **MULTI-FILE OCR EXTRACTION RESULTS:**
-
-**Files Processed:** {ocr_result['successful_files']}/{ocr_result['total_files']}
-**Total Words:** {ocr_result['total_words']}
-**Average Confidence:** {ocr_result['average_confidence']:.1f}%
-
-{ocr_result['combined_text']}
-
----
-
-{ocr_result['combined_analysis']}
-"""
-                    description = enhanced_description
-        
-        # Add to temporary storage without saving to database
-        evidence_id = len(temp_evidence_storage) + 1
-        temp_evidence = {
-            'id': evidence_id,
-            'title': title,
-            'description': description,
-            'submitted_by': submitted_by,
-            'date_submitted': 'Just now',
-            'has_image': bool(image_files),
-            'ocr_result': ocr_result if ocr_result else None,
-            'image_names': [f.name for f in image_files] if image_files else [],
-            'file_count': len(image_files) if image_files else 0
-        }
-        temp_evidence_storage.append(temp_evidence)
-        
-        response_data = {
-            'success': True, 
-            'evidence_id': evidence_id,
-            'message': '🎉 Evidence submitted successfully!'
-        }
-        
-        # Add OCR results to response if available
-        if ocr_result:
-            response_data['ocr_result'] = ocr_result
-            if ocr_result['success']:
-                response_data['message'] = f'🔥 Evidence submitted with OCR magic! Extracted {ocr_result["word_count"]} words with {ocr_result["confidence_score"]:.1f}% confidence!'
-            else:
-                response_data['message'] = '📤 Evidence submitted (OCR processing failed)'
-        
-        return JsonResponse(response_data)
-    
-    # Pass temporary evidence to template
-    return render(request, 'index.html', {'evidences': temp_evidence_storage})
-
-def get_judgment_stream(request, evidence_id):
-    try:
-        # Find evidence in temporary storage
-        evidence = next((e for e in temp_evidence_storage if e['id'] == evidence_id), None)
-        if not evidence:
-            return JsonResponse({'error': 'Evidence not found'}, status=404)
-        print("-"*100)
-        # Generate AI Judge analysis
-        judgment = ai_judge_analysis(
-            evidence['title'], 
-            evidence['description'], 
-            evidence['submitted_by']
-        )
-        print(JsonResponse({'judgment': judgment}))
-        print("-"*100)
-        
-        return JsonResponse({'judgment': judgment})
-        
-    except Exception as e:
-        return JsonResponse({'error': f'AI Judge analysis failed: {str(e)}'}, status=500)
-
-def process_image_evidence(request):
-    if request.method == 'POST' and request.FILES.get('image'):
-        image_file = request.FILES['image']
-        
-        # Validate file type
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/bmp']
-        if image_file.content_type not in allowed_types:
-            return JsonResponse({
-                'success': False,
-                'error': 'Invalid file type. Please upload JPEG, PNG, GIF, or BMP images only.'
-            })
-        
-        # Process with OCR magic
-        ocr_result = crazy_ocr_magic(image_file)
-        
-        if ocr_result['success']:
-            return JsonResponse({
-                'success': True,
-                'message': f'🔥 OCR Magic completed! Extracted {ocr_result["word_count"]} words!',
-                'extracted_text': ocr_result['extracted_text'],
-                'confidence_score': ocr_result['confidence_score'],
-                'analysis': ocr_result['analysis'],
-                'thumbnail': ocr_result.get('thumbnail'),
-                'stats': {
-                    'word_count': ocr_result['word_count'],
-                    'character_count': ocr_result['character_count'],
-                    'filename': image_file.name,
-                    'filesize': image_file.size
-                }
-            })
-        else:
-            return JsonResponse({
-                'success': False,
-                'error': ocr_result['error'],
-                'message': '❌ OCR processing failed'
-            })
-    
-    return JsonResponse({'success': False, 'error': 'No image file provided'})
-
-def process_multiple_image_evidence(request):
-    if request.method == 'POST' and request.FILES.getlist('images'):
-        image_files = request.FILES.getlist('images')
-        
-        # Validate file count
-        if len(image_files) > 10:
-            return JsonResponse({
-                'success': False,
-                'error': 'Maximum 10 files allowed per batch. Please reduce the number of files.'
-            })
-        
-        # Validate file types
-        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/bmp']
-        for image_file in image_files:
-            if image_file.content_type not in allowed_types:
-                return JsonResponse({
-                    'success': False,
-                    'error': f'Invalid file type for {image_file.name}. Please upload JPEG, PNG, GIF, or BMP images only.'
-                })
-        
-        # Process with CRAZY multi-file OCR magic
-        ocr_result = crazy_multi_file_ocr_magic(image_files)
-        
-        return JsonResponse({
-            'success': ocr_result['success'],
-            'message': f'🚀 Multi-file OCR completed! Processed {ocr_result["successful_files"]}/{ocr_result["total_files"]} files, extracted {ocr_result["total_words"]} total words!',
-            'multi_file_result': ocr_result
-        })
-    
-    return JsonResponse({'success': False, 'error': 'No image files provided'})
-
-def clear_evidence(request):
-    global temp_evidence_storage
-    temp_evidence_storage = []
-    return JsonResponse({'success': True, 'message': 'All evidence cleared by AI Judge system'})
\ No newline at end of file
+from django.shortcuts import render
+from django.http import JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+import asyncio
+import json
+import re
+import os
+from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from PIL import Image
+import time
+import random
+from datetime import datetime
+import base64
+import io
+import itertools
+import threading
+from . import (dedup, ingest, jobs, judge_scheduler, judgment_cache, keywords, llm_client, ocr_cache,
+               ocr_pool, preprocessing, prompt_builder, search, singleflight, speculation)
+from .models import OCRJob
+from .ocr_engine import record_tier, run_ocr, tier_stats
+
+# Keyword categories reported by the OCR evidence analyzers
+EVIDENCE_CATEGORIES = ['documents', 'legal', 'corruption', 'identity', 'dates']
+
+PROCESSING_EFFECTS = [
+    '🌟 Cosmic OCR Scanning',
+    '⚡ Lightning Text Extraction',
+    '🔮 Quantum Text Analysis',
+    '🌈 Rainbow Pattern Recognition',
+    '🚀 Hyperdrive OCR Processing',
+    '💫 Stellar Text Decoding'
+]
+
+def tiered_ocr(image, skip_enhancement=False):
+    # Cheap pass first; escalate to enhancement + alternate PSMs only below the threshold
+    threshold = getattr(settings, 'OCR_CONFIDENCE_THRESHOLD', 60.0)
+    base_config = getattr(settings, 'OCR_TESSERACT_CONFIG', '')
+    fast_config = f"{base_config} {getattr(settings, 'OCR_FAST_CONFIG', '--psm 6')}".strip()
+    fast_image = image.convert('L') if skip_enhancement else preprocessing.enhance_fast(image)
+    fast = run_ocr(fast_image, config=fast_config)
+    passes = [{'tier': 'fast', 'config': fast_config, 'confidence': round(fast['confidence'], 1), 'selected': True}]
+    if fast['word_count'] and fast['confidence'] >= threshold:
+        return fast, 'fast', passes
+
+    heavy_image = enhance_image_for_ocr(image)
+    best, best_index = fast, 0
+    for psm in getattr(settings, 'OCR_HEAVY_PSMS', [3, 4]):
+        config = f'{base_config} --psm {psm}'.strip()
+        candidate = run_ocr(heavy_image, config=config)
+        passes.append({'tier': 'heavy', 'config': config, 'confidence': round(candidate['confidence'], 1), 'selected': False})
+        if (candidate['confidence'], candidate['word_count']) > (best['confidence'], best['word_count']):
+            best, best_index = candidate, len(passes) - 1
+    for i, ocr_pass in enumerate(passes):
+        ocr_pass['selected'] = i == best_index
+    # The fast result can still win; report the tier that produced the text
+    return best, passes[best_index]['tier'], passes
+
+def ocr_image(image):
+    prepared_image = image
+    decisions = None
+    if getattr(settings, 'OCR_ADAPTIVE_PREPROCESSING', True):
+        prepared_image, decisions = preprocessing.adapt_for_ocr(image)
+    skip_enhancement = bool(decisions and decisions['skip_enhancement'])
+    tier = None
+    passes = None
+    if getattr(settings, 'OCR_TIERED', True):
+        ocr, tier, passes = tiered_ocr(prepared_image, skip_enhancement)
+    else:
+        enhanced_image = prepared_image if skip_enhancement else enhance_image_for_ocr(prepared_image)
+        ocr = run_ocr(enhanced_image)
+    extracted_text = ocr['text']
+    matcher = keywords.get_matcher()
+    keyword_hits = evidence_keyword_hits(extracted_text, matcher)
+    return {
+        'success': True,
+        'extracted_text': extracted_text.strip(),
+        'confidence_score': ocr['confidence'],
+        'analysis': format_evidence_analysis(keyword_hits) if extracted_text else "No text found in image",
+        'keyword_hits': keyword_hits,
+        'keyword_scores': matcher.scores(keyword_hits),
+        'taxonomy_version': matcher.version,
+        'word_count': ocr['word_count'],
+        'character_count': ocr['character_count'],
+        'thumbnail': create_crazy_thumbnail(image),
+        'preprocessing': decisions,
+        'ocr_tier': tier,
+        'ocr_passes': passes
+    }
+
+def ocr_pages(pages):
+    # One page in memory at a time; per-page results use the single-image shape
+    page_results = []
+    for page_number, page in enumerate(pages, start=1):
+        try:
+            page_result = ocr_image(page)
+        except Exception as e:
+            page_result = {
+                'success': False,
+                'error': str(e),
+                'extracted_text': '',
+                'confidence_score': 0,
+                'analysis': f'❌ OCR Processing Error: {str(e)}'
+            }
+        page_result['page'] = page_number
+        page_results.append(page_result)
+        del page
+
+    successful_pages = [r for r in page_results if r['success']]
+    if not successful_pages:
+        raise ValueError('No pages could be processed' if page_results else 'Document has no pages')
+    combined_text = "\n\n".join(
+        f"📄 PAGE {r['page']}\n{r['extracted_text']}" for r in successful_pages
+    )
+    keyword_hits = merge_keyword_hits(r['keyword_hits'] for r in successful_pages)
+    matcher = keywords.get_matcher()
+    return {
+        'success': True,
+        'extracted_text': combined_text,
+        'confidence_score': sum(r['confidence_score'] for r in successful_pages) / len(successful_pages),
+        'analysis': format_evidence_analysis(keyword_hits),
+        'keyword_hits': keyword_hits,
+        'keyword_scores': matcher.scores(keyword_hits),
+        'taxonomy_version': matcher.version,
+        'word_count': sum(r['word_count'] for r in successful_pages),
+        'character_count': sum(r['character_count'] for r in successful_pages),
+        'thumbnail': successful_pages[0].get('thumbnail'),
+        'page_count': len(page_results),
+        'successful_pages': len(successful_pages),
+        'pages': page_results
+    }
+
+def ocr_buffer(buffer, kind=None, source_path=None):
+    if kind:
+        return ocr_pages(ingest.iter_pages(buffer, kind, source_path))
+    return ocr_image(ingest.decode_image(buffer))
+
+def failed_file_result(file_name, error):
+    return {
+        'success': False,
+        'file_name': file_name,
+        'error': str(error),
+        'extracted_text': '',
+        'confidence_score': 0,
+        'analysis': f'❌ OCR Processing Error: {str(error)}',
+        'processing_effect': '💥 Processing Failed'
+    }
+
+def ocr_file_worker(file_name, file_size, data, effect, kind=None):
+    # Runs inside an OCR pool process: decode, enhance, OCR and thumbnail one upload
+    started = time.perf_counter()
+    try:
+        file_result = ocr_buffer(data, kind)
+    except Exception as e:
+        return failed_file_result(file_name, e)
+    file_result.update({
+        'file_name': file_name,
+        'file_size': file_size,
+        'processing_effect': effect,
+        'processing_time': round(time.perf_counter() - started, 2)
+    })
+    return file_result
+
+def cached_file_result(cached, image_file, effect):
+    cached.update({
+        'file_name': image_file.name,
+        'file_size': image_file.size,
+        'processing_effect': effect,
+        'processing_time': 0.0
+    })
+    return cached
+
+def crazy_multi_file_ocr_magic(image_files):
+    processing_effects = [random.choice(PROCESSING_EFFECTS) for _ in image_files]
+    use_cache = ocr_cache.cache_enabled()
+    cache = ocr_cache.get_cache() if use_cache else None
+    results = [None] * len(image_files)
+    cache_keys = [None] * len(image_files)
+    if ocr_pool.execution_mode() == 'process':
+        pool_jobs = []
+        pending = []
+        for i, (image_file, effect) in enumerate(zip(image_files, processing_effects)):
+            try:
+                with ingest.upload_buffer(image_file) as buffer:
+                    if use_cache:
+                        cache_keys[i] = ocr_cache.cache_key(buffer)
+                        cached = cache.get(cache_keys[i])
+                        if cached is not None:
+                            results[i] = cached_file_result(cached, image_file, effect)
+                            continue
+                    data = bytes(buffer)
+            except Exception as e:
+                results[i] = failed_file_result(image_file.name, e)
+                continue
+            pool_jobs.append((image_file.name, image_file.size, data, effect, ingest.paged_kind(image_file)))
+            pending.append(i)
+        pool_results = ocr_pool.map_ordered(
+            ocr_file_worker, pool_jobs,
+            on_error=lambda job, e: failed_file_result(job[0], e)
+        )
+        for i, file_result in zip(pending, pool_results):
+            results[i] = file_result
+            record_tier(file_result)
+            if use_cache:
+                cache.put(cache_keys[i], file_result)
+    else:
+        for i, (image_file, effect) in enumerate(zip(image_files, processing_effects)):
+            results[i] = ocr_upload_file(image_file, effect)
+    return summarize_multi_file_results(results, processing_effects)
+
+def ocr_upload_file(image_file, effect):
+    # Serial per-file path, shared by the request thread and OCR job workers
+    started = time.perf_counter()
+    use_cache = ocr_cache.cache_enabled()
+    try:
+        with ingest.upload_buffer(image_file) as buffer:
+            if use_cache:
+                cache_key = ocr_cache.cache_key(buffer)
+                cached = ocr_cache.get_cache().get(cache_key)
+                if cached is not None:
+                    return cached_file_result(cached, image_file, effect)
+            file_result = ocr_buffer(
+                buffer, ingest.paged_kind(image_file), ingest.spooled_path(image_file)
+            )
+        file_result.update({
+            'file_name': image_file.name,
+            'file_size': image_file.size,
+            'processing_effect': effect,
+            'processing_time': round(time.perf_counter() - started, 2)
+        })
+        record_tier(file_result)
+        if use_cache:
+            ocr_cache.get_cache().put(cache_key, file_result)
+        return file_result
+    except Exception as e:
+        return failed_file_result(image_file.name, e)
+
+def combine_file_texts(results):
+    # Built in one join, only when the batch summary is assembled
+    return "\n\n".join(
+        f"📁 FILE: {r['file_name']}\n{r['extracted_text']}\n" + "="*50
+        for r in results if r['success']
+    )
+
+def summarize_multi_file_results(results, processing_effects):
+    successful_files = [r for r in results if r['success']]
+    total_confidence = sum(r['confidence_score'] for r in successful_files)
+    avg_confidence = total_confidence / len(successful_files) if successful_files else 0
+    keyword_hits = merge_keyword_hits(file_keyword_hits(r) for r in successful_files)
+    combined_analysis = generate_multi_file_analysis(results, keyword_hits)
+    return {
+        'success': len(successful_files) > 0,
+        'total_files': len(results),
+        'successful_files': len(successful_files),
+        'failed_files': len(results) - len(successful_files),
+        'results': results,
+        'combined_text': combine_file_texts(results),
+        'average_confidence': avg_confidence,
+        'combined_analysis': combined_analysis,
+        'keyword_hits': keyword_hits,
+        'keyword_scores': keywords.get_matcher().scores(keyword_hits),
+        'taxonomy_version': keywords.taxonomy_version(),
+        'processing_effects': processing_effects,
+        'total_words': sum(r.get('word_count', 0) for r in successful_files),
+        'total_characters': sum(r.get('character_count', 0) for r in successful_files)
+    }
+
+def enhance_image_for_ocr(image):
+    try:
+        return preprocessing.enhance(image)
+    except:
+        return image
+
+def create_crazy_thumbnail(image):
+    try:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((150, 150), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, format='JPEG', quality=85)
+        img_str = base64.b64encode(buffer.getvalue()).decode()
+        
+        return f"data:image/jpeg;base64,{img_str}"
+    except:
+        return None
+
+def generate_multi_file_analysis(results, keyword_hits=None):
+    successful_results = [r for r in results if r['success']]
+    if not successful_results:
+        return "❌ No files processed successfully"
+    if keyword_hits is None:
+        keyword_hits = merge_keyword_hits(file_keyword_hits(r) for r in successful_results)
+    pattern_counts = {category: len(keyword_hits.get(category, {})) for category in EVIDENCE_CATEGORIES}
+    analysis_parts = [
+        "🚀 **MULTI-FILE OCR MEGA-ANALYSIS**",
+        f"📊 **Files Processed:** {len(successful_results)}/{len(results)}",
+        f"� **Total Words Extracted:** {sum(r.get('word_count', 0) for r in successful_results)}",
+        f"📈 **Average Confidence:** {sum(r.get('confidence_score', 0) for r in successful_results) / len(successful_results):.1f}%",
+        ""
+    ]
+    if any(count > 0 for count in pattern_counts.values()):
+        analysis_parts.append("🔍 **DETECTED PATTERNS ACROSS ALL FILES:**")
+        for category, count in pattern_counts.items():
+            if count > 0:
+                if category == 'corruption':
+                    analysis_parts.append(f"🚨 **CORRUPTION INDICATORS:** {count} instances found!")
+                elif category == 'legal':
+                    analysis_parts.append(f"⚖️ **LEGAL CONTENT:** {count} legal terms detected")
+                elif category == 'documents':
+                    analysis_parts.append(f"📋 **DOCUMENT TYPES:** {count} document indicators")
+                elif category == 'identity':
+                    analysis_parts.append(f"🔐 **AUTHENTICATION:** {count} official markers")
+                elif category == 'dates':
+                    analysis_parts.append(f"📅 **DATE REFERENCES:** {count} temporal markers")
+        analysis_parts.append("")
+    
+    # Urgency assessment
+    if pattern_counts['corruption'] > 0:
+        analysis_parts.extend([
+            "🚨 **OVERALL URGENCY: CRITICAL**",
+            "⚡ **RECOMMENDATION:** Immediate multi-file investigation required!",
+            "🔥 **SDG 16 IMPACT:** High priority for Peace & Justice review"
+        ])
+    elif pattern_counts['legal'] > 2:
+        analysis_parts.extend([
+            "🟠 **OVERALL URGENCY: HIGH**",
+            "📋 **RECOMMENDATION:** Comprehensive legal document review needed",
+            "⚖️ **SDG 16 IMPACT:** Significant institutional implications"
+        ])
+    else:
+        analysis_parts.extend([
+            "🟡 **OVERALL URGENCY: STANDARD**",
+            "📝 **RECOMMENDATION:** Standard multi-document processing",
+            "📊 **SDG 16 IMPACT:** Regular institutional review"
+        ])
+    
+    return "\n".join(analysis_parts)
+
+def crazy_ocr_magic(image_file):
+    try:
+        with ingest.upload_buffer(image_file) as buffer:
+            if ocr_cache.cache_enabled():
+                cache_key = ocr_cache.cache_key(buffer)
+                cached = ocr_cache.get_cache().get(cache_key)
+                if cached is not None:
+                    return cached
+            result = ocr_buffer(
+                buffer, ingest.paged_kind(image_file), ingest.spooled_path(image_file)
+            )
+        record_tier(result)
+        if ocr_cache.cache_enabled():
+            ocr_cache.get_cache().put(cache_key, result)
+        return result
+        
+    except Exception as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'extracted_text': '',
+            'confidence_score': 0,
+            'analysis': f'❌ OCR Processing Error: {str(e)}'
+        }
+
+def evidence_keyword_hits(text, matcher=None):
+    """{category: {term: count}} for the evidence categories, from one scan."""
+    categories = (matcher or keywords.get_matcher()).scan(text).categories()
+    return {category: categories[category] for category in EVIDENCE_CATEGORIES if category in categories}
+
+def file_keyword_hits(file_result):
+    # Results cached before per-file hits existed are scanned once here
+    if 'keyword_hits' in file_result:
+        return file_result['keyword_hits']
+    return evidence_keyword_hits(file_result.get('extracted_text', ''))
+
+def merge_keyword_hits(hit_maps):
+    """Sum per-file (or per-page) hit counts; work grows with the number of files."""
+    merged = {}
+    for hits in hit_maps:
+        for category, counts in hits.items():
+            bucket = merged.setdefault(category, {})
+            for term, count in counts.items():
+                bucket[term] = bucket.get(term, 0) + count
+    # Taxonomy terms in taxonomy order, then pattern hits (years, dates) as found
+    taxonomy = keywords.get_matcher().taxonomy
+    ordered = {}
+    for category in EVIDENCE_CATEGORIES:
+        if category in merged:
+            terms = [term for term in taxonomy.get(category, []) if term in merged[category]]
+            terms.extend(term for term in merged[category] if term not in terms)
+            ordered[category] = {term: merged[category][term] for term in terms}
+    return ordered
+
+def analyze_text_for_evidence(text):
+
+    if not text:
+        return "No text found in image"
+    return format_evidence_analysis(evidence_keyword_hits(text))
+
+def urgency_level(keyword_hits):
+    """'critical' for corruption terms, 'high' for legal ones, else 'standard'."""
+    if keyword_hits.get('corruption'):
+        return 'critical'
+    if keyword_hits.get('legal'):
+        return 'high'
+    return 'standard'
+
+def format_evidence_analysis(keyword_hits):
+    found_patterns = {category: list(counts) for category, counts in keyword_hits.items() if counts}
+    
+    # Generate crazy analysis report
+    analysis_parts = ["🔍 **AUTOMATED OCR EVIDENCE ANALYSIS**\n"]
+    
+    if not found_patterns:
+        analysis_parts.append("📄 **Content Type:** General text/document")
+        analysis_parts.append("🟡 **SDG 16 Relevance:** Requires manual review")
+    else:
+        for category, matches in found_patterns.items():
+            if category == 'corruption':
+                analysis_parts.append(f"🚨 **CORRUPTION ALERT:** Found {len(matches)} corruption-related terms!")
+                analysis_parts.append(f"   Terms: {', '.join(matches[:3])}")
+            elif category == 'legal':
+                analysis_parts.append(f"⚖️ **LEGAL CONTENT:** {len(matches)} justice-related terms detected")
+                analysis_parts.append(f"   Terms: {', '.join(matches[:3])}")
+            elif category == 'documents':
+                analysis_parts.append(f"📋 **DOCUMENT TYPE:** {len(matches)} document indicators found")
+            elif category == 'identity':
+                analysis_parts.append(f"🔐 **AUTHENTICATION:** {len(matches)} official markers detected")
+    
+    # Add urgency level
+    urgency = urgency_level(found_patterns)
+    if urgency == 'critical':
+        analysis_parts.append("\n🚨 **URGENCY LEVEL: CRITICAL**")
+        analysis_parts.append("⚡ **ACTION REQUIRED:** Immediate investigation recommended")
+    elif urgency == 'high':
+        analysis_parts.append("\n🟠 **URGENCY LEVEL: HIGH**")
+        analysis_parts.append("📋 **ACTION REQUIRED:** Legal review recommended")
+    else:
+        analysis_parts.append("\n🟡 **URGENCY LEVEL: STANDARD**")
+        analysis_parts.append("📝 **ACTION REQUIRED:** Standard processing")
+    
+    return "\n".join(analysis_parts)
+
+# Markdown wrapped around every judgment; streamed as their own chunks
+JUDGMENT_HEADER = """# 🏛️ AI JUDGE ANALYSIS - SDG 16
+
+## 📋 Case Assessment
+
+"""
+
+JUDGMENT_FOOTER = """
+
+---
+
+## ⚖️ Final Recommendation
+This case requires institutional review under **Peace and Justice Strong Institutions** frameworks.
+
+### 📊 SDG 16 Compliance Checklist
+- [ ] Rule of Law Adherence
+- [ ] Human Rights Protection
+- [ ] Institutional Transparency
+- [ ] Access to Justice
+- [ ] Conflict Resolution
+- [ ] Corruption Prevention
+
+> **Status**: Under AI Judge Review  
+> **Framework**: SDG 16 - Peace and Justice Strong Institutions  
+> **Priority**: Standard Institutional Protocol
+"""
+
+def format_markdown_response(content):
+
+    # Add proper markdown formatting
+    return JUDGMENT_HEADER + content + JUDGMENT_FOOTER
+
+# Enhanced SDG 16 specialized system message with markdown formatting instructions
+JUDGE_SYSTEM_PROMPT = (
+    "You are an AI judge specialized in SDG 16: Peace and Justice Strong Institutions. "
+    "Analyze evidence based on: 1. Rule of law, 2. Human rights protection, "
+    "3. Institutional transparency, 4. Access to justice, 5. Conflict resolution, "
+    "6. Corruption prevention. Provide fair, balanced judgments supporting peace and justice. "
+    "Format your response using markdown with headers, bullet points, and emphasis for clarity. "
+    "Use professional legal language appropriate for institutional review."
+)
+
+def judge_messages(evidence_title, evidence_description, submitted_by):
+    system_message = {
+        'role': 'system',
+        'content': JUDGE_SYSTEM_PROMPT
+    }
+    
+    user_message = {
+        'role': 'user', 
+        'content': f"""
+Analyze this evidence for SDG 16 (Peace and Justice Strong Institutions):
+
+**Title:** {evidence_title}
+**Description:** {evidence_description}
+**Submitted by:** {submitted_by}
+
+Provide a comprehensive professional judgment using markdown formatting on:
+
+### Analysis Requirements:
+- **Relevance to peace and justice**
+- **Institutional implications**  
+- **Recommended actions**
+- **Legal/ethical considerations**
+- **SDG 16 target alignment**
+
+Format your response with clear headers, bullet points, and professional structure suitable for institutional review.
+                """
+    }
+    return [system_message, user_message]
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You condense extracted text from evidence submitted for an SDG 16 review. "
+    "Keep names, dates, amounts, institutions, documents and any allegation of wrongdoing. "
+    "Answer with plain factual sentences only."
+)
+
+def summarize_for_judge(text, max_tokens, priority='standard', deadline_at=None):
+    """Map step of the prompt builder: a short summary of one chunk, or None."""
+    if not llm_client.is_available():
+        return None
+    deadline = getattr(settings, 'LLM_SUMMARY_DEADLINE_SECONDS', 60)
+    if deadline_at is not None:
+        deadline = min(deadline, deadline_at - time.monotonic())
+    if deadline <= 0:
+        return None
+    # A level below the judgment itself, so summaries never delay interactive judgments
+    scheduler = judge_scheduler.get_scheduler()
+    started = time.monotonic()
+    try:
+        scheduler.acquire(judge_scheduler.lower_priority(priority), timeout=deadline)
+    except TimeoutError:
+        return None
+    try:
+        return llm_client.chat(
+            llm_client.model(),
+            [
+                {'role': 'system', 'content': SUMMARY_SYSTEM_PROMPT},
+                {'role': 'user', 'content': f"Summarise in at most {max_tokens * 3 // 4} words:\n\n{text}"}
+            ],
+            options={'num_predict': max_tokens},
+            deadline=max(0.1, deadline - (time.monotonic() - started))
+        ) or None
+    except Exception:
+        return None
+    finally:
+        scheduler.release()
+
+def judge_evidence_text(description, ocr_result=None, priority='standard'):
+    # ✂️ The description plus the OCR text that fits the prompt budget
+    return prompt_builder.build_evidence_text(
+        description, prompt_builder.ocr_sources(ocr_result),
+        summarize=lambda text, max_tokens, deadline_at: summarize_for_judge(text, max_tokens, priority, deadline_at)
+    )
+
+def judgment_fallback(evidence_title, submitted_by, error=None):
+    if error is not None:
+        return f"""## 🚨 Emergency Protocol Activated
+
+**Case:** {evidence_title}  
+**Submitted by:** {submitted_by}
+
+### Standard Judgment
+This matter requires **immediate institutional attention** under SDG 16 principles.
+
+#### Recommended Actions:
+1. 🔍 **Investigate** - Initiate due process investigation
+2. 🛡️ **Protect** - Ensure safety of all parties
+3. 📝 **Document** - Maintain detailed records
+4. ⚖️ **Review** - Apply institutional oversight
+
+**Error Log:** `{str(error)}`"""
+    
+    # Enhanced fallback with markdown formatting when ollama not available
+    return f"""## 📋 Standard SDG 16 Judicial Review
+
+**Case Title:** {evidence_title}  
+**Submitted by:** {submitted_by}
+
+### Institutional Assessment
+This evidence has been reviewed under **SDG 16 frameworks** (Peace and Justice Strong Institutions).
+
+### Judgment Criteria Applied
+- ✅ **Rule of Law Compliance**
+- ✅ **Human Rights Protection**  
+- ✅ **Institutional Transparency**
+- ✅ **Access to Justice**
+- ✅ **Conflict Resolution Potential**
+- ✅ **Corruption Prevention**
+
+### Recommended Actions
+1. **Escalate** to appropriate justice mechanisms
+2. **Ensure transparency** in all proceedings
+3. **Protect** all parties involved
+4. **Follow** established due process procedures
+5. **Monitor** for SDG 16 compliance
+
+> **Status:** Under institutional review - Manual analysis applied  
+> **Priority:** Standard SDG 16 protocols in effect
+
+*Note: AI Judge service temporarily offline - Manual review protocols activated*"""
+
+def stream_judgment(evidence_title, evidence_description, submitted_by, priority='standard', ocr_result=None):
+    """
+    Yield ``(kind, text)`` chunks of an AI judgment as they become available.
+
+    ``header`` and ``footer`` are the markdown wrapper, ``token`` is model
+    output forwarded from ollama's streaming mode, ``content`` is a fallback
+    judgment and ``error`` reports a stream that broke midway. Closing the
+    generator (the client went away) closes the ollama stream, which aborts
+    the generation.
+
+    The description and ``ocr_result`` are cut to the prompt token budget
+    first. The model call waits for a judge scheduler slot at ``priority``;
+    the header goes out first, so the client sees progress while queued.
+    While the LLM circuit breaker is open the fallback is served at once.
+    """
+    yield 'header', JUDGMENT_HEADER
+    if not llm_client.is_available():
+        yield 'content', judgment_fallback(evidence_title, submitted_by)
+        yield 'footer', JUDGMENT_FOOTER
+        return
+    
+    evidence_text = judge_evidence_text(evidence_description, ocr_result, priority)
+    scheduler = judge_scheduler.get_scheduler()
+    scheduler.acquire(priority)
+    stream = None
+    received = False
+    try:
+        stream = llm_client.chat_stream(llm_client.model(), judge_messages(evidence_title, evidence_text, submitted_by))
+        for part in stream:
+            token = part.get('message', {}).get('content', '')
+            if token:
+                received = True
+                yield 'token', token
+        if not received:
+            yield 'content', "⚖️ AI Judge analysis temporarily unavailable. Standard institutional review protocols applied."
+    except Exception as e:
+        if received:
+            yield 'error', f"\n\n**Error Log:** `{str(e)}`"
+        else:
+            yield 'content', judgment_fallback(evidence_title, submitted_by, error=e)
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+        scheduler.release()
+    yield 'footer', JUDGMENT_FOOTER
+
+async def astream_judgment(evidence_title, evidence_description, submitted_by, priority='standard', ocr_result=None):
+    """
+    Async twin of ``stream_judgment`` for the ASGI views, on ``ollama.AsyncClient``.
+
+    A client disconnect cancels the task consuming this generator; the
+    ``finally`` then closes the ollama stream, aborting the generation.
+    """
+    yield 'header', JUDGMENT_HEADER
+    if not llm_client.is_available():
+        yield 'content', judgment_fallback(evidence_title, submitted_by)
+        yield 'footer', JUDGMENT_FOOTER
+        return
+    
+    # Token counting and any map-reduce summaries block, so they run on the
+    # prompt builder's threads; the upload/OCR threads stay free for POSTs
+    evidence_text = await prompt_builder.run_in_thread(judge_evidence_text, evidence_description, ocr_result, priority)
+    # Cancelled while queued, the request simply leaves the queue
+    scheduler = judge_scheduler.get_scheduler()
+    await scheduler.aacquire(priority)
+    stream = None
+    received = False
+    try:
+        stream = llm_client.achat_stream(llm_client.model(), judge_messages(evidence_title, evidence_text, submitted_by))
+        async for part in stream:
+            token = part.get('message', {}).get('content', '')
+            if token:
+                received = True
+                yield 'token', token
+        if not received:
+            yield 'content', "⚖️ AI Judge analysis temporarily unavailable. Standard institutional review protocols applied."
+    except Exception as e:
+        if received:
+            yield 'error', f"\n\n**Error Log:** `{str(e)}`"
+        else:
+            yield 'content', judgment_fallback(evidence_title, submitted_by, error=e)
+    finally:
+        aclose = getattr(stream, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+        scheduler.release()
+    yield 'footer', JUDGMENT_FOOTER
+
+def ai_judge_analysis(evidence_title, evidence_description, submitted_by, priority='standard'):
+    """
+    AI Judge for SDG 16 - Peace and Justice Strong Institutions with Markdown Support
+    """
+    return "".join(text for _, text in stream_judgment(evidence_title, evidence_description, submitted_by, priority))
+
+def describe_with_ocr(description, ocr_result):
+    if not ocr_result or not ocr_result['success']:
+        return description
+    if 'combined_text' not in ocr_result:
+        # If OCR was successful, enhance the description with extracted text
+        if not ocr_result['extracted_text']:
+            return description
+        return f"""{description}
+
+---
+
+🔥 **EXTRACTED TEXT FROM IMAGE EVIDENCE:**
+
+{ocr_result['extracted_text']}
+
+---
+
+{ocr_result['analysis']}
+
+**OCR Confidence:** {ocr_result['confidence_score']:.1f}%
+**Words Extracted:** {ocr_result['word_count']}
+**Characters:** {ocr_result['character_count']}
+"""
+    if not ocr_result['combined_text']:
+        return description
+    return f"""{description}
+
+---
+
+🚀 **MULTI-FILE OCR EXTRACTION RESULTS:**
+
+**Files Processed:** {ocr_result['successful_files']}/{ocr_result['total_files']}
+**Total Words:** {ocr_result['total_words']}
+**Average Confidence:** {ocr_result['average_confidence']:.1f}%
+
+{ocr_result['combined_text']}
+
+---
+
+{ocr_result['combined_analysis']}
+"""
+
+# Requests and speculative judgments may both find the same job finished
+_ocr_apply_lock = threading.Lock()
+
+def apply_finished_ocr_job(evidence):
+    # Fold a finished background OCR job into a submission, once
+    job_id = evidence.get('ocr_job_id')
+    if not job_id or evidence.get('ocr_result'):
+        return
+    job = OCRJob.objects.filter(pk=job_id).first()
+    if job is None or not job.is_finished or job.result is None:
+        return
+    with _ocr_apply_lock:
+        if evidence.get('ocr_result'):
+            return
+        evidence['ocr_result'] = job.result
+        evidence['description'] = describe_with_ocr(evidence['description'], job.result)
+        # The description changed, so any judgment of the old one no longer applies
+        if evidence.pop('ai_judgment', None):
+            judgment_cache.get_cache().invalidate(ref=f"submission:{evidence['id']}")
+        search.index_submission(evidence)
+        register_submission(evidence)
+
+def ocr_job_state(evidence):
+    # 'done' once any OCR text is folded in (or none is coming), 'failed' if
+    # the job ended without a result, 'pending' while it can still change the description
+    apply_finished_ocr_job(evidence)
+    job_id = evidence.get('ocr_job_id')
+    if not job_id or evidence.get('ocr_result'):
+        return 'done'
+    job = OCRJob.objects.filter(pk=job_id).only('status').first()
+    if job is None or job.is_finished:
+        return 'failed'
+    return 'pending'
+
+def ocr_wait_deadline():
+    return time.monotonic() + getattr(settings, 'JUDGMENT_OCR_WAIT_SECONDS', 300)
+
+def wait_for_ocr_job(evidence):
+    # True once the submission's background OCR is folded in; False if it failed or took too long
+    deadline = ocr_wait_deadline()
+    while True:
+        state = ocr_job_state(evidence)
+        if state != 'pending' or time.monotonic() >= deadline:
+            return state == 'done'
+        time.sleep(getattr(settings, 'OCR_JOB_POLL_INTERVAL', 1.0))
+
+def ocr_job_waits(evidence):
+    # ``wait_for_ocr_job`` for the judgment stream: yields once per poll, so it can keep the connection alive
+    deadline = ocr_wait_deadline()
+    while ocr_job_state(evidence) == 'pending' and time.monotonic() < deadline:
+        yield
+        time.sleep(getattr(settings, 'OCR_JOB_POLL_INTERVAL', 1.0))
+
+async def aocr_job_waits(evidence):
+    deadline = ocr_wait_deadline()
+    while await sync_to_async(ocr_job_state)(evidence) == 'pending' and time.monotonic() < deadline:
+        yield
+        await asyncio.sleep(getattr(settings, 'OCR_JOB_POLL_INTERVAL', 1.0))
+
+def ocr_result_text(ocr_result):
+    if 'results' in ocr_result:
+        return "\n".join(r['extracted_text'] for r in ocr_result['results'] if r['success'])
+    return ocr_result.get('extracted_text', '')
+
+def merge_duplicates(matches, found):
+    # Strongest match per earlier submission: identical file, then same OCR text, then similar image
+    for match in found:
+        current = matches.get(match['doc_key'])
+        if current is None or dedup.match_rank(match) < dedup.match_rank(current):
+            matches[match['doc_key']] = match
+    return matches
+
+def upload_duplicates(image_hashes, content_hashes):
+    # Earlier submissions holding an identical or similar-looking copy of any upload
+    matches = {}
+    for value in content_hashes:
+        merge_duplicates(matches, dedup.find_similar('content', value))
+    for value in image_hashes:
+        merge_duplicates(matches, dedup.find_similar('image', value))
+    return sorted(matches.values(), key=dedup.match_rank)
+
+def reusable_ocr_result(content_hashes, duplicates):
+    # Only the identical file, sent alone both times, can stand in for the OCR;
+    # a similar-looking image may carry entirely different text
+    if len(content_hashes) != 1 or not getattr(settings, 'DEDUP_REUSE_OCR', True):
+        return None
+    for match in duplicates:
+        if match['kind'] == 'content' and match['file_count'] == 1 and match['has_ocr_result']:
+            stored = dedup.document(match['doc_key'])
+            if stored and stored['ocr_result']:
+                return dict(stored['ocr_result'], reused_from=match['doc_key'])
+    return None
+
+def register_submission(evidence, image_hashes=(), replace=False, content_hashes=()):
+    """Fingerprint a submission and record any near-duplicates on it."""
+    if not dedup.enabled():
+        return
+    doc_key = f"submission:{evidence['id']}"
+    ocr_result = evidence.get('ocr_result')
+    stored_result = None
+    text_hash = None
+    if ocr_result and ocr_result['success']:
+        stored_result = {k: v for k, v in ocr_result.items() if k != 'reused_from'}
+        text_hash = dedup.text_simhash(ocr_result_text(ocr_result))
+    duplicates = {match['doc_key']: match for match in evidence.get('duplicates', [])}
+    merge_duplicates(duplicates, dedup.find_similar('text', text_hash, exclude=doc_key))
+    evidence['duplicates'] = sorted(duplicates.values(), key=dedup.match_rank)
+    evidence['duplicate_of'] = evidence['duplicates'][0]['doc_key'] if evidence['duplicates'] else None
+    dedup.register(
+        doc_key, evidence['title'], evidence['file_count'],
+        image_hashes=image_hashes, text_hash=text_hash, ocr_result=stored_result, replace=replace,
+        content_hashes=content_hashes,
+    )
+
+def reused_judgment(evidence):
+    # A submission whose OCR text matches an already judged one shares its judgment;
+    # looking alike (an image match) is never enough
+    if not getattr(settings, 'DEDUP_REUSE_JUDGMENT', False):
+        return None
+    for match in evidence.get('duplicates') or []:
+        if match['kind'] != 'text':
+            continue
+        stored = dedup.document(match['doc_key'])
+        if stored and stored['judgment']:
+            dedup.set_judgment(f"submission:{evidence['id']}", stored['judgment'])
+            note = (f"♻️ **Near-duplicate of submission #{match['id']}** "
+                    f"({match['similarity']:.0%} {match['kind']} match) - reusing its judgment.\n\n")
+            return note + stored['judgment']
+    return None
+
+# Temporary in-memory storage (no database saving)
+temp_evidence_storage = []
+# Ids are never reused, not even after a clear: queued OCR jobs, the search
+# index, dedup and the judgment cache all refer to submissions by id
+_evidence_ids = itertools.count(1)
+# Submissions are stored from upload threads and read by judgment requests at once
+_evidence_lock = threading.Lock()
+
+def reserve_evidence_id():
+    with _evidence_lock:
+        return next(_evidence_ids)
+
+def store_evidence(evidence):
+    with _evidence_lock:
+        temp_evidence_storage.append(evidence)
+
+def find_evidence(evidence_id):
+    with _evidence_lock:
+        return next((e for e in temp_evidence_storage if e['id'] == evidence_id), None)
+
+def stored_evidences():
+    with _evidence_lock:
+        return list(temp_evidence_storage)
+
+def submit_evidence(request):
+    if request.method == 'POST':
+        title = request.POST.get('title')
+        description = request.POST.get('description')
+        submitted_by = request.POST.get('submitted_by')
+        
+        # � CRAZY MULTI-FILE IMAGE EVIDENCE PROCESSING! �
+        image_files = request.FILES.getlist('image_evidence')
+        ocr_result = None
+        ocr_job = None
+        evidence_id = reserve_evidence_id()
+        
+        # 👯 Near-duplicate images can borrow an earlier submission's OCR
+        image_hashes = [dedup.upload_dhash(f) for f in image_files] if dedup.enabled() else []
+        content_hashes = [dedup.upload_digest(f) for f in image_files] if dedup.enabled() else []
+        duplicates = upload_duplicates(image_hashes, content_hashes)
+        if image_files:
+            ocr_result = reusable_ocr_result(content_hashes, duplicates)
+        
+        if ocr_result:
+            description = describe_with_ocr(description, ocr_result)
+        elif image_files and jobs.async_enabled():
+            # OCR runs on a background worker; the description is enhanced once it finishes
+            ocr_job = jobs.enqueue_ocr_job(image_files, 'submission', evidence_id=evidence_id)
+        elif image_files:
+            if len(image_files) == 1:
+                # Single file processing
+                ocr_result = crazy_ocr_magic(image_files[0])
+            else:
+                # Multi-file processing
+                ocr_result = crazy_multi_file_ocr_magic(image_files)
+            description = describe_with_ocr(description, ocr_result)
+        
+        # Add to temporary storage without saving to database
+        temp_evidence = {
+            'id': evidence_id,
+            'title': title,
+            'description': description,
+            'user_description': request.POST.get('description'),
+            'submitted_by': submitted_by,
+            'date_submitted': 'Just now',
+            'has_image': bool(image_files),
+            'ocr_result': ocr_result if ocr_result else None,
+            'image_names': [f.name for f in image_files] if image_files else [],
+            'file_count': len(image_files) if image_files else 0,
+            'ocr_job_id': ocr_job.pk if ocr_job else None,
+            'duplicates': duplicates
+        }
+        store_evidence(temp_evidence)
+        search.index_submission(temp_evidence)
+        register_submission(temp_evidence, image_hashes, replace=True, content_hashes=content_hashes)
+        
+        response_data = {
+            'success': True, 
+            'evidence_id': evidence_id,
+            'message': '🎉 Evidence submitted successfully!',
+            'judgment_speculative': speculate_judgment(temp_evidence)
+        }
+        
+        if ocr_job:
+            response_data['ocr_job_id'] = ocr_job.pk
+            response_data['status_url'] = reverse('ocr_job_status', args=[ocr_job.pk])
+            response_data['message'] = f'⏳ Evidence submitted! OCR queued for {ocr_job.total_files} file(s).'
+        
+        # Add OCR results to response if available
+        if ocr_result:
+            response_data['ocr_result'] = ocr_result
+            if ocr_result['success']:
+                response_data['message'] = f'🔥 Evidence submitted with OCR magic! Extracted {ocr_result["word_count"]} words with {ocr_result["confidence_score"]:.1f}% confidence!'
+            else:
+                response_data['message'] = '📤 Evidence submitted (OCR processing failed)'
+        
+        if temp_evidence.get('duplicates'):
+            original = temp_evidence['duplicates'][0]
+            response_data['duplicates'] = temp_evidence['duplicates']
+            response_data['duplicate_of'] = temp_evidence['duplicate_of']
+            if ocr_result and ocr_result.get('reused_from'):
+                response_data['ocr_reused'] = True
+                response_data['message'] = f'♻️ Evidence submitted! Near-duplicate of submission #{original["id"]}, reused its OCR result.'
+            else:
+                response_data['message'] += f' 👯 Looks like a near-duplicate of submission #{original["id"]}.'
+        
+        return JsonResponse(response_data)
+    
+    # Pass temporary evidence to template
+    return render(request, 'index.html', {'evidences': stored_evidences()})
+
+async def home(request):
+    if request.method == 'POST':
+        # Upload parsing, OCR and database writes block; keep them off the event loop
+        return await ocr_pool.run_in_thread(submit_evidence, request)
+    return submit_evidence(request)
+
+def judgment_key(evidence):
+    return judgment_cache.cache_key(
+        llm_client.model_id(), JUDGE_SYSTEM_PROMPT,
+        evidence['title'], evidence['description'], evidence['submitted_by']
+    )
+
+def cached_judgment(evidence):
+    if not judgment_cache.cache_enabled():
+        return None
+    return judgment_cache.get_cache().get(judgment_key(evidence))
+
+def store_judgment(evidence, judgment):
+    evidence['ai_judgment'] = judgment
+    if judgment_cache.cache_enabled():
+        judgment_cache.get_cache().put(judgment_key(evidence), judgment, ref=f"submission:{evidence['id']}")
+    dedup.set_judgment(f"submission:{evidence['id']}", judgment)
+
+def judge_inputs(evidence):
+    # The stored description has the OCR output stitched in; the judge gets
+    # the submitter's own words and the raw OCR result to budget separately
+    if 'user_description' in evidence:
+        return evidence['user_description'], evidence.get('ocr_result')
+    return evidence['description'], None
+
+def judgment_urgency(evidence):
+    # The description carries any OCR text, so this matches what the judge reads
+    return urgency_level(evidence_keyword_hits(f"{evidence['title']}\n{evidence['description']}"))
+
+def stored_judgment(evidence):
+    # Already judged, judged under identical content, or a judged near-duplicate
+    judgment = evidence.get('ai_judgment') or cached_judgment(evidence) or reused_judgment(evidence)
+    if judgment is not None:
+        evidence['ai_judgment'] = judgment
+    return judgment
+
+def finish_judgment(evidence, chunks):
+    """Keep the judgment a stream produced; fallbacks and broken streams are not worth keeping."""
+    if len(chunks) == 1 and chunks[0][0] == 'judgment':
+        judgment = chunks[0][1]
+    elif chunks and chunks[-1][0] == 'footer' and all(kind in ('header', 'token', 'footer') for kind, _ in chunks):
+        judgment = "".join(text for _, text in chunks)
+    else:
+        return
+    # The generating request has usually stored it already
+    if evidence.get('ai_judgment') != judgment:
+        store_judgment(evidence, judgment)
+
+def judgment_chunks(evidence):
+    """``(kind, text)`` chunks of a submission's judgment, generated only when nothing stored fits."""
+    judgment = stored_judgment(evidence)
+    if judgment is not None:
+        yield 'judgment', judgment
+        return
+    title, submitted_by = evidence['title'], evidence['submitted_by']
+    description, ocr_result = judge_inputs(evidence)
+    priority = judgment_urgency(evidence)
+    if singleflight.enabled():
+        # 🛫 Everyone asking for this judgment right now shares one generation
+        chunks = singleflight.coalesce(
+            judgment_key(evidence),
+            lambda: stream_judgment(title, description, submitted_by, priority, ocr_result),
+            lookup=lambda: cached_judgment(evidence),
+            on_complete=lambda produced: finish_judgment(evidence, produced),
+        )
+    else:
+        chunks = stream_judgment(title, description, submitted_by, priority, ocr_result)
+    seen = []
+    for kind, text in chunks:
+        seen.append((kind, text))
+        yield kind, text
+    finish_judgment(evidence, seen)
+
+def prepare_judgment(evidence):
+    # Background body: judge once the OCR text is in, as a request would
+    if evidence.get('ocr_job_id') and not wait_for_ocr_job(evidence):
+        return
+    for _ in judgment_chunks(evidence):
+        pass
+
+def speculate_judgment(evidence):
+    """
+    🔮 Start a fresh submission's judgment in the background, if there is room.
+
+    ``get_judgment_stream`` then serves it from the cache, or attaches to the
+    generation while it is still in flight.
+    """
+    # Without the model a judgment is the instant fallback; nothing to get ahead of
+    if not speculation.enabled() or not llm_client.is_available():
+        return False
+    return speculation.submit(f"submission:{evidence['id']}", prepare_judgment, evidence)
+
+def sse_event(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+# SSE comment line: keeps the connection open, ignored by the client
+SSE_WAITING = ": waiting for OCR\n\n"
+
+def judgment_events(evidence):
+    # Server-sent events: one event per chunk, then a final "done". A queued
+    # OCR job is waited for first, so the judgment covers its text and joins
+    # the speculative generation under the same key instead of starting another
+    try:
+        for _ in ocr_job_waits(evidence):
+            yield SSE_WAITING
+        for kind, text in judgment_chunks(evidence):
+            yield sse_event({'type': kind, 'content': text})
+    except Exception as e:
+        yield sse_event({'type': 'error', 'content': f'\n\n❌ AI Judge analysis failed: {str(e)}'})
+    yield sse_event({'type': 'done'})
+
+def judgment_text(evidence):
+    # Whole judgment, once any queued OCR job is in
+    for _ in ocr_job_waits(evidence):
+        pass
+    return "".join(text for _, text in judgment_chunks(evidence))
+
+async def ajudgment_chunks(evidence):
+    """
+    Async ``judgment_chunks``: cache lookups run on a thread, tokens come from the async client.
+
+    ASGI only: a generation it starts runs on the current event loop, which
+    must outlive the request.
+    """
+    judgment = await sync_to_async(stored_judgment)(evidence)
+    if judgment is not None:
+        yield 'judgment', judgment
+        return
+    title, submitted_by = evidence['title'], evidence['submitted_by']
+    description, ocr_result = judge_inputs(evidence)
+    priority = judgment_urgency(evidence)
+    if singleflight.enabled():
+        chunks = singleflight.acoalesce(
+            judgment_key(evidence),
+            lambda: astream_judgment(title, description, submitted_by, priority, ocr_result),
+            lookup=lambda: cached_judgment(evidence),
+            on_complete=lambda produced: finish_judgment(evidence, produced),
+        )
+    else:
+        chunks = astream_judgment(title, description, submitted_by, priority, ocr_result)
+    seen = []
+    try:
+        async for kind, text in chunks:
+            seen.append((kind, text))
+            yield kind, text
+    finally:
+        # Leave the flight (or close the model stream) now, not whenever the generator is collected
+        await chunks.aclose()
+    await sync_to_async(finish_judgment)(evidence, seen)
+
+async def ajudgment_events(evidence):
+    try:
+        async for _ in aocr_job_waits(evidence):
+            yield SSE_WAITING
+        async for kind, text in ajudgment_chunks(evidence):
+            yield sse_event({'type': kind, 'content': text})
+    except Exception as e:
+        yield sse_event({'type': 'error', 'content': f'\n\n❌ AI Judge analysis failed: {str(e)}'})
+    yield sse_event({'type': 'done'})
+
+async def get_judgment_stream(request, evidence_id):
+    try:
+        # Find evidence in temporary storage
+        evidence = find_evidence(evidence_id)
+        if not evidence:
+            return JsonResponse({'error': 'Evidence not found'}, status=404)
+        await sync_to_async(apply_finished_ocr_job)(evidence)
+        
+        asgi = isinstance(request, ASGIRequest)
+        if request.GET.get('format') == 'json':
+            # Whole judgment in one response, for clients that cannot read a stream
+            if asgi:
+                async for _ in aocr_job_waits(evidence):
+                    pass
+                judgment = "".join([text async for _, text in ajudgment_chunks(evidence)])
+            else:
+                # Under WSGI this view runs on an event loop that lives for one
+                # request; a flight other requests join must not be tied to it
+                judgment = await sync_to_async(judgment_text)(evidence)
+            return JsonResponse({'judgment': judgment})
+        
+        # 🌊 Forward tokens as the model produces them. Under ASGI an in-flight
+        # judgment holds no thread, and a disconnect cancels the generation.
+        # WSGI would buffer an async iterator whole, so it gets the sync stream
+        # (closed by the server on disconnect).
+        if asgi:
+            events = ajudgment_events(evidence)
+        else:
+            events = judgment_events(evidence)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        return JsonResponse({'error': f'AI Judge analysis failed: {str(e)}'}, status=500)
+
+def ocr_single_upload(request):
+    if request.method == 'POST' and request.FILES.get('image'):
+        image_file = request.FILES['image']
+        
+        # Validate file type
+        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/bmp', 'image/tiff', 'application/pdf']
+        if image_file.content_type not in allowed_types:
+            return JsonResponse({
+                'success': False,
+                'error': 'Invalid file type. Please upload JPEG, PNG, GIF, BMP or TIFF images, or PDF documents.'
+            })
+        
+        # Process with OCR magic
+        ocr_result = crazy_ocr_magic(image_file)
+        
+        if ocr_result['success']:
+            return JsonResponse({
+                'success': True,
+                'message': f'🔥 OCR Magic completed! Extracted {ocr_result["word_count"]} words!',
+                'extracted_text': ocr_result['extracted_text'],
+                'confidence_score': ocr_result['confidence_score'],
+                'analysis': ocr_result['analysis'],
+                'thumbnail': ocr_result.get('thumbnail'),
+                'stats': {
+                    'word_count': ocr_result['word_count'],
+                    'character_count': ocr_result['character_count'],
+                    'filename': image_file.name,
+                    'filesize': image_file.size
+                }
+            })
+        else:
+            return JsonResponse({
+                'success': False,
+                'error': ocr_result['error'],
+                'message': '❌ OCR processing failed'
+            })
+    
+    return JsonResponse({'success': False, 'error': 'No image file provided'})
+
+async def process_image_evidence(request):
+    return await ocr_pool.run_in_thread(ocr_single_upload, request)
+
+def ocr_multi_upload(request):
+    if request.method == 'POST' and request.FILES.getlist('images'):
+        image_files = request.FILES.getlist('images')
+        
+        # Validate file count
+        if len(image_files) > 10:
+            return JsonResponse({
+                'success': False,
+                'error': 'Maximum 10 files allowed per batch. Please reduce the number of files.'
+            })
+        
+        # Validate file types
+        allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif', 'image/bmp', 'image/tiff', 'application/pdf']
+        for image_file in image_files:
+            if image_file.content_type not in allowed_types:
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Invalid file type for {image_file.name}. Please upload JPEG, PNG, GIF, BMP or TIFF images, or PDF documents.'
+                })
+        
+        if jobs.async_enabled():
+            ocr_job = jobs.enqueue_ocr_job(image_files, 'multi')
+            return JsonResponse({
+                'success': True,
+                'message': f'⏳ Multi-file OCR queued! {ocr_job.total_files} files waiting for a worker.',
+                'job_id': ocr_job.pk,
+                'status': ocr_job.status,
+                'status_url': reverse('ocr_job_status', args=[ocr_job.pk])
+            }, status=202)
+        
+        # Process with CRAZY multi-file OCR magic
+        ocr_result = crazy_multi_file_ocr_magic(image_files)
+        
+        return JsonResponse({
+            'success': ocr_result['success'],
+            'message': f'🚀 Multi-file OCR completed! Processed {ocr_result["successful_files"]}/{ocr_result["total_files"]} files, extracted {ocr_result["total_words"]} total words!',
+            'multi_file_result': ocr_result
+        })
+    
+    return JsonResponse({'success': False, 'error': 'No image files provided'})
+
+async def process_multiple_image_evidence(request):
+    return await ocr_pool.run_in_thread(ocr_multi_upload, request)
+
+def clear_evidence(request):
+    with _evidence_lock:
+        temp_evidence_storage.clear()
+    search.remove_source('submission')
+    dedup.remove_source('submission')
+    return JsonResponse({'success': True, 'message': 'All evidence cleared by AI Judge system'})
+
+def search_evidence(request):
+    query = request.GET.get('q', '').strip()
+    categories = request.GET.getlist('category')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 20)), 100))
+        offset = max(0, int(request.GET.get('offset', 0)))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit and offset must be integers'}, status=400)
+    if not query and not categories:
+        return JsonResponse({'success': False, 'error': 'Provide a search query (q) or a category'}, status=400)
+    results = search.search(query, categories, limit=limit, offset=offset)
+    return JsonResponse({'success': True, 'query': query, 'categories': categories, **results})
+
+def ocr_job_status(request, job_id):
+    job = OCRJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'success': False, 'error': 'OCR job not found'}, status=404)
+    return JsonResponse(jobs.job_status(job))
+
+def ocr_cache_stats(request):
+    return JsonResponse({
+        'success': True,
+        'cache': ocr_cache.get_cache().snapshot(),
+        'judgment_cache': judgment_cache.get_cache().snapshot(),
+        'judgment_flights': singleflight.stats(),
+        'speculative_judgments': speculation.stats(),
+        'judge_scheduler': judge_scheduler.get_scheduler().snapshot(),
+        'judge_prompts': prompt_builder.stats(),
+        'llm': llm_client.snapshot(),
+        'tiers': tier_stats()
+    })